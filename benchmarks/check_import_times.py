@@ -0,0 +1,74 @@
+"""Startup budget for the command-line entry points.
+
+Each module is imported in a fresh interpreter. The check fails when an
+import takes longer than its budget, or when it loads one of the heavy
+libraries that the module is supposed to import only when needed.
+
+    python benchmarks/check_import_times.py
+    python benchmarks/check_import_times.py --repeat 10 --scale 2
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> (import budget in seconds, libraries it must not load at import time)
+BUDGETS: Dict[str, Tuple[float, List[str]]] = {
+    "logistics_cli": (0.05, ["numpy", "pandas", "faker", "matplotlib", "sklearn"]),
+    "logistics_index": (0.25, ["pandas", "faker", "matplotlib", "sklearn"]),
+    "generate_logistics_data": (0.4, ["pandas", "faker", "tqdm", "matplotlib", "sklearn"]),
+    "logistics_analyzer": (1.0, ["matplotlib", "seaborn", "sklearn", "faker"]),
+}
+
+HEAVY_LIBRARIES = sorted({name for _, forbidden in BUDGETS.values() for name in forbidden} | {"seaborn"})
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": seconds, "loaded": loaded}}))
+"""
+
+
+def measure(module: str) -> Dict:
+    """Import ``module`` in a fresh interpreter; return its import time and heavy libraries loaded."""
+    result = subprocess.run([sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_LIBRARIES)],
+                            cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check the import time of the command-line entry points.")
+    parser.add_argument("--repeat", type=int, default=5, help="imports per module; the fastest is kept")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget, for slow machines")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    failures = 0
+    print(f"{'module':<26} {'import':>9} {'budget':>9}  heavy libraries loaded")
+    for module, (budget, forbidden) in BUDGETS.items():
+        runs = [measure(module) for _ in range(args.repeat)]
+        seconds = min(run["seconds"] for run in runs)
+        loaded = runs[0]["loaded"]
+        unexpected = sorted(set(loaded) & set(forbidden))
+        limit = budget * args.scale
+        status = "ok"
+        if seconds > limit or unexpected:
+            status = "FAIL"
+            failures += 1
+        print(f"{module:<26} {seconds * 1000:>7.0f}ms {limit * 1000:>7.0f}ms  "
+              f"{', '.join(loaded) or '-'}  {status}"
+              + (f" (must not load {', '.join(unexpected)})" if unexpected else ""))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
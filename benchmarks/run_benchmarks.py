@@ -0,0 +1,322 @@
+"""Throughput and peak-memory benchmarks for the generator and the analyzer.
+
+Every case runs in a fresh process so its peak RSS is its own. Results are
+compared against ``baseline.json`` next to this file; a case regresses when
+its wall time or peak RSS exceeds the baseline by more than the tolerance.
+
+    python benchmarks/run_benchmarks.py                  # run and compare
+    python benchmarks/run_benchmarks.py --quick          # smallest scales only
+    python benchmarks/run_benchmarks.py --update-baseline
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Fixed inputs so every run measures the same work
+SEED = 1234
+REFERENCE_TIME = datetime(2025, 5, 20, 12, 0, 0)
+ANALYZER_PACKAGES = 20000
+
+# Wall-time differences below this are timer noise, whatever the percentage
+MIN_WALL_DELTA_SECONDS = 0.05
+
+
+def _model(data_dir: str):
+    from generate_logistics_data import SmartLogisticsTrackingModel
+    model = SmartLogisticsTrackingModel(seed=SEED, reference_time=REFERENCE_TIME, data_dir=data_dir)
+    model.facility_locations  # build the value pools and facility network outside the timed section
+    return model
+
+
+def bench_generate(data_dir: str, scale: int) -> Callable[[], Dict]:
+    model = _model(data_dir)
+
+    def run():
+        packages = model.generate_package_data(scale, show_progress=False)
+        events = sum(len(package["tracking_history"]) for package in packages)
+        return {"packages": len(packages), "events": events}
+    return run
+
+
+def bench_generate_package_batch(data_dir: str, scale: int) -> Callable[[], Dict]:
+    model = _model(data_dir)
+
+    def run():
+        batch = model.generate_package_batch(scale)
+        return {"packages": len(batch["tracking_number"])}
+    return run
+
+
+def _bench_save(fmt: str, data_dir: str, scale: int) -> Callable[[], Dict]:
+    model = _model(data_dir)
+    packages = model.generate_package_data(scale, show_progress=False)
+    filename = {"json": "bench.json", "csv": "bench.csv"}[fmt]
+
+    def run():
+        getattr(model, f"save_to_{fmt}")(packages, filename)
+        return {"packages": len(packages), "bytes": os.path.getsize(os.path.join(data_dir, filename))}
+    return run
+
+
+def bench_save_to_json(data_dir: str, scale: int) -> Callable[[], Dict]:
+    return _bench_save("json", data_dir, scale)
+
+
+def bench_save_to_csv(data_dir: str, scale: int) -> Callable[[], Dict]:
+    return _bench_save("csv", data_dir, scale)
+
+
+def _analyzer(data_dir: str, **kwargs):
+    from logistics_analyzer import LogisticsAnalyzer
+    return LogisticsAnalyzer(data_dir=data_dir, **kwargs)
+
+
+def bench_load_data(data_dir: str, scale: int) -> Callable[[], Dict]:
+    analyzer = _analyzer(data_dir, use_cache=False)
+
+    def run():
+        analyzer.load_data()
+        return {"packages": len(analyzer.df)}
+    return run
+
+
+def bench_load_data_cached(data_dir: str, scale: int) -> Callable[[], Dict]:
+    cache_dir = os.path.join(data_dir, "bench-cache")
+    _analyzer(data_dir, cache_dir=cache_dir).load_data()  # populate the sidecar
+
+    def run():
+        analyzer = _analyzer(data_dir, cache_dir=cache_dir)
+        analyzer.load_data()
+        return {"packages": len(analyzer.df)}
+    return run
+
+
+def _bench_analyzer_method(method: str, data_dir: str) -> Callable[[], Dict]:
+    analyzer = _analyzer(data_dir, use_cache=False)
+    analyzer.load_data()
+
+    def run():
+        getattr(analyzer, method)()
+        return {"packages": len(analyzer.df)}
+    return run
+
+
+def bench_get_basic_stats(data_dir: str, scale: int) -> Callable[[], Dict]:
+    return _bench_analyzer_method("get_basic_stats", data_dir)
+
+
+def bench_analyze_delivery_times(data_dir: str, scale: int) -> Callable[[], Dict]:
+    return _bench_analyzer_method("analyze_delivery_times", data_dir)
+
+
+def bench_chunked_stats(data_dir: str, scale: int) -> Callable[[], Dict]:
+    analyzer = _analyzer(data_dir, chunk_size=scale)
+
+    def run():
+        stats = analyzer.get_basic_stats()
+        analyzer.analyze_delivery_times()
+        return {"packages": stats["total_packages"]}
+    return run
+
+
+def bench_train_delivery_prediction_model(data_dir: str, scale: int) -> Callable[[], Dict]:
+    # Import sklearn up front so a single run times training, not the import
+    import sklearn.ensemble  # noqa: F401
+    import sklearn.model_selection  # noqa: F401
+    return _bench_analyzer_method("train_delivery_prediction_model", data_dir)
+
+
+def bench_predict(data_dir: str, scale: int) -> Callable[[], Dict]:
+    analyzer = _analyzer(data_dir, use_cache=False)
+    model, _ = analyzer.train_delivery_prediction_model()
+    frame = analyzer.df
+
+    def run():
+        model.predict(frame)
+        return {"packages": len(frame)}
+    return run
+
+
+def bench_ledger_anchor(data_dir: str, scale: int) -> Callable[[], Dict]:
+    import asyncio
+    from logistics_ledger import LedgerSink, MockChain
+    from logistics_stream import iter_events_in_time_order
+    model = _model(data_dir)
+    events = list(iter_events_in_time_order(model.generate_package_data(scale, show_progress=False)))
+
+    def run():
+        # Zero latency measures the encoding and hashing side of anchoring
+        stats = asyncio.run(LedgerSink(MockChain(latency=0.0)).run(events))
+        return {"events": stats["events"]}
+    return run
+
+
+# name -> (setup function, scales, whether it reads the analyzer dataset)
+BENCHMARKS = {
+    "generate_package_data": (bench_generate, [1000, 10000, 50000], False),
+    "generate_package_batch": (bench_generate_package_batch, [200000], False),
+    "save_to_json": (bench_save_to_json, [10000], False),
+    "save_to_csv": (bench_save_to_csv, [10000], False),
+    "analyzer.load_data": (bench_load_data, [ANALYZER_PACKAGES], True),
+    "analyzer.load_data_cached": (bench_load_data_cached, [ANALYZER_PACKAGES], True),
+    "analyzer.get_basic_stats": (bench_get_basic_stats, [ANALYZER_PACKAGES], True),
+    "analyzer.analyze_delivery_times": (bench_analyze_delivery_times, [ANALYZER_PACKAGES], True),
+    "analyzer.chunked_stats_and_delays": (bench_chunked_stats, [5000], True),
+    "analyzer.train_delivery_prediction_model": (bench_train_delivery_prediction_model,
+                                                 [ANALYZER_PACKAGES], True),
+    "prediction.predict": (bench_predict, [ANALYZER_PACKAGES], True),
+    "ledger.anchor_events": (bench_ledger_anchor, [10000], False),
+}
+
+
+def _run_case(name: str, scale: int, data_dir: str, repeat: int, results) -> None:
+    """Child-process entry point: set up, time the best of ``repeat`` runs, report peak RSS."""
+    import io
+    import contextlib
+
+    setup = BENCHMARKS[name][0]
+    # Keep progress prints from the code under test out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        run = setup(data_dir, scale)
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            counts = run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    from logistics_metrics import peak_rss_bytes
+    peak = peak_rss_bytes()
+    results.put({"wall_seconds": best, "peak_rss_mb": peak / (1024 * 1024) if peak else 0.0, **counts})
+
+
+def prepare_analyzer_dataset(data_dir: str):
+    """Generate the JSON/CSV pair the analyzer cases read."""
+    from generate_logistics_data import iter_package_data_sharded
+    model = _model(data_dir)
+    packages = iter_package_data_sharded(ANALYZER_PACKAGES, seed=SEED, reference_time=REFERENCE_TIME,
+                                         show_progress=False)
+    model.save_packages(packages, {"json": "logistics_data.json", "csv": "logistics_data.csv"})
+
+
+def run_case(name: str, scale: int, data_dir: str, repeat: int) -> Dict:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_run_case, args=(name, scale, data_dir, repeat, results))
+    process.start()
+    result = results.get()
+    process.join()
+
+    wall = result["wall_seconds"]
+    for unit in ("packages", "events", "bytes"):
+        if unit in result and wall > 0:
+            result[f"{unit}_per_second"] = result[unit] / wall
+    return result
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Return a message for every metric that regressed beyond ``tolerance``."""
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if not reference:
+            continue
+        for metric in ("wall_seconds", "peak_rss_mb"):
+            if metric == "wall_seconds" and result[metric] - reference[metric] < MIN_WALL_DELTA_SECONDS:
+                continue
+            if result[metric] > reference[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{key}: {metric} {result[metric]:.3f} vs baseline {reference[metric]:.3f} "
+                    f"(+{(result[metric] / reference[metric] - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark generator and analyzer throughput.")
+    parser.add_argument("--only", nargs="+", default=None, help="run only these benchmark names")
+    parser.add_argument("--quick", action="store_true", help="run only the smallest scale of each case")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case; the best is kept")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown or memory growth before flagging (default: 0.25)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--output", default=None, help="also write the results as JSON to this path")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    names = args.only or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        print(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+        return 2
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    work_dir = tempfile.mkdtemp(prefix="logistics-bench-")
+    try:
+        if any(BENCHMARKS[name][2] for name in names):
+            print(f"Preparing {ANALYZER_PACKAGES} package analyzer dataset...")
+            prepare_analyzer_dataset(work_dir)
+
+        results = {}
+        print(f"\n{'benchmark':<48}{'wall s':>10}{'peak MB':>10}{'pkg/s':>12}{'events/s':>12}{'MB/s':>8}")
+        for name in names:
+            scales = BENCHMARKS[name][1]
+            for scale in scales[:1] if args.quick else scales:
+                key = f"{name}[{scale}]"
+                result = run_case(name, scale, work_dir, args.repeat)
+                results[key] = result
+                print(f"{key:<48}{result['wall_seconds']:>10.3f}{result['peak_rss_mb']:>10.1f}"
+                      f"{result.get('packages_per_second', 0):>12.0f}"
+                      f"{result.get('events_per_second', 0):>12.0f}"
+                      f"{result.get('bytes_per_second', 0) / 1e6:>8.1f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.update_baseline:
+        # Keep baseline entries for cases that were not run this time
+        merged = {**baseline, **results}
+        with open(args.baseline, "w") as f:
+            json.dump({**report, "results": merged}, f, indent=2)
+        print(f"\nBaseline updated: {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nRegressions against baseline:")
+        for message in regressions:
+            print(f"- {message}")
+        return 1
+    print("\nNo regressions against baseline." if baseline else "\nNo baseline to compare against.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
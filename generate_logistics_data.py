@@ -1,21 +1,55 @@
+import argparse
+import csv
 import json
 import random
-from datetime import datetime, timedelta
-import pandas as pd
-from typing import List, Dict, Optional, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+from typing import TYPE_CHECKING, List, Dict, Iterable, Iterator, Optional, Tuple
 import os
-from faker import Faker
-from tqdm import tqdm
-from dataclasses import dataclass, asdict
+import shutil
+import sys
+from dataclasses import dataclass, fields
+from json.encoder import encode_basestring_ascii as _encode_string
 from enum import Enum
 import uuid
 
-# Initialize Faker with specific providers
-fake = Faker()
-fake.add_provider('address')
-fake.add_provider('company')
-fake.add_provider('date_time')
-fake.add_provider('person')
+from logistics_index import OffsetIndexWriter, index_path_for
+from logistics_metrics import add_metrics_arguments, metrics, profile
+from logistics_network import FacilityNetwork
+from logistics_pools import DEFAULT_POOL_SIZE, ValuePools
+from logistics_transitions import StatusTransitionEngine
+
+# Faker and tqdm are imported where they are used, so importing this module
+# as a library (or in a worker process) stays cheap
+if TYPE_CHECKING:
+    from faker import Faker
+
+# Write buffer for the incremental file writers
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Packages whose histories are simulated together in one vectorized step
+DEFAULT_CHUNK_SIZE = 1000
+
+# Packages per shard in sharded generation. Shard boundaries (and therefore
+# per-shard seeds) depend only on this, never on the number of workers.
+DEFAULT_SHARD_SIZE = 500
+
+def make_faker(seed: Optional[int] = None) -> "Faker":
+    """Create a Faker instance for the en_US locale.
+
+    The default locale already ships the address, company, date_time and
+    person providers. Passing their names to ``add_provider`` as strings
+    registered ``str`` methods as providers and made cities and companies
+    come out as "person person".
+    """
+    from faker import Faker
+
+    fake = Faker()
+    if seed is not None:
+        fake.seed_instance(seed)
+    return fake
 
 class PackageStatus(Enum):
     PENDING = "Pending"
@@ -46,7 +80,74 @@ class ShippingCarrier(Enum):
     USPS = "USPS"
     AMAZON = "Amazon Logistics"
 
-@dataclass
+# Enum members cached once so per-package draws don't rebuild the lists
+PACKAGE_STATUSES = list(PackageStatus)
+PACKAGE_TYPES = list(PackageType)
+SHIPPING_CARRIERS = list(ShippingCarrier)
+SPECIAL_HANDLING_TYPES = (PackageType.FRAGILE, PackageType.REFRIGERATED, PackageType.HAZMAT)
+
+# Lookup tables indexed by package type / carrier code in generate_package_batch
+PACKAGE_TYPE_VALUES = np.array([package_type.value for package_type in PACKAGE_TYPES])
+SHIPPING_CARRIER_VALUES = np.array([carrier.value for carrier in SHIPPING_CARRIERS])
+SPECIAL_HANDLING_MASK = np.array([package_type in SPECIAL_HANDLING_TYPES for package_type in PACKAGE_TYPES])
+
+# Statuses that move a package along its route, and those that happen at its destination
+ROUTE_ADVANCE_CODES = [PACKAGE_STATUSES.index(PackageStatus.IN_TRANSIT)]
+ROUTE_ARRIVAL_CODES = [PACKAGE_STATUSES.index(status)
+                       for status in (PackageStatus.OUT_FOR_DELIVERY, PackageStatus.DELIVERED)]
+# Packages of this type are routed through customs
+INTERNATIONAL_TYPE_CODE = PACKAGE_TYPES.index(PackageType.INTERNATIONAL)
+
+# Status transition probabilities; statuses not listed are terminal
+DEFAULT_STATUS_TRANSITIONS = {
+    PackageStatus.PENDING: {PackageStatus.PROCESSING: 1.0},
+    PackageStatus.PROCESSING: {PackageStatus.IN_TRANSIT: 1.0},
+    PackageStatus.IN_TRANSIT: {PackageStatus.OUT_FOR_DELIVERY: 0.9, PackageStatus.EXCEPTION: 0.1},
+    PackageStatus.OUT_FOR_DELIVERY: {PackageStatus.DELIVERED: 0.95, PackageStatus.EXCEPTION: 0.05},
+    PackageStatus.EXCEPTION: {PackageStatus.IN_TRANSIT: 0.7, PackageStatus.RETURNED: 0.3},
+}
+
+# Inclusive range of tracking events per package type
+DEFAULT_EVENT_COUNT_RANGES = {
+    PackageType.STANDARD: (4, 6),
+    PackageType.EXPRESS: (3, 5),
+    PackageType.PRIORITY: (3, 4),
+    PackageType.OVERNIGHT: (2, 3),
+    PackageType.INTERNATIONAL: (6, 8),
+    PackageType.FRAGILE: (4, 6),
+    PackageType.REFRIGERATED: (3, 5),
+    PackageType.HAZMAT: (5, 7),
+}
+
+# Mean hours a package spends in a status before its next scan
+DEFAULT_DWELL_HOURS = {
+    PackageStatus.PENDING: 6.0,
+    PackageStatus.PROCESSING: 4.0,
+    PackageStatus.IN_TRANSIT: 18.0,
+    PackageStatus.OUT_FOR_DELIVERY: 5.0,
+    PackageStatus.DELIVERED: 12.0,
+    PackageStatus.EXCEPTION: 24.0,
+    PackageStatus.RETURNED: 24.0,
+    PackageStatus.CUSTOMS_HOLD: 48.0,
+    PackageStatus.DAMAGED: 24.0,
+    PackageStatus.LOST: 72.0,
+}
+
+# Promised delivery time after the first scan, per package type
+DELIVERY_SLA_HOURS = {
+    PackageType.STANDARD: 120,
+    PackageType.EXPRESS: 72,
+    PackageType.PRIORITY: 48,
+    PackageType.OVERNIGHT: 24,
+    PackageType.INTERNATIONAL: 240,
+    PackageType.FRAGILE: 120,
+    PackageType.REFRIGERATED: 48,
+    PackageType.HAZMAT: 144,
+}
+
+# Records are slotted: no per-instance __dict__. RecordJsonEncoder writes
+# them with their to_json, field by field without building dicts
+@dataclass(slots=True)
 class Location:
     city: str
     state: str
@@ -57,7 +158,18 @@ class Location:
     facility_name: str
     facility_type: str
 
-@dataclass
+    def to_dict(self) -> Dict:
+        return {"city": self.city, "state": self.state, "zip_code": self.zip_code, "country": self.country,
+                "latitude": self.latitude, "longitude": self.longitude,
+                "facility_name": self.facility_name, "facility_type": self.facility_type}
+
+    def to_json(self, encoder: "RecordJsonEncoder", depth: int = 0) -> str:
+        return encoder.template(Location, depth) % (
+            _encode_string(self.city), _encode_string(self.state), _encode_string(self.zip_code),
+            _encode_string(self.country), _encode_float(self.latitude), _encode_float(self.longitude),
+            _encode_string(self.facility_name), _encode_string(self.facility_type))
+
+@dataclass(slots=True)
 class PackageDimensions:
     length: float
     width: float
@@ -65,7 +177,16 @@ class PackageDimensions:
     weight: float
     volume: float
 
-@dataclass
+    def to_dict(self) -> Dict:
+        return {"length": self.length, "width": self.width, "height": self.height,
+                "weight": self.weight, "volume": self.volume}
+
+    def to_json(self, encoder: "RecordJsonEncoder", depth: int = 0) -> str:
+        return encoder.template(PackageDimensions, depth) % (
+            _encode_float(self.length), _encode_float(self.width), _encode_float(self.height),
+            _encode_float(self.weight), _encode_float(self.volume))
+
+@dataclass(slots=True)
 class TrackingEvent:
     event_id: str
     timestamp: str
@@ -76,18 +197,548 @@ class TrackingEvent:
     scan_type: str
     operator_id: str
 
+    def to_dict(self) -> Dict:
+        """Shallow dict of the fields; ``location`` stays a record."""
+        return {"event_id": self.event_id, "timestamp": self.timestamp, "status": self.status,
+                "location": self.location, "description": self.description, "carrier": self.carrier,
+                "scan_type": self.scan_type, "operator_id": self.operator_id}
+
+    def to_json(self, encoder: "RecordJsonEncoder", depth: int = 0) -> str:
+        return encoder.template(TrackingEvent, depth) % (
+            _encode_string(self.event_id), _encode_string(self.timestamp), _encode_string(self.status.value),
+            self.location.to_json(encoder, depth + 1), _encode_string(self.description),
+            _encode_string(self.carrier.value), _encode_string(self.scan_type), _encode_string(self.operator_id))
+
+RECORD_TYPES = (Location, PackageDimensions, TrackingEvent)
+
+# Three UCS-4 characters per entry, copied as opaque 12-byte blocks to
+# assemble tracking numbers without per-row str()
+_CARRIER_PREFIX_CODES = np.array(
+    [[ord(c) for c in carrier.value[:3]] for carrier in SHIPPING_CARRIERS], dtype=np.uint32
+).view("V12").ravel()
+_DIGIT_TRIPLET_CODES = np.array(
+    [[ord(c) for c in f"{i:03d}"] for i in range(1000)], dtype=np.uint32
+).view("V12").ravel()
+
+# Serials are a fixed permutation of each package's sequence number in its
+# run, so tracking numbers never repeat within SERIAL_SPACE packages
+SERIAL_BASE = 10 ** 8
+SERIAL_SPACE = 9 * 10 ** 8
+SERIAL_MULTIPLIER = 7 ** 10  # coprime to SERIAL_SPACE, so the mapping is one-to-one
+
+def sequence_serials(first_sequence: int, count: int) -> np.ndarray:
+    """9-digit serials of the packages numbered ``first_sequence`` onwards."""
+    sequence = np.arange(first_sequence, first_sequence + count, dtype=np.int64) % SERIAL_SPACE
+    return SERIAL_BASE + sequence * SERIAL_MULTIPLIER % SERIAL_SPACE
+
+def format_tracking_numbers(carrier_codes: np.ndarray, serials: np.ndarray) -> np.ndarray:
+    """Build ``<carrier prefix><serial>`` strings for arrays of carrier codes and 9-digit serials.
+
+    Serials come from ``sequence_serials`` and so always have 9 digits.
+    """
+    codes = np.empty((len(serials), 4), dtype="V12")
+    high, low = np.divmod(serials, 1000)
+    high, middle = np.divmod(high, 1000)
+    codes[:, 0] = _CARRIER_PREFIX_CODES[carrier_codes]
+    codes[:, 1] = _DIGIT_TRIPLET_CODES[high]
+    codes[:, 2] = _DIGIT_TRIPLET_CODES[middle]
+    codes[:, 3] = _DIGIT_TRIPLET_CODES[low]
+    return codes.view("<U12").ravel()
+
+def _round_cents(values: np.ndarray) -> np.ndarray:
+    """Round ``values`` to 2 decimals in place."""
+    return np.round(values, 2, out=values)
+
+def _format_timestamps(timestamps: np.ndarray) -> List[str]:
+    """Format datetime64 values as ``YYYY-MM-DD HH:MM:SS`` strings."""
+    return [value.replace("T", " ") for value in np.datetime_as_string(timestamps, unit="s").tolist()]
+
 class EnumEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, Enum):
             return obj.value
-        if isinstance(obj, (Location, PackageDimensions, TrackingEvent)):
-            return asdict(obj)
+        if isinstance(obj, RECORD_TYPES):
+            return obj.to_dict()
         return super().default(obj)
 
+_JSON_SPECIAL_FLOATS = {"nan": "NaN", "inf": "Infinity", "-inf": "-Infinity"}
+
+def _encode_float(value: float) -> str:
+    text = float.__repr__(value)
+    return _JSON_SPECIAL_FLOATS.get(text, text)
+
+def _encode_enum(value: Enum) -> str:
+    return _encode_string(value.value)
+
+class RecordJsonEncoder:
+    """Encode packages, records and enums straight to JSON text.
+
+    Produces the same text as ``json.dumps(value, cls=EnumEncoder)`` with
+    the given ``indent`` (compact separators when ``indent`` is None), but
+    records write themselves with ``to_json`` into a per-type, per-depth
+    template, so no intermediate dicts are built and enums never go
+    through ``default``.
+    """
+
+    def __init__(self, indent: Optional[int] = None):
+        self.indent = indent
+        # (record type, depth) -> %-template with one slot per field
+        self._templates = {}
+
+    def _newline(self, depth: int) -> str:
+        return "\n" + " " * (self.indent * depth)
+
+    def encode(self, value, depth: int = 0) -> str:
+        value_type = type(value)
+        if value_type is str:
+            return _encode_string(value)
+        if value_type is float:
+            return _encode_float(value)
+        if value_type in RECORD_TYPES:
+            return self._encode_record(value, depth)
+        if value is None:
+            return "null"
+        if value is True:
+            return "true"
+        if value is False:
+            return "false"
+        if value_type is int:
+            return int.__repr__(value)
+        if value_type is dict:
+            return self._encode_items([f"{_encode_string(key)}{self._key_separator}{self.encode(item, depth + 1)}"
+                                       for key, item in value.items()], "{}", depth)
+        if value_type is list or value_type is tuple:
+            return self._encode_items([self.encode(item, depth + 1) for item in value], "[]", depth)
+        if isinstance(value, Enum):
+            return self.encode(value.value, depth)
+        if isinstance(value, float):
+            return _encode_float(value)
+        if isinstance(value, int):
+            return int.__repr__(value)
+        raise TypeError(f"Object of type {value_type.__name__} is not JSON serializable")
+
+    @property
+    def _key_separator(self) -> str:
+        return ":" if self.indent is None else ": "
+
+    def _encode_items(self, items: List[str], brackets: str, depth: int) -> str:
+        if not items:
+            return brackets
+        if self.indent is None:
+            return brackets[0] + ",".join(items) + brackets[1]
+        inner = self._newline(depth + 1)
+        return brackets[0] + inner + ("," + inner).join(items) + self._newline(depth) + brackets[1]
+
+    def _encode_record(self, record, depth: int) -> str:
+        try:
+            return record.to_json(self, depth)
+        except (TypeError, AttributeError):
+            # A field holds something other than its annotated type
+            values = record.to_dict().values()
+            return self.template(type(record), depth) % tuple([self.encode(value, depth + 1) for value in values])
+
+    def template(self, record_type, depth: int) -> str:
+        """The JSON object text of ``record_type`` at ``depth``, with a ``%s`` slot per field."""
+        template = self._templates.get((record_type, depth))
+        if template is None:
+            template = self._templates[(record_type, depth)] = self._encode_items(
+                [f"{_encode_string(field.name)}{self._key_separator}%s" for field in fields(record_type)],
+                "{}", depth)
+        return template
+
+CSV_FIELDS = [
+    "tracking_number", "package_type", "carrier", "weight_kg", "length_cm",
+    "width_cm", "height_cm", "volume_cm3", "origin_city", "origin_state",
+    "origin_zip", "destination_city", "destination_state", "destination_zip",
+    "current_status", "estimated_delivery", "actual_delivery", "special_handling",
+    "insurance_value", "signature_required", "description",
+    # Appended so the earlier column positions stay stable
+    "origin_latitude", "origin_longitude", "destination_latitude", "destination_longitude"
+]
+
+def flatten_package(package: Dict) -> List:
+    """Flatten a package into a CSV row ordered like CSV_FIELDS."""
+    dimensions = package["dimensions"]
+    origin = package["origin"]
+    destination = package["destination"]
+    return [
+        package["tracking_number"],
+        package["package_type"],
+        package["carrier"],
+        dimensions.weight,
+        dimensions.length,
+        dimensions.width,
+        dimensions.height,
+        dimensions.volume,
+        origin.city,
+        origin.state,
+        origin.zip_code,
+        destination.city,
+        destination.state,
+        destination.zip_code,
+        package["current_status"],
+        package["estimated_delivery"],
+        package["actual_delivery"],
+        package["special_handling"],
+        package["insurance_value"],
+        package["signature_required"],
+        package["description"],
+        origin.latitude,
+        origin.longitude,
+        destination.latitude,
+        destination.longitude
+    ]
+
+class JsonArrayWriter:
+    """Incrementally write packages as a pretty-printed JSON array.
+
+    The output is identical to ``json.dump(packages, f, indent=2, cls=EnumEncoder)``
+    but only one package is encoded at a time.
+    """
+
+    def __init__(self, filepath: str, index: bool = False):
+        self.filepath = filepath
+        self.count = 0
+        self._file = open(filepath, 'w', buffering=WRITE_BUFFER_SIZE, newline='\n')
+        self._encoder = RecordJsonEncoder(indent=2)
+        self._index = OffsetIndexWriter(index_path_for(filepath)) if index else None
+        # The encoder only emits ASCII, so characters written equal bytes written
+        self._offset = 0
+
+    @metrics.timed("serialization")
+    def write(self, package: Dict):
+        self._file.write("[\n  " if self.count == 0 else ",\n  ")
+        # Packages sit one level deep inside the array
+        text = self._encoder.encode(package, depth=1)
+        self._file.write(text)
+        if self._index is not None:
+            self._index.add(package["tracking_number"], self._offset + 4, len(text))
+        self._offset += 4 + len(text)
+        self.count += 1
+
+    def close(self):
+        self._file.write("\n]" if self.count else "[]")
+        self._file.close()
+        if self._index is not None:
+            self._index.close(self._offset + 2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class NdjsonWriter:
+    """Incrementally write packages as newline-delimited JSON, one package per line."""
+
+    def __init__(self, filepath: str, index: bool = False):
+        self.filepath = filepath
+        self.count = 0
+        self._file = open(filepath, 'w', buffering=WRITE_BUFFER_SIZE, newline='\n')
+        self._encoder = RecordJsonEncoder()
+        self._index = OffsetIndexWriter(index_path_for(filepath)) if index else None
+        self._offset = 0
+
+    @metrics.timed("serialization")
+    def write(self, package: Dict):
+        text = self._encoder.encode(package)
+        self._file.write(text)
+        self._file.write("\n")
+        if self._index is not None:
+            self._index.add(package["tracking_number"], self._offset, len(text))
+        self._offset += len(text) + 1
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+        if self._index is not None:
+            self._index.close(self._offset)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class CsvWriter:
+    """Incrementally write packages as flattened CSV rows."""
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.count = 0
+        self._file = open(filepath, 'w', newline='', buffering=WRITE_BUFFER_SIZE)
+        self._writer = csv.writer(self._file, lineterminator="\n")
+        self._writer.writerow(CSV_FIELDS)
+
+    @metrics.timed("csv_flattening")
+    def write(self, package: Dict):
+        self._writer.writerow(flatten_package(package))
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _enum_value(value):
+    return value.value if isinstance(value, Enum) else value
+
+class ParquetDatasetWriter:
+    """Write packages and their tracking events as two partitioned Parquet datasets.
+
+    ``<dirpath>/packages`` holds one row per package and ``<dirpath>/events``
+    one row per tracking event; both are joinable on ``tracking_number`` and
+    hive-partitioned by carrier and date. Low-cardinality string columns are
+    dictionary encoded. Rows are buffered and flushed every ``chunk_size``
+    packages. Requires pyarrow.
+    """
+
+    PACKAGE_DICTIONARY_FIELDS = {
+        "package_type", "current_status", "origin_state", "origin_facility_type",
+        "destination_state", "destination_facility_type",
+    }
+    EVENT_DICTIONARY_FIELDS = {"status", "scan_type", "state", "country", "facility_type"}
+    PARTITION_COLUMNS = ["carrier", "date"]
+
+    def __init__(self, dirpath: str, chunk_size: int = 50000):
+        try:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output requires pyarrow: pip install pyarrow") from e
+        self._pa, self._pc, self._pq = pa, pc, pq
+
+        self.filepath = dirpath
+        self.chunk_size = chunk_size
+        self.count = 0
+        self._chunk_index = 0
+        self.packages_path = os.path.join(dirpath, "packages")
+        self.events_path = os.path.join(dirpath, "events")
+        # Like the file writers, a new run replaces the previous output
+        for path in (self.packages_path, self.events_path):
+            shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path)
+        self._reset_buffers()
+
+    def _reset_buffers(self):
+        self._packages = {name: [] for name in self._package_schema().names}
+        self._events = {name: [] for name in self._event_schema().names}
+
+    def _package_schema(self):
+        pa = self._pa
+        string_fields = [
+            "tracking_number", "package_type", "carrier", "origin_city", "origin_state",
+            "origin_zip", "origin_facility_name", "origin_facility_type",
+            "destination_city", "destination_state", "destination_zip",
+            "destination_facility_name", "destination_facility_type", "current_status",
+            "description", "date",
+        ]
+        fields = []
+        for name in string_fields:
+            dictionary = name in self.PACKAGE_DICTIONARY_FIELDS or name in self.PARTITION_COLUMNS
+            fields.append((name, pa.dictionary(pa.int32(), pa.string()) if dictionary else pa.string()))
+        fields += [(name, pa.float64()) for name in (
+            "weight_kg", "length_cm", "width_cm", "height_cm", "volume_cm3",
+            "origin_latitude", "origin_longitude", "destination_latitude",
+            "destination_longitude", "insurance_value",
+        )]
+        fields += [
+            ("estimated_delivery", pa.timestamp("s")),
+            ("actual_delivery", pa.timestamp("s")),
+            ("special_handling", pa.bool_()),
+            ("signature_required", pa.bool_()),
+            ("num_events", pa.int32()),
+        ]
+        return pa.schema(fields)
+
+    def _event_schema(self):
+        pa = self._pa
+        dictionary = pa.dictionary(pa.int32(), pa.string())
+        return pa.schema([
+            ("tracking_number", pa.string()),
+            ("sequence", pa.int32()),
+            ("event_id", pa.string()),
+            ("timestamp", pa.timestamp("s")),
+            ("status", dictionary),
+            ("carrier", dictionary),
+            ("scan_type", dictionary),
+            ("operator_id", pa.string()),
+            ("description", pa.string()),
+            ("city", pa.string()),
+            ("state", dictionary),
+            ("zip_code", pa.string()),
+            ("country", dictionary),
+            ("latitude", pa.float64()),
+            ("longitude", pa.float64()),
+            ("facility_name", pa.string()),
+            ("facility_type", dictionary),
+            ("date", dictionary),
+        ])
+
+    @metrics.timed("parquet_buffering")
+    def write(self, package: Dict):
+        history = package["tracking_history"]
+        tracking_number = package["tracking_number"]
+        carrier = package["carrier"]
+        columns = self._packages
+        dimensions = package["dimensions"]
+        columns["tracking_number"].append(tracking_number)
+        columns["package_type"].append(package["package_type"])
+        columns["carrier"].append(carrier)
+        columns["weight_kg"].append(dimensions.weight)
+        columns["length_cm"].append(dimensions.length)
+        columns["width_cm"].append(dimensions.width)
+        columns["height_cm"].append(dimensions.height)
+        columns["volume_cm3"].append(dimensions.volume)
+        for prefix in ("origin", "destination"):
+            location = package[prefix]
+            columns[f"{prefix}_city"].append(location.city)
+            columns[f"{prefix}_state"].append(location.state)
+            columns[f"{prefix}_zip"].append(location.zip_code)
+            columns[f"{prefix}_latitude"].append(location.latitude)
+            columns[f"{prefix}_longitude"].append(location.longitude)
+            columns[f"{prefix}_facility_name"].append(location.facility_name)
+            columns[f"{prefix}_facility_type"].append(location.facility_type)
+        columns["current_status"].append(package["current_status"])
+        columns["estimated_delivery"].append(package["estimated_delivery"])
+        columns["actual_delivery"].append(package["actual_delivery"])
+        columns["description"].append(package["description"])
+        columns["special_handling"].append(package["special_handling"])
+        columns["insurance_value"].append(package["insurance_value"])
+        columns["signature_required"].append(package["signature_required"])
+        columns["num_events"].append(len(history))
+        # Packages are partitioned by the day of their first scan
+        columns["date"].append(history[0].timestamp[:10])
+
+        events = self._events
+        for sequence, event in enumerate(history):
+            location = event.location
+            events["tracking_number"].append(tracking_number)
+            events["sequence"].append(sequence)
+            events["event_id"].append(event.event_id)
+            events["timestamp"].append(event.timestamp)
+            events["status"].append(_enum_value(event.status))
+            events["carrier"].append(_enum_value(event.carrier))
+            events["scan_type"].append(event.scan_type)
+            events["operator_id"].append(event.operator_id)
+            events["description"].append(event.description)
+            events["city"].append(location.city)
+            events["state"].append(location.state)
+            events["zip_code"].append(location.zip_code)
+            events["country"].append(location.country)
+            events["latitude"].append(location.latitude)
+            events["longitude"].append(location.longitude)
+            events["facility_name"].append(location.facility_name)
+            events["facility_type"].append(location.facility_type)
+            events["date"].append(event.timestamp[:10])
+
+        self.count += 1
+        if self.count % self.chunk_size == 0:
+            self.flush()
+
+    def _to_table(self, columns: Dict[str, List], schema):
+        pa, pc = self._pa, self._pc
+        arrays = []
+        for field in schema:
+            values = columns[field.name]
+            if pa.types.is_timestamp(field.type):
+                # Timestamps are parsed in bulk rather than per row
+                arrays.append(pc.strptime(pa.array(values, pa.string()),
+                                          format="%Y-%m-%d %H:%M:%S", unit="s"))
+            elif pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, field.type))
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    @metrics.timed("parquet_flush", track_memory=True)
+    def flush(self):
+        """Write the buffered rows as one more file per partition."""
+        if not self._packages["tracking_number"]:
+            return
+        basename = f"part-{self._chunk_index:05d}-{{i}}.parquet"
+        for path, columns, schema in (
+            (self.packages_path, self._packages, self._package_schema()),
+            (self.events_path, self._events, self._event_schema()),
+        ):
+            self._pq.write_to_dataset(
+                self._to_table(columns, schema),
+                root_path=path,
+                partition_cols=self.PARTITION_COLUMNS,
+                basename_template=basename,
+            )
+        self._chunk_index += 1
+        self._reset_buffers()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Output formats understood by SmartLogisticsTrackingModel.save_packages
+OUTPUT_WRITERS = {
+    "json": (JsonArrayWriter, "logistics_data.json"),
+    "ndjson": (NdjsonWriter, "logistics_data.ndjson"),
+    "csv": (CsvWriter, "logistics_data.csv"),
+    "parquet": (ParquetDatasetWriter, "logistics_parquet"),
+}
+# Formats whose writers can emit a tracking-number offset index (<file>.idx)
+INDEXED_FORMATS = {"json", "ndjson"}
+
 class SmartLogisticsTrackingModel:
-    def __init__(self):
-        self.data_dir = "data"
+    def __init__(self, seed: Optional[int] = None, reference_time: Optional[datetime] = None,
+                 pools: Optional[ValuePools] = None, pool_size: int = DEFAULT_POOL_SIZE,
+                 pool_cache_dir: Optional[str] = None, network: Optional[FacilityNetwork] = None,
+                 transition_probabilities: Optional[Dict[PackageStatus, Dict[PackageStatus, float]]] = None,
+                 event_count_ranges: Optional[Dict[PackageType, Tuple[int, int]]] = None,
+                 dwell_hours: Optional[Dict[PackageStatus, float]] = None,
+                 data_dir: str = "data", first_sequence: int = 0):
+        self.data_dir = data_dir
         os.makedirs(self.data_dir, exist_ok=True)
+
+        # Per-instance random sources so each worker can be seeded independently
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
+        # Faker is created on first use; shards that receive pools never need it
+        self._fake = None
+
+        # Timestamps are drawn from the month containing reference_time
+        self.reference_time = reference_time or datetime.now()
+        # Sequence number of the next package; its tracking serial derives from it
+        self.next_sequence = first_sequence
+
+        # Faker is only used to fill the value pools; events draw from them.
+        # Pools are built on first use unless passed in.
+        self._pools = pools
+        self.pool_size = pool_size
+        self.pool_cache_dir = pool_cache_dir
+
+        # Events happen at the facilities of a fixed network, along routes
+        # between each package's origin and destination. Built from the
+        # pools on first use unless passed in.
+        self._network = network
+        self._facility_locations: Optional[List[Location]] = None
+
+        # Status histories come from a vectorized Markov chain over all packages
+        self.transitions = StatusTransitionEngine(
+            PACKAGE_STATUSES,
+            PACKAGE_TYPES,
+            transition_probabilities or DEFAULT_STATUS_TRANSITIONS,
+            {**DEFAULT_EVENT_COUNT_RANGES, **(event_count_ranges or {})},
+            {**DEFAULT_DWELL_HOURS, **(dwell_hours or {})},
+            initial_state=PackageStatus.PENDING,
+        )
+        self._sla_seconds = np.array([DELIVERY_SLA_HOURS[t] * 3600 for t in PACKAGE_TYPES])
         
         # Initialize data structures
         self.facility_types = [
@@ -172,66 +823,65 @@ class SmartLogisticsTrackingModel:
             "delivery area restricted"
         ]
 
-    def generate_location(self) -> Location:
-        """Generate a realistic location with coordinates and facility information."""
-        city = fake.city()
-        state = fake.state()
-        zip_code = fake.zipcode()
-        facility_name = f"{fake.company()} {random.choice(self.facility_types)}"
-        facility_type = random.choice(self.facility_types)
-        
-        # Generate realistic coordinates within the US
-        latitude = random.uniform(24.396308, 49.384358)  # US latitude range
-        longitude = random.uniform(-125.000000, -66.934570)  # US longitude range
-        
-        return Location(
-            city=city,
-            state=state,
-            zip_code=zip_code,
-            country="USA",
-            latitude=latitude,
-            longitude=longitude,
-            facility_name=facility_name,
-            facility_type=facility_type
-        )
+    @property
+    def fake(self) -> "Faker":
+        if self._fake is None:
+            self._fake = make_faker(self.seed)
+        return self._fake
 
-    def generate_dimensions(self) -> PackageDimensions:
-        """Generate realistic package dimensions and calculate volume."""
-        length = round(random.uniform(5, 100), 2)
-        width = round(random.uniform(5, 100), 2)
-        height = round(random.uniform(5, 100), 2)
-        weight = round(random.uniform(0.5, 50.0), 2)
-        volume = round(length * width * height, 2)
-        
-        return PackageDimensions(
-            length=length,
-            width=width,
-            height=height,
-            weight=weight,
-            volume=volume
-        )
+    @property
+    def pools(self) -> ValuePools:
+        if self._pools is None:
+            with metrics.stage("pool_build", track_memory=True):
+                self._pools = (
+                    ValuePools.cached(self.pool_cache_dir, self.fake, self.pool_size, self.seed)
+                    if self.pool_cache_dir else ValuePools.build(self.fake, self.pool_size)
+                )
+        return self._pools
 
+    @property
+    def network(self) -> FacilityNetwork:
+        if self._network is None:
+            with metrics.stage("network_build", track_memory=True):
+                self._network = (
+                    FacilityNetwork.cached(self.pool_cache_dir, self.pools, self.seed)
+                    if self.pool_cache_dir else FacilityNetwork.build(self.pools, self.seed)
+                )
+        return self._network
+
+    @property
+    def facility_locations(self) -> List[Location]:
+        """One shared Location record per network facility, by facility index."""
+        if self._facility_locations is None:
+            self._facility_locations = [
+                Location(city=city, state=state, zip_code=zip_code, country="USA", latitude=latitude,
+                         longitude=longitude, facility_name=name, facility_type=facility_type)
+                for name, facility_type, city, state, zip_code, latitude, longitude in self.network.facilities
+            ]
+        return self._facility_locations
+
+    @metrics.timed("event_generation")
     def generate_tracking_event(self, 
                               status: PackageStatus,
                               carrier: ShippingCarrier,
-                              location: Location) -> TrackingEvent:
+                              location: Location,
+                              timestamp: str) -> TrackingEvent:
         """Generate a detailed tracking event."""
-        event_id = str(uuid.uuid4())
-        timestamp = fake.date_time_this_month()
-        scan_type = random.choice(self.scan_types)
-        operator_id = f"OP{fake.random_number(digits=6)}"
+        event_id = str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+        scan_type = self.rng.choice(self.scan_types)
+        operator_id = self.pools.draw_operator_id(self.rng)
         
         # Generate description based on status
-        template = random.choice(self.status_templates[status])
+        template = self.rng.choice(self.status_templates[status])
         description = template.format(
             facility=location.facility_name,
             carrier=carrier.value,
-            reason=random.choice(self.exception_reasons) if status == PackageStatus.EXCEPTION else ""
+            reason=self.rng.choice(self.exception_reasons) if status == PackageStatus.EXCEPTION else ""
         )
         
         return TrackingEvent(
             event_id=event_id,
-            timestamp=timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+            timestamp=timestamp,
             status=status,
             location=location,
             description=description,
@@ -240,73 +890,125 @@ class SmartLogisticsTrackingModel:
             operator_id=operator_id
         )
 
+    @metrics.timed("history_simulation")
+    def simulate_histories(self, type_codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Simulate status histories for a batch of packages.
+
+        Returns ``(offsets, status_codes, timestamps)`` as produced by
+        ``StatusTransitionEngine.simulate``, with elapsed seconds turned into
+        absolute ``datetime64[s]`` values. Each history ends at a uniformly
+        drawn time between the start of the reference month and the
+        reference time.
+        """
+        offsets, status_codes, elapsed = self.transitions.simulate(type_codes, self.np_rng)
+        return offsets, status_codes, self._anchor_histories(offsets, elapsed)
+
+    @metrics.timed("history_simulation")
+    def simulate_routed_histories(self, type_codes: np.ndarray, origins: np.ndarray, destinations: np.ndarray
+                                  ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Simulate status histories along network routes.
+
+        Like ``simulate_histories``, but every event is placed at a facility
+        on the route from its package's origin to its destination, and the
+        transit time of the legs covered between two scans is added to the
+        simulated dwell time. Returns the facility index of every event as a
+        fourth array.
+        """
+        offsets, status_codes, elapsed = self.transitions.simulate(type_codes, self.np_rng)
+        stops, travel_seconds = self.network.place_events(
+            origins, destinations, type_codes == INTERNATIONAL_TYPE_CODE, offsets,
+            np.isin(status_codes, ROUTE_ADVANCE_CODES), np.isin(status_codes, ROUTE_ARRIVAL_CODES),
+        )
+        return offsets, status_codes, self._anchor_histories(offsets, elapsed + travel_seconds), stops
+
+    def _anchor_histories(self, offsets: np.ndarray, elapsed: np.ndarray) -> np.ndarray:
+        """Absolute timestamps for elapsed seconds, ending each history at a random time this month."""
+        reference = np.datetime64(self.reference_time, "s")
+        month_start = np.datetime64(self.reference_time.replace(day=1, hour=0, minute=0, second=0,
+                                                                microsecond=0), "s")
+        span = (reference - month_start).astype(np.int64)
+        ends = self.np_rng.uniform(0, span, size=len(offsets) - 1)
+        durations = elapsed[offsets[1:] - 1]
+        starts = month_start + (ends - durations).astype(np.int64).astype("timedelta64[s]")
+        counts = np.diff(offsets)
+        return np.repeat(starts, counts) + elapsed.astype(np.int64).astype("timedelta64[s]")
+
+    @metrics.timed("history_assembly")
+    def _build_history(self, carrier: ShippingCarrier, status_codes: List[int],
+                       timestamps: List[str], stops: List[int]) -> List[TrackingEvent]:
+        """Turn simulated statuses, timestamps and facilities into tracking events."""
+        locations = self.facility_locations
+        return [
+            self.generate_tracking_event(PACKAGE_STATUSES[code], carrier, locations[stop], timestamp)
+            for code, timestamp, stop in zip(status_codes, timestamps, stops)
+        ]
+
     def generate_tracking_history(self, 
                                 package_type: PackageType,
-                                carrier: ShippingCarrier) -> List[Dict]:
+                                carrier: ShippingCarrier) -> List[TrackingEvent]:
         """Generate a realistic tracking history based on package type."""
-        history = []
-        current_status = PackageStatus.PENDING
-        current_location = self.generate_location()
-        
-        # Generate appropriate number of events based on package type
-        num_events = {
-            PackageType.STANDARD: random.randint(4, 6),
-            PackageType.EXPRESS: random.randint(3, 5),
-            PackageType.PRIORITY: random.randint(3, 4),
-            PackageType.OVERNIGHT: random.randint(2, 3),
-            PackageType.INTERNATIONAL: random.randint(6, 8),
-            PackageType.FRAGILE: random.randint(4, 6),
-            PackageType.REFRIGERATED: random.randint(3, 5),
-            PackageType.HAZMAT: random.randint(5, 7)
-        }[package_type]
-        
-        for _ in range(num_events):
-            event = self.generate_tracking_event(current_status, carrier, current_location)
-            history.append(asdict(event))
-            
-            # Update status and location for next event
-            if current_status == PackageStatus.PENDING:
-                current_status = PackageStatus.PROCESSING
-            elif current_status == PackageStatus.PROCESSING:
-                current_status = PackageStatus.IN_TRANSIT
-            elif current_status == PackageStatus.IN_TRANSIT:
-                if random.random() < 0.1:  # 10% chance of exception
-                    current_status = PackageStatus.EXCEPTION
-                else:
-                    current_status = PackageStatus.OUT_FOR_DELIVERY
-            elif current_status == PackageStatus.OUT_FOR_DELIVERY:
-                if random.random() < 0.95:  # 95% chance of successful delivery
-                    current_status = PackageStatus.DELIVERED
-                else:
-                    current_status = PackageStatus.EXCEPTION
-            elif current_status == PackageStatus.EXCEPTION:
-                if random.random() < 0.7:  # 70% chance of recovery
-                    current_status = PackageStatus.IN_TRANSIT
-                else:
-                    current_status = PackageStatus.RETURNED
-            
-            current_location = self.generate_location()
-        
-        return history
+        type_codes = np.array([PACKAGE_TYPES.index(package_type)])
+        origins, destinations = self.network.draw_endpoints(self.np_rng, 1)
+        _, status_codes, timestamps, stops = self.simulate_routed_histories(type_codes, origins, destinations)
+        return self._build_history(carrier, status_codes.tolist(), _format_timestamps(timestamps), stops.tolist())
 
-    def generate_package_data(self, num_packages: int = 20000) -> List[Dict]:
+    def generate_package_data(self, num_packages: int = 20000, show_progress: bool = True) -> List[Dict]:
         """Generate comprehensive package tracking data."""
+        return list(self.iter_package_data(num_packages, show_progress=show_progress))
+
+    def iter_package_data(self, num_packages: int = 20000, show_progress: bool = True,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict]:
+        """Yield package tracking records one at a time.
+
+        Scalar attributes, routes and status histories are drawn for
+        ``chunk_size`` packages at once; only event details are per event.
+        """
+        from tqdm import tqdm
+
+        progress = tqdm(total=num_packages, desc="Generating package data", disable=not show_progress)
+        for start in range(0, num_packages, chunk_size):
+            count = min(chunk_size, num_packages - start)
+            yield from self._generate_package_chunk(count)
+            progress.update(count)
+        progress.close()
+
+    @metrics.timed("package_generation", track_memory=True)
+    def _generate_package_chunk(self, num_packages: int) -> List[Dict]:
+        batch = self.generate_package_batch(num_packages)
+        type_codes = batch["package_type_code"]
+        origins, destinations = self.network.draw_endpoints(self.np_rng, num_packages)
+        offsets, status_codes, timestamps, stops = self.simulate_routed_histories(type_codes, origins, destinations)
+        event_times = _format_timestamps(timestamps)
+        status_codes = status_codes.tolist()
+        stops = stops.tolist()
+        offsets = offsets.tolist()
+        locations = self.facility_locations
+
+        first_scans = timestamps[offsets[:-1]]
+        estimated = _format_timestamps(
+            first_scans + self._sla_seconds[type_codes].astype("timedelta64[s]")
+        )
+
         packages = []
-        
-        for _ in tqdm(range(num_packages), desc="Generating package data"):
-            # Generate basic package information
-            package_type = random.choice(list(PackageType))
-            carrier = random.choice(list(ShippingCarrier))
-            dimensions = self.generate_dimensions()
+        for i, (type_code, carrier_code, tracking_number, length, width, height, weight, volume,
+                insurance_value, signature_required, origin, destination) in enumerate(zip(
+                    type_codes.tolist(), batch["carrier_code"].tolist(),
+                    batch["tracking_number"].tolist(), batch["length"].tolist(),
+                    batch["width"].tolist(), batch["height"].tolist(), batch["weight"].tolist(),
+                    batch["volume"].tolist(), batch["insurance_value"].tolist(),
+                    batch["signature_required"].tolist(), origins.tolist(), destinations.tolist())):
+            package_type = PACKAGE_TYPES[type_code]
+            carrier = SHIPPING_CARRIERS[carrier_code]
+            dimensions = PackageDimensions(length=length, width=width, height=height,
+                                           weight=weight, volume=volume)
             
-            # Generate tracking number based on carrier
-            tracking_number = f"{carrier.value[:3]}{fake.random_number(digits=9)}"
-            
-            # Generate tracking history
-            tracking_history = self.generate_tracking_history(package_type, carrier)
+            # Generate tracking history from the simulated statuses
+            start, end = offsets[i], offsets[i + 1]
+            tracking_history = self._build_history(carrier, status_codes[start:end], event_times[start:end],
+                                                   stops[start:end])
             
             # Get final status from tracking history
-            final_status = tracking_history[-1]["status"]
+            final_status = tracking_history[-1].status.value
             
             # Generate package description
             package_description = (
@@ -319,89 +1021,345 @@ class SmartLogisticsTrackingModel:
                 "tracking_number": tracking_number,
                 "package_type": package_type.value,
                 "carrier": carrier.value,
-                "dimensions": asdict(dimensions),
-                "origin": asdict(self.generate_location()),
-                "destination": asdict(self.generate_location()),
+                "dimensions": dimensions,
+                "origin": locations[origin],
+                "destination": locations[destination],
                 "tracking_history": tracking_history,
                 "current_status": final_status,
-                "estimated_delivery": fake.date_time_this_month().strftime("%Y-%m-%d %H:%M:%S"),
+                "estimated_delivery": estimated[i],
                 "actual_delivery": (
-                    tracking_history[-1]["timestamp"] 
+                    tracking_history[-1].timestamp 
                     if final_status == PackageStatus.DELIVERED.value 
                     else None
                 ),
                 "description": package_description,
-                "special_handling": package_type in [PackageType.FRAGILE, PackageType.REFRIGERATED, PackageType.HAZMAT],
-                "insurance_value": round(random.uniform(100, 5000), 2) if random.random() < 0.3 else None,
-                "signature_required": random.random() < 0.4
+                "special_handling": package_type in SPECIAL_HANDLING_TYPES,
+                "insurance_value": None if insurance_value != insurance_value else insurance_value,
+                "signature_required": signature_required
             }
             
             packages.append(package)
         
+        metrics.incr("packages_generated", num_packages)
+        metrics.incr("events_generated", offsets[-1])
         return packages
 
-    def save_to_json(self, data: List[Dict], filename: str = "logistics_data.json"):
-        """Save generated data to a JSON file."""
-        filepath = os.path.join(self.data_dir, filename)
-        print(f"\nSaving data to {filepath}...")
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2, cls=EnumEncoder)
-        print(f"Data saved successfully!")
+    def generate_package_batch(self, num_packages: int,
+                               rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+        """Draw the scalar attributes of many packages at once as NumPy columns.
+
+        Uses the same distributions as ``generate_package_data`` but returns a
+        dict of equally sized arrays instead of a list of dicts. Missing
+        insurance values are NaN. Tracking numbers continue the model's
+        package sequence, so they are unique across calls.
+        """
+        rng = rng if rng is not None else self.np_rng
 
-    def save_to_csv(self, data: List[Dict], filename: str = "logistics_data.csv"):
+        type_codes = rng.integers(0, len(PACKAGE_TYPES), size=num_packages)
+        carrier_codes = rng.integers(0, len(SHIPPING_CARRIERS), size=num_packages)
+
+        # Dimensions in cm and weight in kg, rounded to 2 decimals
+        length = _round_cents(rng.uniform(5, 100, size=num_packages))
+        width = _round_cents(rng.uniform(5, 100, size=num_packages))
+        height = _round_cents(rng.uniform(5, 100, size=num_packages))
+        weight = _round_cents(rng.uniform(0.5, 50.0, size=num_packages))
+        volume = _round_cents(length * width * height)
+
+        insured = rng.random(num_packages) < 0.3
+        insurance_value = _round_cents(rng.uniform(100, 5000, size=num_packages))
+        insurance_value[~insured] = np.nan
+        signature_required = rng.random(num_packages) < 0.4
+
+        serials = sequence_serials(self.next_sequence, num_packages)
+        self.next_sequence += num_packages
+        tracking_number = format_tracking_numbers(carrier_codes, serials)
+
+        return {
+            "tracking_number": tracking_number,
+            "package_type_code": type_codes,
+            "carrier_code": carrier_codes,
+            "package_type": PACKAGE_TYPE_VALUES[type_codes],
+            "carrier": SHIPPING_CARRIER_VALUES[carrier_codes],
+            "length": length,
+            "width": width,
+            "height": height,
+            "weight": weight,
+            "volume": volume,
+            "special_handling": SPECIAL_HANDLING_MASK[type_codes],
+            "insurance_value": insurance_value,
+            "signature_required": signature_required,
+        }
+
+    def save_to_json(self, data: Iterable[Dict], filename: str = "logistics_data.json"):
+        """Save generated data to a pretty-printed JSON file."""
+        self.save_packages(data, {"json": filename})
+
+    def save_to_ndjson(self, data: Iterable[Dict], filename: str = "logistics_data.ndjson"):
+        """Save generated data as newline-delimited JSON."""
+        self.save_packages(data, {"ndjson": filename})
+
+    def save_to_csv(self, data: Iterable[Dict], filename: str = "logistics_data.csv"):
         """Save generated data to a CSV file with flattened structure."""
-        print(f"\nConverting data to CSV format...")
-        flattened_data = []
-        
-        for package in tqdm(data, desc="Converting to CSV format"):
-            flat_package = {
-                "tracking_number": package["tracking_number"],
-                "package_type": package["package_type"],
-                "carrier": package["carrier"],
-                "weight_kg": package["dimensions"]["weight"],
-                "length_cm": package["dimensions"]["length"],
-                "width_cm": package["dimensions"]["width"],
-                "height_cm": package["dimensions"]["height"],
-                "volume_cm3": package["dimensions"]["volume"],
-                "origin_city": package["origin"]["city"],
-                "origin_state": package["origin"]["state"],
-                "origin_zip": package["origin"]["zip_code"],
-                "destination_city": package["destination"]["city"],
-                "destination_state": package["destination"]["state"],
-                "destination_zip": package["destination"]["zip_code"],
-                "current_status": package["current_status"],
-                "estimated_delivery": package["estimated_delivery"],
-                "actual_delivery": package["actual_delivery"],
-                "special_handling": package["special_handling"],
-                "insurance_value": package["insurance_value"],
-                "signature_required": package["signature_required"],
-                "description": package["description"]
-            }
-            flattened_data.append(flat_package)
-        
-        df = pd.DataFrame(flattened_data)
-        filepath = os.path.join(self.data_dir, filename)
-        print(f"Saving CSV data to {filepath}...")
-        df.to_csv(filepath, index=False)
-        print(f"CSV data saved successfully!")
+        self.save_packages(data, {"csv": filename})
+
+    def save_packages(self, data: Iterable[Dict], outputs: Dict[str, str], index: bool = False) -> int:
+        """Stream packages into one or more output files in a single pass.
+
+        ``outputs`` maps a format from OUTPUT_WRITERS to a filename inside the
+        data directory. Packages are consumed lazily, so a generator keeps
+        memory flat regardless of dataset size. With ``index``, JSON and
+        NDJSON outputs also get a ``<file>.idx`` offset index for
+        ``logistics_index.PackageIndex``.
+        """
+        writers = []
+        try:
+            for fmt, filename in outputs.items():
+                writer_cls, _ = OUTPUT_WRITERS[fmt]
+                filepath = os.path.join(self.data_dir, filename)
+                print(f"\nStreaming {fmt} data to {filepath}...")
+                if index and fmt in INDEXED_FORMATS:
+                    writers.append(writer_cls(filepath, index=True))
+                else:
+                    writers.append(writer_cls(filepath))
+            count = 0
+            for package in data:
+                for writer in writers:
+                    writer.write(package)
+                count += 1
+        finally:
+            with metrics.stage("writer_close", track_memory=True):
+                for writer in writers:
+                    writer.close()
+        metrics.incr("packages_written", count)
+        print(f"Saved {count} packages successfully!")
+        return count
 
-def main():
+def shard_seeds(seed: Optional[int], num_shards: int, first_shard: int = 0) -> List[int]:
+    """Derive one independent integer seed per shard from a master seed.
+
+    Shard ``i`` gets the ``i``-th spawned child of ``SeedSequence(seed)``,
+    so its seed never depends on how many shards are generated or where
+    a run starts.
+    """
+    entropy = np.random.SeedSequence(seed).entropy
+    children = (np.random.SeedSequence(entropy, spawn_key=(i,))
+                for i in range(first_shard, first_shard + num_shards))
+    return [int(child.generate_state(1, dtype=np.uint64)[0]) for child in children]
+
+# Value pools and facility network shared by every shard in a worker
+# process, set by _init_shard_worker
+_worker_pools: Optional[ValuePools] = None
+_worker_network: Optional[FacilityNetwork] = None
+
+def _init_shard_worker(pools: ValuePools, network: FacilityNetwork, metrics_enabled: bool = False):
+    global _worker_pools, _worker_network
+    _worker_pools = pools
+    _worker_network = network
+    metrics.enabled = metrics_enabled
+
+def _generate_shard(task: Tuple[int, int, datetime, int], pools: Optional[ValuePools] = None,
+                    network: Optional[FacilityNetwork] = None) -> List[Dict]:
+    """Generate one shard of packages, in-process or in a worker process."""
+    seed, num_packages, reference_time, first_sequence = task
+    model = SmartLogisticsTrackingModel(seed=seed, reference_time=reference_time,
+                                        pools=pools or _worker_pools, network=network or _worker_network,
+                                        first_sequence=first_sequence)
+    return model.generate_package_data(num_packages, show_progress=False)
+
+def _generate_shard_in_worker(task: Tuple[int, int, datetime, int]) -> Tuple[List[Dict], Optional[Dict]]:
+    """Pool entry point returning the shard and, if enabled, the worker's metrics for it."""
+    metrics.reset()
+    packages = _generate_shard(task)
+    return packages, metrics.snapshot() if metrics.enabled else None
+
+def iter_package_data_sharded(num_packages: int,
+                              seed: Optional[int] = None,
+                              workers: int = 1,
+                              shard_size: int = DEFAULT_SHARD_SIZE,
+                              reference_time: Optional[datetime] = None,
+                              pool_size: int = DEFAULT_POOL_SIZE,
+                              pool_cache_dir: Optional[str] = None,
+                              show_progress: bool = True,
+                              first_shard: int = 0) -> Iterator[Dict]:
+    """Yield packages generated in fixed-size shards, optionally across a process pool.
+
+    Every shard gets its own RNG and Faker seed derived from ``seed``, and
+    shards are yielded in order, so a given seed produces the same packages
+    regardless of ``workers``. At most ``2 * workers`` shards are in flight,
+    which keeps memory bounded by the shard size rather than the dataset.
+    Value pools and the facility network are built once from ``seed`` and
+    shared by all shards. ``first_shard`` starts at a later shard index,
+    which continues a sequence of runs without repeating its packages.
+    Package ``j`` of shard ``i`` is number ``i * shard_size + j`` of the
+    run, and its tracking number derives from that, so tracking numbers are
+    unique across shards and continued runs.
+    """
+    reference_time = reference_time or datetime.now()
+    with metrics.stage("pool_build", track_memory=True):
+        fake = make_faker(seed)
+        pools = (
+            ValuePools.cached(pool_cache_dir, fake, pool_size, seed)
+            if pool_cache_dir else ValuePools.build(fake, pool_size)
+        )
+    with metrics.stage("network_build", track_memory=True):
+        network = (
+            FacilityNetwork.cached(pool_cache_dir, pools, seed)
+            if pool_cache_dir else FacilityNetwork.build(pools, seed)
+        )
+    shard_counts = [min(shard_size, num_packages - start) for start in range(0, num_packages, shard_size)]
+    tasks = [
+        (shard_seed, count, reference_time, (first_shard + i) * shard_size)
+        for i, (shard_seed, count) in enumerate(zip(shard_seeds(seed, len(shard_counts), first_shard),
+                                                     shard_counts))
+    ]
+
+    from tqdm import tqdm
+
+    progress = tqdm(total=num_packages, desc="Generating package data", disable=not show_progress)
+    executor = (
+        ProcessPoolExecutor(max_workers=workers, initializer=_init_shard_worker,
+                            initargs=(pools, network, metrics.enabled))
+        if workers > 1 else None
+    )
+    try:
+        if executor is None:
+            for task in tasks:
+                shard = _generate_shard(task, pools, network)
+                progress.update(len(shard))
+                yield from shard
+            return
+
+        pending = deque()
+        task_iter = iter(tasks)
+        for task in task_iter:
+            pending.append(executor.submit(_generate_shard_in_worker, task))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            shard, shard_metrics = pending.popleft().result()
+            if shard_metrics:
+                metrics.merge(shard_metrics)
+            next_task = next(task_iter, None)
+            if next_task is not None:
+                pending.append(executor.submit(_generate_shard_in_worker, next_task))
+            progress.update(len(shard))
+            yield from shard
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+        progress.close()
+
+def generate_package_data_sharded(num_packages: int,
+                                  seed: Optional[int] = None,
+                                  workers: int = 1,
+                                  shard_size: int = DEFAULT_SHARD_SIZE,
+                                  reference_time: Optional[datetime] = None,
+                                  pool_size: int = DEFAULT_POOL_SIZE,
+                                  pool_cache_dir: Optional[str] = None) -> List[Dict]:
+    """Generate all packages of a sharded run into a list."""
+    return list(iter_package_data_sharded(num_packages, seed, workers, shard_size, reference_time,
+                                          pool_size, pool_cache_dir))
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate synthetic logistics tracking data.")
+    parser.add_argument("--num-packages", type=int, default=2000,
+                        help="number of packages to generate (default: 2000)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes used for sharded generation (default: 1)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="master seed; the same seed gives identical output for any --workers")
+    parser.add_argument("--shard-size", type=int, default=None,
+                        help=f"packages per shard (default: {DEFAULT_SHARD_SIZE})")
+    parser.add_argument("--reference-time", type=datetime.fromisoformat, default=None,
+                        help="ISO timestamp that anchors generated dates (default: now)")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                        help=f"distinct places in the value pools (default: {DEFAULT_POOL_SIZE})")
+    parser.add_argument("--pool-cache-dir", default=None,
+                        help="directory to cache value pools in between runs")
+    parser.add_argument("--format", dest="formats", nargs="+", choices=sorted(OUTPUT_WRITERS),
+                        default=None,
+                        help="output formats written in a single streaming pass (default: json csv)")
+    parser.add_argument("--index", action="store_true", default=None,
+                        help="also write a tracking-number offset index (<file>.idx) for json and ndjson outputs")
+    segments = parser.add_argument_group(
+        "segmented output", "write checkpointed segments under --dataset-dir instead of single files")
+    segments.add_argument("--segment-size", type=int, default=None,
+                          help="packages per checkpointed segment; a multiple of --shard-size")
+    segments.add_argument("--dataset-dir", default=None,
+                          help="directory of the segmented dataset (default: data/logistics_dataset)")
+    mode = segments.add_mutually_exclusive_group()
+    mode.add_argument("--resume", action="store_true",
+                      help="finish an interrupted segmented run from its last checkpoint")
+    mode.add_argument("--append", action="store_true",
+                      help="add --num-packages packages to an existing segmented dataset")
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+    # Remember the layout options actually given, so --append and --resume
+    # can reject ones that differ from the dataset, then apply the defaults
+    args.given_layout = {"formats": args.formats, "shard_size": args.shard_size,
+                         "segment_size": args.segment_size, "index": args.index}
+    args.formats = args.formats or ["json", "csv"]
+    args.shard_size = args.shard_size or DEFAULT_SHARD_SIZE
+    args.index = bool(args.index)
+    return args
+
+def run_segmented(args: argparse.Namespace):
+    """Create, resume or extend a checkpointed segmented dataset."""
+    from logistics_segments import DEFAULT_DATASET_DIR, DEFAULT_SEGMENT_SIZE, SegmentedGenerator
+
+    generator = SegmentedGenerator(args.dataset_dir or DEFAULT_DATASET_DIR)
+    if (args.append or args.resume) and generator.manifest is not None:
+        try:
+            generator.check_layout(**args.given_layout)
+        except ValueError as e:
+            sys.exit(f"error: {e}")
+    if args.append:
+        generator.append(args.num_packages, args.reference_time)
+    elif not args.resume:
+        generator.start(args.num_packages, args.formats, seed=args.seed, shard_size=args.shard_size,
+                        segment_size=args.segment_size or DEFAULT_SEGMENT_SIZE,
+                        reference_time=args.reference_time, pool_size=args.pool_size, index=args.index)
+    with profile(args.profile):
+        manifest = generator.run(workers=args.workers, pool_cache_dir=args.pool_cache_dir)
+    metrics.write(args.metrics_json, args.metrics_prometheus)
+    print(f"\nDataset in '{generator.dataset_dir}': {manifest['packages']} packages, "
+          f"{manifest['events']} events in {len(manifest['segments'])} segments")
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    metrics.enabled = bool(args.metrics_json or args.metrics_prometheus)
+    if args.segment_size or args.dataset_dir or args.resume or args.append:
+        try:
+            run_segmented(args)
+        except Exception as e:
+            print(f"An error occurred: {str(e)}")
+        return
     try:
         model = SmartLogisticsTrackingModel()
-        num_packages = 2000
+        num_packages = args.num_packages
         
         print(f"Generating {num_packages} package records...")
-        logistics_data = model.generate_package_data(num_packages)
+        logistics_data = iter_package_data_sharded(
+            num_packages,
+            seed=args.seed,
+            workers=args.workers,
+            shard_size=args.shard_size,
+            reference_time=args.reference_time,
+            pool_size=args.pool_size,
+            pool_cache_dir=args.pool_cache_dir,
+        )
         
-        # Save data in both JSON and CSV formats
-        model.save_to_json(logistics_data)
-        model.save_to_csv(logistics_data)
+        # Stream packages into every requested format in one pass
+        outputs = {fmt: OUTPUT_WRITERS[fmt][1] for fmt in args.formats}
+        with profile(args.profile):
+            model.save_packages(logistics_data, outputs, index=args.index)
+        metrics.write(args.metrics_json, args.metrics_prometheus)
         
         print("\nData generation completed successfully!")
         print(f"Generated {num_packages} package records")
         print("Files saved in the 'data' directory:")
-        print("- logistics_data.json")
-        print("- logistics_data.csv")
+        for filename in outputs.values():
+            print(f"- {filename}")
         
     except Exception as e:
         print(f"An error occurred: {str(e)}")
@@ -0,0 +1,362 @@
+import json
+import math
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Dimension columns tracked with running moments, as named in the CSV
+MOMENT_COLUMNS = ["weight_kg", "length_cm", "width_cm", "height_cm", "volume_cm3"]
+DIMENSION_KEYS = ("weight", "length", "width", "height", "volume")
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class QuantileSketch:
+    """Mergeable log-bucketed quantile sketch with relative error guarantees.
+
+    Values are counted in buckets whose bounds grow geometrically by
+    ``gamma = (1 + a) / (1 - a)``, so any quantile is returned within
+    relative error ``a`` of a true value (the DDSketch construction).
+    Negative values use a mirrored set of buckets and values within
+    ``min_value`` of zero are counted as zero, so memory depends only on
+    the dynamic range of the data, never on the number of values.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-6):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _add_to(self, store: Dict[int, int], magnitudes: np.ndarray):
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64),
+                                 return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+
+    def add(self, values):
+        """Add a scalar or an array of values; NaNs are ignored."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        positive = values[values > self.min_value]
+        negative = -values[values < -self.min_value]
+        self.zero_count += len(values) - len(positive) - len(negative)
+        if len(positive):
+            self._add_to(self.positive, positive)
+        if len(negative):
+            self._add_to(self.negative, negative)
+
+    def merge(self, other: "QuantileSketch"):
+        """Fold another sketch with the same accuracy into this one."""
+        if not math.isclose(other.gamma, self.gamma):
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        """Approximate ``q``-quantile (0 <= q <= 1); NaN for an empty sketch."""
+        if not self.count:
+            return math.nan
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        rank = q * (self.count - 1)
+        seen = 0
+        # Most negative values first: large negative keys come first
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return max(-self._value(key), self.min)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return min(self._value(key), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "min_value": self.min_value,
+            "positive": self.positive,
+            "negative": self.negative,
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"], data["min_value"])
+        # JSON turns integer keys into strings
+        sketch.positive = {int(key): count for key, count in data["positive"].items()}
+        sketch.negative = {int(key): count for key, count in data["negative"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        return sketch
+
+
+class RunningMoments:
+    """Count, mean, variance, min and max, updated a batch at a time and mergeable."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _combine(self, count: int, mean: float, m2: float):
+        # Chan et al. parallel update of the sum of squared deviations
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        mean = float(values.mean())
+        self._combine(len(values), mean, float(((values - mean) ** 2).sum()))
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other: "RunningMoments"):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    def to_dict(self) -> Dict:
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "RunningMoments":
+        moments = cls()
+        moments.count, moments.mean, moments.m2 = data["count"], data["mean"], data["m2"]
+        moments.min, moments.max = data["min"], data["max"]
+        return moments
+
+
+class StreamingAggregator:
+    """Constant-memory package statistics built one batch at a time.
+
+    Keeps counts per status, package type and carrier, running moments of
+    weight and dimensions, and a quantile sketch of delivery delay in
+    hours. Batches can be CSV chunks (``update_frame``) or package dicts,
+    e.g. parsed NDJSON lines (``update_packages``). Aggregators built by
+    separate workers combine with ``merge``; ``to_dict``/``from_dict`` make
+    them cheap to send between processes.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.total_packages = 0
+        self.status_counts = Counter()
+        self.type_counts = Counter()
+        self.carrier_counts = Counter()
+        self.moments = {column: RunningMoments() for column in MOMENT_COLUMNS}
+        self.delay_hours = QuantileSketch(relative_accuracy)
+        # Exact mean and extremes of the delays; the sketch only answers quantiles
+        self.delay_moments = RunningMoments()
+        self.on_time = 0
+
+    def update_frame(self, frame: pd.DataFrame):
+        """Add a chunk shaped like the generated CSV."""
+        self.total_packages += len(frame)
+        for counter, column in ((self.status_counts, "current_status"),
+                                (self.type_counts, "package_type"),
+                                (self.carrier_counts, "carrier")):
+            if column in frame:
+                counts = frame[column].value_counts()
+                counter.update({str(key): int(value) for key, value in counts.items() if value})
+        for column, moments in self.moments.items():
+            if column in frame:
+                moments.add(frame[column].to_numpy(dtype=np.float64))
+        if {"current_status", "estimated_delivery", "actual_delivery"} <= set(frame.columns):
+            delivered = frame[frame["current_status"] == "Delivered"]
+            estimated = pd.to_datetime(delivered["estimated_delivery"]).to_numpy("datetime64[s]")
+            actual = pd.to_datetime(delivered["actual_delivery"]).to_numpy("datetime64[s]")
+            self._add_delays(estimated, actual)
+
+    def update_packages(self, packages: Iterable[Dict]):
+        """Add package dicts as produced by the generator or read from NDJSON."""
+        packages = list(packages)
+        if not packages:
+            return
+        self.total_packages += len(packages)
+        self.status_counts.update(package["current_status"] for package in packages)
+        self.type_counts.update(package["package_type"] for package in packages)
+        self.carrier_counts.update(package["carrier"] for package in packages)
+        # Generated packages hold PackageDimensions records, parsed NDJSON plain dicts
+        dimensions = [package["dimensions"] for package in packages]
+        read = dict.__getitem__ if isinstance(dimensions[0], dict) else getattr
+        for column, key in zip(MOMENT_COLUMNS, DIMENSION_KEYS):
+            self.moments[column].add([read(record, key) for record in dimensions])
+        delivered = [package for package in packages if package["current_status"] == "Delivered"]
+        estimated = np.array([package["estimated_delivery"] for package in delivered], dtype="datetime64[s]")
+        actual = np.array([package["actual_delivery"] for package in delivered], dtype="datetime64[s]")
+        self._add_delays(estimated, actual)
+
+    def _add_delays(self, estimated: np.ndarray, actual: np.ndarray):
+        valid = ~(np.isnat(estimated) | np.isnat(actual))
+        delays = (actual[valid] - estimated[valid]).astype(np.int64) / 3600.0
+        self.delay_hours.add(delays)
+        self.delay_moments.add(delays)
+        self.on_time += int((delays <= 0).sum())
+
+    def merge(self, other: "StreamingAggregator"):
+        self.total_packages += other.total_packages
+        self.status_counts.update(other.status_counts)
+        self.type_counts.update(other.type_counts)
+        self.carrier_counts.update(other.carrier_counts)
+        for column, moments in self.moments.items():
+            moments.merge(other.moments[column])
+        self.delay_hours.merge(other.delay_hours)
+        self.delay_moments.merge(other.delay_moments)
+        self.on_time += other.on_time
+
+    def basic_stats(self) -> Dict:
+        """Statistics in the shape of ``LogisticsAnalyzer.get_basic_stats``."""
+        return {
+            "total_packages": self.total_packages,
+            "delivery_status_counts": dict(self.status_counts.most_common()),
+            "package_type_distribution": dict(self.type_counts.most_common()),
+            "avg_weight": _mean(self.moments["weight_kg"]),
+            "avg_dimensions": {
+                "length": _mean(self.moments["length_cm"]),
+                "width": _mean(self.moments["width_cm"]),
+                "height": _mean(self.moments["height_cm"])
+            }
+        }
+
+    def delivery_times(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict:
+        """Delay statistics in the shape of ``LogisticsAnalyzer.analyze_delivery_times``."""
+        delays = self.delay_moments
+        stats = {
+            "avg_delay_hours": _mean(delays),
+            "max_delay_hours": delays.max if delays.count else math.nan,
+            "min_delay_hours": delays.min if delays.count else math.nan,
+            "on_time_delivery_percentage": self.on_time / delays.count * 100 if delays.count else math.nan,
+        }
+        for q in quantiles:
+            stats[f"p{q * 100:g}_delay_hours"] = self.delay_hours.quantile(q)
+        return stats
+
+    def report(self) -> Dict:
+        """Full summary including carrier counts and dimension spread."""
+        return {
+            **self.basic_stats(),
+            "carrier_distribution": dict(self.carrier_counts.most_common()),
+            "dimension_stats": {
+                column: {"mean": _mean(moments), "std": math.sqrt(moments.variance),
+                         "min": moments.min, "max": moments.max}
+                for column, moments in self.moments.items() if moments.count
+            },
+            **self.delivery_times(),
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "total_packages": self.total_packages,
+            "status_counts": dict(self.status_counts),
+            "type_counts": dict(self.type_counts),
+            "carrier_counts": dict(self.carrier_counts),
+            "moments": {column: moments.to_dict() for column, moments in self.moments.items()},
+            "delay_hours": self.delay_hours.to_dict(),
+            "delay_moments": self.delay_moments.to_dict(),
+            "on_time": self.on_time,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "StreamingAggregator":
+        aggregator = cls(data["delay_hours"]["relative_accuracy"])
+        aggregator.total_packages = data["total_packages"]
+        aggregator.status_counts = Counter(data["status_counts"])
+        aggregator.type_counts = Counter(data["type_counts"])
+        aggregator.carrier_counts = Counter(data["carrier_counts"])
+        aggregator.moments = {column: RunningMoments.from_dict(moments)
+                              for column, moments in data["moments"].items()}
+        aggregator.delay_hours = QuantileSketch.from_dict(data["delay_hours"])
+        aggregator.delay_moments = RunningMoments.from_dict(data["delay_moments"])
+        aggregator.on_time = data["on_time"]
+        return aggregator
+
+
+def _mean(moments: RunningMoments) -> float:
+    return moments.mean if moments.count else math.nan
+
+
+def aggregate_csv(path: str, chunk_size: int = 500000,
+                  relative_accuracy: float = 0.01) -> StreamingAggregator:
+    """Aggregate a generated CSV in chunks of ``chunk_size`` rows."""
+    from logistics_analyzer import CSV_DTYPES, DATE_COLUMNS, DATE_FORMAT
+    aggregator = StreamingAggregator(relative_accuracy)
+    columns = ["current_status", "package_type", "carrier", *MOMENT_COLUMNS, *DATE_COLUMNS]
+    dtypes = {column: CSV_DTYPES[column] for column in columns if column in CSV_DTYPES}
+    for chunk in pd.read_csv(path, usecols=columns, dtype=dtypes, parse_dates=DATE_COLUMNS,
+                             date_format=DATE_FORMAT, chunksize=chunk_size):
+        aggregator.update_frame(chunk)
+    return aggregator
+
+
+def aggregate_ndjson(path: str, batch_size: int = 50000,
+                     relative_accuracy: float = 0.01) -> StreamingAggregator:
+    """Aggregate an NDJSON package feed ``batch_size`` lines at a time."""
+    aggregator = StreamingAggregator(relative_accuracy)
+    batch = []
+    with open(path, 'r') as f:
+        for line in f:
+            batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                aggregator.update_packages(batch)
+                batch = []
+    aggregator.update_packages(batch)
+    return aggregator
+
+
+def _aggregate_file(path: str) -> Dict:
+    aggregate = aggregate_ndjson if path.endswith(".ndjson") else aggregate_csv
+    return aggregate(path).to_dict()
+
+
+def aggregate_files(paths: List[str], workers: Optional[int] = None) -> StreamingAggregator:
+    """Aggregate CSV/NDJSON files in parallel and merge the partial results."""
+    aggregator = StreamingAggregator()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for partial in executor.map(_aggregate_file, paths):
+            aggregator.merge(StreamingAggregator.from_dict(partial))
+    return aggregator
@@ -1,47 +1,238 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
+import argparse
 import json
 import os
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report, confusion_matrix
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import warnings
+from logistics_aggregates import DEFAULT_QUANTILES, StreamingAggregator
+from logistics_cache import DEFAULT_CACHE_BYTES, DatasetCache
+from logistics_index import PackageIndex, index_path_for
+from logistics_metrics import add_metrics_arguments, metrics, profile
+from logistics_prediction import FEATURES, TARGET, DeliveryStatusModel
 warnings.filterwarnings('ignore')
 
+# Explicit dtypes for the generated CSV: low-cardinality strings become
+# categoricals, flags booleans and zip codes stay strings
+CSV_DTYPES = {
+    "tracking_number": "object",
+    "package_type": "category",
+    "carrier": "category",
+    "weight_kg": "float64",
+    "length_cm": "float64",
+    "width_cm": "float64",
+    "height_cm": "float64",
+    "volume_cm3": "float64",
+    "origin_city": "category",
+    "origin_state": "category",
+    "origin_zip": "object",
+    "destination_city": "category",
+    "destination_state": "category",
+    "destination_zip": "object",
+    "current_status": "category",
+    "special_handling": "bool",
+    "insurance_value": "float64",
+    "signature_required": "bool",
+    "description": "object",
+    "origin_latitude": "float64",
+    "origin_longitude": "float64",
+    "destination_latitude": "float64",
+    "destination_longitude": "float64",
+}
+DATE_COLUMNS = ["estimated_delivery", "actual_delivery"]
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Columns each chunked computation needs
+STATS_COLUMNS = ["current_status", "package_type", "weight_kg", "length_cm", "width_cm", "height_cm"]
+DELAY_COLUMNS = ["current_status", "estimated_delivery", "actual_delivery"]
+PLOT_COLUMNS = ["current_status", "package_type", "weight_kg"]
+
+# Columns the delivery status model reads; training projects onto these
+MODEL_COLUMNS = FEATURES + [TARGET]
+
+# Share of every chunk held out to score the model trained in chunked mode
+TEST_FRACTION = 0.2
+
+# name -> (column, plot kind, title, x label); each is saved as <name>.png
+PLOTS = {
+    "delivery_status_distribution": ("current_status", "count", "Distribution of Package Statuses", None),
+    "package_type_distribution": ("package_type", "count", "Distribution of Package Types", None),
+    "weight_distribution": ("weight_kg", "hist", "Distribution of Package Weights", "Weight (kg)"),
+}
+
+
+def render_plot(name: str, data: pd.DataFrame, data_dir: str) -> float:
+    """Render plot ``name`` from ``data`` into ``data_dir``; return the seconds taken."""
+    # Plotting libraries take most of a second to import, so only plots pay for them
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    start = time.perf_counter()
+    column, kind, title, xlabel = PLOTS[name]
+    plt.figure(figsize=(10, 6))
+    if kind == "count":
+        sns.countplot(data=data, x=column)
+        plt.xticks(rotation=45)
+    else:
+        sns.histplot(data=data, x=column, bins=20)
+    _save_plot(plt, name, data_dir)
+    return time.perf_counter() - start
+
+
+def render_counted_plot(name: str, counts: np.ndarray, labels: Optional[List[str]], data_dir: str,
+                        edges: Optional[np.ndarray] = None) -> float:
+    """Render plot ``name`` from precomputed counts; return the seconds taken.
+
+    Count plots take one count per label, histograms one per bin between
+    ``edges``.
+    """
+    import matplotlib.pyplot as plt
+
+    start = time.perf_counter()
+    column, kind, title, xlabel = PLOTS[name]
+    plt.figure(figsize=(10, 6))
+    if kind == "count":
+        plt.bar(labels, counts)
+        plt.xticks(rotation=45)
+        plt.xlabel(column)
+        plt.ylabel("count")
+    else:
+        plt.stairs(counts, edges, fill=True)
+        plt.ylabel("Count")
+    _save_plot(plt, name, data_dir)
+    return time.perf_counter() - start
+
+
+def _save_plot(plt, name: str, data_dir: str):
+    _, _, title, xlabel = PLOTS[name]
+    plt.title(title)
+    if xlabel:
+        plt.xlabel(xlabel)
+    plt.tight_layout()
+    plt.savefig(os.path.join(data_dir, f'{name}.png'))
+    plt.close()
+
+
+def _init_plot_worker():
+    import matplotlib.pyplot as plt
+
+    # Worker processes only write files, so never start a GUI backend there
+    plt.switch_backend("Agg")
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not on Linux
+        return os.cpu_count() or 1
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
 class LogisticsAnalyzer:
-    def __init__(self, json_file: str = "logistics_data.json", csv_file: str = "logistics_data.csv"):
-        """Initialize the analyzer with data files."""
-        self.data_dir = "data"
+    def __init__(self, json_file: str = "logistics_data.json", csv_file: str = "logistics_data.csv",
+                 data_dir: str = "data", columns: Optional[List[str]] = None,
+                 chunk_size: Optional[int] = None, cache_dir: Optional[str] = None,
+                 cache_max_bytes: int = DEFAULT_CACHE_BYTES, use_cache: bool = True):
+        """Initialize the analyzer with data files.
+
+        Nothing is read until it is needed. ``columns`` restricts the CSV
+        columns loaded into ``df``. With ``chunk_size`` set, statistics,
+        delay analysis, plots, model training and ``sample_data`` stream the
+        CSV in chunks of that many rows instead of loading it, so files
+        larger than memory can be analyzed.
+
+        The parsed frame is cached as a binary sidecar in ``cache_dir``
+        (``<data_dir>/.cache`` by default), so later analyzers over the same
+        CSV skip parsing; pass ``use_cache=False`` to always parse.
+        """
+        self.data_dir = data_dir
         self.json_file = os.path.join(self.data_dir, json_file)
         self.csv_file = os.path.join(self.data_dir, csv_file)
-        self.df = None
-        self.json_data = None
-        self.load_data()
+        self.columns = columns
+        self.chunk_size = chunk_size
+        self._df = None
+        self._json_data = None
+        self.cache = None
+        if use_cache:
+            self.cache = DatasetCache(cache_dir or os.path.join(self.data_dir, ".cache"), cache_max_bytes)
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """The typed CSV frame, loaded on first access."""
+        if self._df is None:
+            self.load_data()
+        return self._df
+
+    @df.setter
+    def df(self, value: pd.DataFrame):
+        self._df = value
+
+    @property
+    def json_data(self) -> List[Dict]:
+        """The raw JSON records, loaded on first access only."""
+        if self._json_data is None:
+            with open(self.json_file, 'r') as f:
+                self._json_data = json.load(f)
+        return self._json_data
+
+    def get_package(self, tracking_number: str) -> Optional[Dict]:
+        """One package's JSON record, or None if there is no such package.
+
+        Uses the offset index written by ``generate_logistics_data.py
+        --index`` when it exists, so only that record is read and parsed;
+        otherwise the whole JSON file is loaded and searched.
+        """
+        if os.path.exists(index_path_for(self.json_file)):
+            with PackageIndex(self.json_file) as index:
+                return index.get(tracking_number)
+        return next((package for package in self.json_data if package["tracking_number"] == tracking_number),
+                    None)
+
+    def _read_csv(self, columns: Optional[List[str]] = None, chunksize: Optional[int] = None):
+        """Read the CSV with explicit dtypes, projected onto ``columns``."""
+        dtypes = {name: dtype for name, dtype in CSV_DTYPES.items() if columns is None or name in columns}
+        dates = [name for name in DATE_COLUMNS if columns is None or name in columns]
+        return pd.read_csv(self.csv_file, usecols=columns, dtype=dtypes, parse_dates=dates,
+                           date_format=DATE_FORMAT, chunksize=chunksize)
+
+    def iter_chunks(self, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Yield typed CSV chunks of ``chunk_size`` rows (the whole file if unset)."""
+        if self.chunk_size is None:
+            yield self.df if columns is None else self.df[columns]
+            return
+        yield from self._read_csv(columns, chunksize=self.chunk_size)
         
+    @metrics.timed("data_load", track_memory=True)
     def load_data(self):
-        """Load data from both JSON and CSV files."""
+        """Load the CSV data into ``df``, from the parsed cache when possible."""
         try:
-            # Load JSON data
-            with open(self.json_file, 'r') as f:
-                self.json_data = json.load(f)
-            
-            # Load CSV data
-            self.df = pd.read_csv(self.csv_file)
+            if self.cache is None:
+                self._df = self._read_csv(self.columns)
+            else:
+                options = {"columns": self.columns, "dtypes": CSV_DTYPES, "date_format": DATE_FORMAT}
+                self._df = self.cache.load(self.csv_file, lambda: self._read_csv(self.columns), options)
             print("Data loaded successfully!")
         except FileNotFoundError:
             print("Please run generate_logistics_data.py first to create the dataset.")
             raise
 
+    @metrics.timed("basic_stats")
     def get_basic_stats(self) -> Dict:
         """Get basic statistics about the dataset."""
+        if self.chunk_size is not None:
+            return self._get_basic_stats_chunked()
         stats = {
             "total_packages": len(self.df),
-            "delivery_status_counts": self.df['status'].value_counts().to_dict(),
+            "delivery_status_counts": self.df['current_status'].value_counts().to_dict(),
             "package_type_distribution": self.df['package_type'].value_counts().to_dict(),
             "avg_weight": self.df['weight_kg'].mean(),
             "avg_dimensions": {
@@ -52,85 +243,208 @@ class LogisticsAnalyzer:
         }
         return stats
 
+    def _aggregate_chunks(self, columns: List[str]) -> StreamingAggregator:
+        aggregator = StreamingAggregator()
+        for chunk in self.iter_chunks(columns):
+            aggregator.update_frame(chunk)
+        return aggregator
+
+    def _get_basic_stats_chunked(self) -> Dict:
+        return self._aggregate_chunks(STATS_COLUMNS).basic_stats()
+
     def sample_data(self, n_samples: int = 5, random_state: int = 42) -> pd.DataFrame:
-        """Sample n records from the dataset."""
-        return self.df.sample(n=n_samples, random_state=random_state)
+        """Sample n records from the dataset (from its first chunk in chunked mode)."""
+        frame = next(self.iter_chunks())
+        return frame.sample(n=min(n_samples, len(frame)), random_state=random_state)
 
+    @metrics.timed("delay_analysis")
     def analyze_delivery_times(self) -> Dict:
-        """Analyze delivery times and delays."""
-        # Convert string timestamps to datetime
-        self.df['estimated_delivery'] = pd.to_datetime(self.df['estimated_delivery'])
-        self.df['actual_delivery'] = pd.to_datetime(self.df['actual_delivery'])
-        
+        """Analyze delivery times and delays.
+
+        Percentiles are exact in memory; in chunked mode they come from a
+        quantile sketch with 1% relative error.
+        """
+        if self.chunk_size is not None:
+            return self._analyze_delivery_times_chunked()
+        delivered_packages = self.df.loc[self.df['current_status'] == 'Delivered', DATE_COLUMNS]
+        # load_data parses the dates already; only frames assigned to df by
+        # hand may still hold strings, and those are converted on a copy
+        with metrics.stage("datetime_parsing"):
+            estimated = delivered_packages['estimated_delivery']
+            actual = delivered_packages['actual_delivery']
+            if not pd.api.types.is_datetime64_any_dtype(estimated):
+                estimated = pd.to_datetime(estimated)
+            if not pd.api.types.is_datetime64_any_dtype(actual):
+                actual = pd.to_datetime(actual)
+
         # Calculate delivery delays
-        delivered_packages = self.df[self.df['status'] == 'Delivered']
-        delays = (delivered_packages['actual_delivery'] - delivered_packages['estimated_delivery']).dt.total_seconds() / 3600  # in hours
+        delays = (actual - estimated).dt.total_seconds() / 3600  # in hours
         
-        return {
+        stats = {
             "avg_delay_hours": delays.mean(),
             "max_delay_hours": delays.max(),
             "min_delay_hours": delays.min(),
             "on_time_delivery_percentage": (delays <= 0).mean() * 100
         }
+        for q in DEFAULT_QUANTILES:
+            stats[f"p{q * 100:g}_delay_hours"] = delays.quantile(q)
+        return stats
+
+    def _analyze_delivery_times_chunked(self) -> Dict:
+        return self._aggregate_chunks(DELAY_COLUMNS).delivery_times()
 
+    @metrics.timed("plotting", track_memory=True)
     def plot_delivery_status_distribution(self):
         """Plot the distribution of delivery statuses."""
-        plt.figure(figsize=(10, 6))
-        sns.countplot(data=self.df, x='status')
-        plt.title('Distribution of Package Statuses')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig(os.path.join(self.data_dir, 'delivery_status_distribution.png'))
-        plt.close()
+        render_plot("delivery_status_distribution", self.df, self.data_dir)
 
+    @metrics.timed("plotting", track_memory=True)
     def plot_package_type_distribution(self):
         """Plot the distribution of package types."""
-        plt.figure(figsize=(10, 6))
-        sns.countplot(data=self.df, x='package_type')
-        plt.title('Distribution of Package Types')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig(os.path.join(self.data_dir, 'package_type_distribution.png'))
-        plt.close()
+        render_plot("package_type_distribution", self.df, self.data_dir)
 
+    @metrics.timed("plotting", track_memory=True)
     def plot_weight_distribution(self):
         """Plot the distribution of package weights."""
-        plt.figure(figsize=(10, 6))
-        sns.histplot(data=self.df, x='weight_kg', bins=20)
-        plt.title('Distribution of Package Weights')
-        plt.xlabel('Weight (kg)')
-        plt.tight_layout()
-        plt.savefig(os.path.join(self.data_dir, 'weight_distribution.png'))
-        plt.close()
-
-    def train_delivery_prediction_model(self) -> Tuple[RandomForestClassifier, float]:
-        """Train a model to predict delivery status."""
-        # Prepare features
-        features = ['weight_kg', 'length_cm', 'width_cm', 'height_cm']
-        X = self.df[features]
-        
-        # Encode target variable
-        le = LabelEncoder()
-        y = le.fit_transform(self.df['status'])
-        
+        render_plot("weight_distribution", self.df, self.data_dir)
+
+    @metrics.timed("plotting", track_memory=True)
+    def _render_plots_chunked(self) -> Dict[str, float]:
+        """Render every plot from counts gathered over the CSV chunks.
+
+        One pass counts statuses and types and finds the weight range, a
+        second bins the weights. Returns each plot's seconds.
+        """
+        aggregator = self._aggregate_chunks(PLOT_COLUMNS)
+        weights = aggregator.moments["weight_kg"]
+        low, high = (weights.min, weights.max) if weights.count else (0.0, 1.0)
+        if low == high:
+            # One distinct weight; widen so the bins have width
+            low, high = low - 0.5, high + 0.5
+        edges = np.linspace(low, high, 21)
+        histogram = np.zeros(len(edges) - 1, dtype=np.int64)
+        for chunk in self.iter_chunks(["weight_kg"]):
+            histogram += np.histogram(chunk["weight_kg"], bins=edges)[0]
+
+        counters = {"current_status": aggregator.status_counts, "package_type": aggregator.type_counts}
+        timings = {}
+        for name, (column, kind, _, _) in PLOTS.items():
+            if kind == "count":
+                labels = sorted(counters[column])
+                counts = np.array([counters[column][label] for label in labels])
+                timings[name] = render_counted_plot(name, counts, labels, self.data_dir)
+            else:
+                timings[name] = render_counted_plot(name, histogram, None, self.data_dir, edges)
+        return timings
+
+    @metrics.timed("model_training", track_memory=True)
+    def train_delivery_prediction_model(self, sample_size: Optional[int] = None,
+                                        model_path: Optional[str] = None) -> Tuple[DeliveryStatusModel, float]:
+        """Train a model to predict delivery status.
+
+        Fits a histogram gradient boosting model on 80% of the rows (or a
+        random ``sample_size`` of them) and reports accuracy on the rest.
+        The model is saved to ``model_path`` when given. In chunked mode
+        the model is fitted chunk by chunk and the held-out 20% of each
+        chunk is scored in a second pass.
+        """
+        if self.chunk_size is not None:
+            return self._train_delivery_prediction_model_chunked(sample_size, model_path)
+        from sklearn.model_selection import train_test_split
+
         # Split data
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        train, test = train_test_split(self.df[MODEL_COLUMNS], test_size=0.2, random_state=42)
         
         # Train model
-        model = RandomForestClassifier(n_estimators=100, random_state=42)
-        model.fit(X_train, y_train)
+        model = DeliveryStatusModel().fit(train, sample_size=sample_size)
+        if model_path:
+            model.save(model_path)
         
         # Calculate accuracy
-        accuracy = model.score(X_test, y_test)
+        accuracy = model.score(test)
         
         return model, accuracy
 
-    def generate_report(self):
-        """Generate a comprehensive analysis report."""
+    def _split_chunks(self, test: bool) -> Iterator[pd.DataFrame]:
+        """The training or held-out rows of every chunk; the split is the same on every pass."""
+        for i, chunk in enumerate(self.iter_chunks(MODEL_COLUMNS)):
+            held_out = np.random.default_rng((42, i)).random(len(chunk)) < TEST_FRACTION
+            yield chunk[held_out if test else ~held_out]
+
+    def _train_delivery_prediction_model_chunked(self, sample_size: Optional[int],
+                                                 model_path: Optional[str]) -> Tuple[DeliveryStatusModel, float]:
+        model = DeliveryStatusModel().fit_chunks(self._split_chunks(test=False), sample_size=sample_size)
+        if model_path:
+            model.save(model_path)
+        correct = rows = 0
+        for chunk in self._split_chunks(test=True):
+            if len(chunk):
+                correct += model.score(chunk) * len(chunk)
+                rows += len(chunk)
+        return model, correct / rows if rows else float("nan")
+
+    def _train_with_thread_limit(self, threads: int) -> Tuple[DeliveryStatusModel, float]:
+        """Train the model using at most ``threads`` OpenMP threads."""
+        from threadpoolctl import threadpool_limits
+
+        with threadpool_limits(limits=threads, user_api="openmp"):
+            return self.train_delivery_prediction_model()
+
+    def generate_report(self, parallel: bool = True, plot_workers: Optional[int] = None) -> Dict:
+        """Generate a comprehensive analysis report.
+
+        With ``parallel`` the statistics, delay analysis and model training
+        run in threads while the plots render in worker processes on the Agg
+        backend; the report is printed once every stage has finished, with
+        each stage's own time. Returns the computed results and timings.
+
+        Plot workers are capped at one less than the available CPUs and
+        model training gets the remaining CPUs for its OpenMP threads. With
+        a single CPU the stages run serially, since there is nothing to
+        overlap them with.
+
+        In chunked mode every stage streams the CSV, one after another, so
+        at most one chunk is in memory.
+        """
+        start = time.perf_counter()
+        timings = {}
+        cpus = available_cpus()
+        if self.chunk_size is not None:
+            stats, timings["basic_stats"] = _timed(self.get_basic_stats)
+            delivery_times, timings["delay_analysis"] = _timed(self.analyze_delivery_times)
+            for name, seconds in self._render_plots_chunked().items():
+                timings[f"plot:{name}"] = seconds
+            (model, accuracy), timings["model_training"] = _timed(self.train_delivery_prediction_model)
+        elif parallel and cpus > 1:
+            df = self.df  # load once, before worker threads touch the lazy property
+            plot_workers = min(plot_workers or len(PLOTS), cpus - 1)
+            with ProcessPoolExecutor(max_workers=plot_workers,
+                                     initializer=_init_plot_worker) as processes, \
+                    ThreadPoolExecutor(max_workers=min(3, cpus)) as threads:
+                plot_futures = {
+                    name: processes.submit(render_plot, name, df[[spec[0]]], self.data_dir)
+                    for name, spec in PLOTS.items()
+                }
+                stats_future = threads.submit(_timed, self.get_basic_stats)
+                delay_future = threads.submit(_timed, self.analyze_delivery_times)
+                model_future = threads.submit(_timed, lambda: self._train_with_thread_limit(cpus - plot_workers))
+                stats, timings["basic_stats"] = stats_future.result()
+                delivery_times, timings["delay_analysis"] = delay_future.result()
+                (model, accuracy), timings["model_training"] = model_future.result()
+                for name, future in plot_futures.items():
+                    timings[f"plot:{name}"] = future.result()
+                    metrics.record("plotting", timings[f"plot:{name}"])
+        else:
+            stats, timings["basic_stats"] = _timed(self.get_basic_stats)
+            delivery_times, timings["delay_analysis"] = _timed(self.analyze_delivery_times)
+            for name in PLOTS:
+                _, timings[f"plot:{name}"] = _timed(getattr(self, f"plot_{name}"))
+            (model, accuracy), timings["model_training"] = _timed(self.train_delivery_prediction_model)
+        elapsed = time.perf_counter() - start
+
         print("\n=== Logistics Data Analysis Report ===")
         
         # Basic Statistics
-        stats = self.get_basic_stats()
         print("\nBasic Statistics:")
         print(f"Total Packages: {stats['total_packages']}")
         print("\nDelivery Status Distribution:")
@@ -138,32 +452,57 @@ class LogisticsAnalyzer:
             print(f"{status}: {count}")
         
         # Delivery Time Analysis
-        delivery_times = self.analyze_delivery_times()
         print("\nDelivery Time Analysis:")
         print(f"Average Delay: {delivery_times['avg_delay_hours']:.2f} hours")
+        print(f"Delay p50/p95/p99: {delivery_times['p50_delay_hours']:.2f} / "
+              f"{delivery_times['p95_delay_hours']:.2f} / {delivery_times['p99_delay_hours']:.2f} hours")
         print(f"On-time Delivery Rate: {delivery_times['on_time_delivery_percentage']:.2f}%")
         
-        # Generate plots
-        self.plot_delivery_status_distribution()
-        self.plot_package_type_distribution()
-        self.plot_weight_distribution()
-        
-        # Train and evaluate prediction model
-        model, accuracy = self.train_delivery_prediction_model()
+        # Prediction model
         print(f"\nDelivery Status Prediction Model Accuracy: {accuracy:.2f}")
+
+        print("\nStage Timings:")
+        for name, seconds in timings.items():
+            print(f"{name}: {seconds:.2f}s")
+        print(f"total: {elapsed:.2f}s")
         
         print("\nAnalysis complete! Check the generated plots in the data folder.")
+        return {
+            "basic_stats": stats,
+            "delivery_times": delivery_times,
+            "model_accuracy": accuracy,
+            "timings": timings,
+            "total_seconds": elapsed,
+        }
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Analyze generated logistics tracking data.")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="compute statistics and delays over CSV chunks of this many rows")
+    parser.add_argument("--cache-dir", default=None,
+                        help="directory for parsed-data sidecars (default: data/.cache)")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_CACHE_BYTES >> 20,
+                        help="evict least recently used sidecars beyond this size (default: 2048)")
+    parser.add_argument("--no-cache", action="store_true", help="always parse the CSV, bypassing the cache")
+    parser.add_argument("--serial", action="store_true", help="run the report stages one after another")
+    add_metrics_arguments(parser)
+    return parser.parse_args(argv)
 
-def main():
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    metrics.enabled = bool(args.metrics_json or args.metrics_prometheus)
     try:
-        analyzer = LogisticsAnalyzer()
-        
-        # Generate sample data
-        print("\nSample Data:")
-        print(analyzer.sample_data(n_samples=3))
-        
-        # Generate full report
-        analyzer.generate_report()
+        with profile(args.profile):
+            analyzer = LogisticsAnalyzer(chunk_size=args.chunk_size, cache_dir=args.cache_dir,
+                                         cache_max_bytes=args.cache_max_mb << 20, use_cache=not args.no_cache)
+            
+            # Generate sample data
+            print("\nSample Data:")
+            print(analyzer.sample_data(n_samples=3))
+            
+            # Generate full report
+            analyzer.generate_report(parallel=not args.serial)
+        metrics.write(args.metrics_json, args.metrics_prometheus)
         
     except Exception as e:
         print(f"An error occurred: {str(e)}")
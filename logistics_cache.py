@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+# Bump when the parsed frame layout changes so stale sidecars are never read
+CACHE_VERSION = 1
+DEFAULT_CACHE_BYTES = 2 << 30
+INDEX_FILE = "index.json"
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def content_hash(path: str) -> str:
+    """BLAKE2b digest of a file's contents, read in 1 MiB blocks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """Parsed DataFrames stored as uncompressed Feather sidecars.
+
+    Entries are keyed by the source file's content hash plus the parse
+    options, so a touched but unchanged file still hits and an edited file
+    never does. Hashing is skipped while a file's path, size and mtime match
+    the last time it was hashed, the same shortcut git's index takes. The
+    sidecars are Arrow IPC files read with memory mapping, so loading costs
+    little more than mapping the file. When the cache grows past
+    ``max_bytes`` the least recently used entries are removed.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+
+    def _load_index(self) -> Dict:
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"version": CACHE_VERSION, "fingerprints": {}, "entries": {}}
+        if index.get("version") != CACHE_VERSION:
+            return {"version": CACHE_VERSION, "fingerprints": {}, "entries": {}}
+        return index
+
+    def _save_index(self, index: Dict):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def fingerprint(self, path: str, index: Optional[Dict] = None) -> str:
+        """Content hash of ``path``, reusing the recorded one if size and mtime are unchanged."""
+        index = self._load_index() if index is None else index
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        recorded = index["fingerprints"].get(path)
+        if recorded and recorded["size"] == stat.st_size and recorded["mtime_ns"] == stat.st_mtime_ns:
+            return recorded["hash"]
+        digest = content_hash(path)
+        index["fingerprints"][path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+        return digest
+
+    @staticmethod
+    def _key(digest: str, options: Dict) -> str:
+        options = json.dumps(options, sort_keys=True, default=str)
+        return hashlib.blake2b(f"{digest}:{options}".encode(), digest_size=16).hexdigest()
+
+    def load(self, path: str, parse: Callable[[], pd.DataFrame], options: Optional[Dict] = None,
+             columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Return the parsed frame for ``path``, calling ``parse`` only on a miss.
+
+        ``options`` must describe everything ``parse`` does beyond reading
+        the file (columns, dtypes, ...), since it is part of the cache key.
+        ``columns`` projects a cached frame without reading the other columns.
+        """
+        from pyarrow import feather
+
+        index = self._load_index()
+        key = self._key(self.fingerprint(path, index), options or {})
+        entry = index["entries"].get(key)
+        sidecar = os.path.join(self.cache_dir, f"{key}.feather")
+        if entry and os.path.exists(sidecar):
+            entry["last_used"] = time.time()
+            self._save_index(index)
+            table = feather.read_table(sidecar, columns=columns, memory_map=True)
+            return table.to_pandas()
+
+        df = parse()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{sidecar}.{os.getpid()}.tmp"
+        # Uncompressed so the file can be memory-mapped on read
+        feather.write_feather(df, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, sidecar)
+        index["entries"][key] = {
+            "source": os.path.abspath(path),
+            "bytes": os.path.getsize(sidecar),
+            "last_used": time.time(),
+        }
+        self._evict(index, keep=key)
+        self._save_index(index)
+        return df[columns] if columns else df
+
+    def _evict(self, index: Dict, keep: Optional[str] = None):
+        entries = index["entries"]
+        total = sum(entry["bytes"] for entry in entries.values())
+        for key in sorted(entries, key=lambda key: entries[key]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= entries.pop(key)["bytes"]
+            try:
+                os.remove(os.path.join(self.cache_dir, f"{key}.feather"))
+            except FileNotFoundError:
+                pass
+        # Forget hashes of files no longer backing any entry
+        sources = {entry["source"] for entry in entries.values()}
+        index["fingerprints"] = {path: recorded for path, recorded in index["fingerprints"].items()
+                                 if path in sources}
+
+    def clear(self):
+        """Remove every cached sidecar and the index."""
+        index = self._load_index()
+        for key in index["entries"]:
+            try:
+                os.remove(os.path.join(self.cache_dir, f"{key}.feather"))
+            except FileNotFoundError:
+                pass
+        try:
+            os.remove(self.index_path)
+        except FileNotFoundError:
+            pass
+
+    def size_bytes(self) -> int:
+        return sum(entry["bytes"] for entry in self._load_index()["entries"].values())
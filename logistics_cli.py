@@ -0,0 +1,111 @@
+"""One entry point for the logistics tools.
+
+    python logistics_cli.py generate --num-packages 100000 --format ndjson csv
+    python logistics_cli.py stats --chunk-size 500000
+    python logistics_cli.py delays
+    python logistics_cli.py plot weight_distribution
+    python logistics_cli.py train --sample-size 200000
+    python logistics_cli.py lookup UPS121334325
+
+Only argparse is imported up front. Each subcommand imports just the
+modules it runs, so ``--help`` and light commands never load pandas,
+matplotlib or scikit-learn. ``generate``, ``train`` and ``lookup`` forward
+their remaining arguments to the scripts they wrap; run them with
+``--help`` to see those options.
+"""
+import argparse
+import json
+import os
+import sys
+from typing import List, Optional
+
+# Subcommands whose options belong to the wrapped script: name -> (module, leading argv, help)
+FORWARDED_COMMANDS = {
+    "generate": ("generate_logistics_data", [], "generate synthetic package data"),
+    "train": ("logistics_prediction", ["train"], "train and save the delivery status model"),
+    "lookup": ("logistics_index", [], "look up packages by tracking number"),
+}
+
+
+def _add_analyzer_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--data-dir", default="data", help="directory holding the generated files")
+    parser.add_argument("--csv", default="logistics_data.csv", help="CSV file inside --data-dir")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="stream the CSV in chunks of this many rows instead of loading it")
+    parser.add_argument("--cache-dir", default=None, help="parsed-data cache (default: <data-dir>/.cache)")
+    parser.add_argument("--no-cache", action="store_true", help="always parse the CSV")
+
+
+def _analyzer(args: argparse.Namespace, columns: Optional[List[str]] = None):
+    from logistics_analyzer import LogisticsAnalyzer
+
+    return LogisticsAnalyzer(csv_file=args.csv, data_dir=args.data_dir, columns=columns,
+                             chunk_size=args.chunk_size, cache_dir=args.cache_dir, use_cache=not args.no_cache)
+
+
+def _print_json(result):
+    print(json.dumps(result, indent=2, default=str))
+
+
+def run_stats(args: argparse.Namespace):
+    from logistics_analyzer import STATS_COLUMNS
+
+    _print_json(_analyzer(args, STATS_COLUMNS).get_basic_stats())
+
+
+def run_delays(args: argparse.Namespace):
+    from logistics_analyzer import DELAY_COLUMNS
+
+    _print_json(_analyzer(args, DELAY_COLUMNS).analyze_delivery_times())
+
+
+def run_plot(args: argparse.Namespace):
+    from logistics_analyzer import PLOTS, _init_plot_worker, render_plot
+
+    names = args.names or list(PLOTS)
+    unknown = sorted(set(names) - set(PLOTS))
+    if unknown:
+        raise SystemExit(f"Unknown plots: {', '.join(unknown)} (choose from {', '.join(PLOTS)})")
+    _init_plot_worker()
+    columns = sorted({PLOTS[name][0] for name in names})
+    df = _analyzer(args, columns).df
+    for name in names:
+        seconds = render_plot(name, df, args.data_dir)
+        print(f"Saved {os.path.join(args.data_dir, name + '.png')} ({seconds:.2f}s)")
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate, analyze and query logistics tracking data.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (_, _, help_text) in FORWARDED_COMMANDS.items():
+        # Help and options are handled by the wrapped script
+        subparsers.add_parser(name, help=help_text, add_help=False)
+
+    stats = subparsers.add_parser("stats", help="basic dataset statistics as JSON")
+    _add_analyzer_arguments(stats)
+    delays = subparsers.add_parser("delays", help="delivery delay analysis as JSON")
+    _add_analyzer_arguments(delays)
+    plot = subparsers.add_parser("plot", help="render distribution plots as PNG files")
+    _add_analyzer_arguments(plot)
+    plot.add_argument("names", nargs="*",
+                      help="plots to render: delivery_status_distribution, package_type_distribution, "
+                           "weight_distribution (default: all)")
+    return parser.parse_known_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    args, rest = parse_args(argv)
+    if args.command in FORWARDED_COMMANDS:
+        import importlib
+
+        module, leading, _ = FORWARDED_COMMANDS[args.command]
+        importlib.import_module(module).main(leading + rest)
+        return
+    if rest:
+        raise SystemExit(f"Unrecognized arguments: {' '.join(rest)}")
+    {"stats": run_stats, "delays": run_delays, "plot": run_plot}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
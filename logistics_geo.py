@@ -0,0 +1,310 @@
+import argparse
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LATITUDE = 111.32
+DEFAULT_CELL_DEGREES = 0.5
+# Segments faster than this are flagged: quicker than an air freight leg
+DEFAULT_MAX_SPEED_KMH = 900.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in km between arrays (or scalars) of coordinates in degrees."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(value, dtype=np.float64)) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class GridIndex:
+    """Fixed-size lat/lon grid over a set of points.
+
+    Points are sorted by cell, so the points of a cell, and of a run of
+    cells within one grid row, are one contiguous slice found with
+    ``searchsorted``. A query visits only the grid rows its bounding box
+    spans; radius queries then filter those candidates with exact haversine
+    distances. Building is one ``argsort``. Longitudes do not wrap at the
+    antimeridian.
+    """
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray, cell_degrees: float = DEFAULT_CELL_DEGREES):
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.cell_degrees = cell_degrees
+        self._columns = int(np.ceil(360 / cell_degrees)) + 1
+        keys = self._cell_keys(self.latitudes, self.longitudes)
+        self.order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self.order]
+
+    def _rows(self, latitudes):
+        return np.floor((np.asarray(latitudes) + 90) / self.cell_degrees).astype(np.int64)
+
+    def _cols(self, longitudes):
+        return np.floor((np.asarray(longitudes) + 180) / self.cell_degrees).astype(np.int64)
+
+    def _cell_keys(self, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+        return self._rows(latitudes) * self._columns + self._cols(longitudes)
+
+    def _candidates(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        first_col, last_col = int(self._cols(max(min_lon, -180.0))), int(self._cols(min(max_lon, 180.0)))
+        rows = np.arange(self._rows(max(min_lat, -90.0)), self._rows(min(max_lat, 90.0)) + 1)
+        starts = np.searchsorted(self._sorted_keys, rows * self._columns + first_col, side="left")
+        ends = np.searchsorted(self._sorted_keys, rows * self._columns + last_col, side="right")
+        if not len(rows) or not (ends > starts).any():
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.order[start:end] for start, end in zip(starts, ends) if end > start])
+
+    def within_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Indices of points inside the box, in ascending order."""
+        candidates = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        lat, lon = self.latitudes[candidates], self.longitudes[candidates]
+        inside = (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+        return np.sort(candidates[inside])
+
+    def within_radius(self, latitude: float, longitude: float, radius_km: float) -> np.ndarray:
+        """Indices of points within ``radius_km`` of the given point, in ascending order."""
+        lat_margin = radius_km / KM_PER_DEGREE_LATITUDE
+        # Near the poles the longitude span covers everything
+        cos_lat = np.cos(np.radians(min(abs(latitude) + lat_margin, 90.0)))
+        lon_margin = 180.0 if cos_lat < 1e-9 else radius_km / (KM_PER_DEGREE_LATITUDE * cos_lat)
+        candidates = self._candidates(latitude - lat_margin, longitude - lon_margin,
+                                      latitude + lat_margin, longitude + lon_margin)
+        distances = haversine_km(latitude, longitude, self.latitudes[candidates], self.longitudes[candidates])
+        return np.sort(candidates[distances <= radius_km])
+
+    def __len__(self) -> int:
+        return len(self.latitudes)
+
+
+class ScanTable:
+    """Tracking events as columns, with a spatial index and route metrics.
+
+    Rows are ordered by package and then by scan sequence, so each
+    package's route is a contiguous run of rows starting at
+    ``offsets[i]``. Build it from generated packages, an NDJSON export or
+    the Parquet ``events`` dataset.
+    """
+
+    def __init__(self, tracking_numbers: np.ndarray, offsets: np.ndarray, timestamps: np.ndarray,
+                 latitudes: np.ndarray, longitudes: np.ndarray, facility_names: Optional[np.ndarray] = None,
+                 cell_degrees: float = DEFAULT_CELL_DEGREES):
+        self.tracking_numbers = np.asarray(tracking_numbers)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.timestamps = np.asarray(timestamps, dtype="datetime64[s]")
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.facility_names = facility_names
+        self.package_index = np.repeat(np.arange(len(self.tracking_numbers)), np.diff(self.offsets))
+        self.cell_degrees = cell_degrees
+        self._index = None
+
+    @classmethod
+    def from_packages(cls, packages: Iterable[Dict], **kwargs) -> "ScanTable":
+        """Build from generated packages (records) or parsed NDJSON packages (dicts)."""
+        tracking_numbers, counts = [], []
+        timestamps, latitudes, longitudes, facilities = [], [], [], []
+        for package in packages:
+            history = package["tracking_history"]
+            tracking_numbers.append(package["tracking_number"])
+            counts.append(len(history))
+            for event in history:
+                if isinstance(event, dict):
+                    location = event["location"]
+                    timestamps.append(event["timestamp"])
+                    latitudes.append(location["latitude"])
+                    longitudes.append(location["longitude"])
+                    facilities.append(location["facility_name"])
+                else:
+                    location = event.location
+                    timestamps.append(event.timestamp)
+                    latitudes.append(location.latitude)
+                    longitudes.append(location.longitude)
+                    facilities.append(location.facility_name)
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(np.array(tracking_numbers), offsets, np.array(timestamps, dtype="datetime64[s]"),
+                   np.array(latitudes), np.array(longitudes), np.array(facilities, dtype=object), **kwargs)
+
+    @classmethod
+    def from_ndjson(cls, path: str, **kwargs) -> "ScanTable":
+        with open(path, 'r') as f:
+            return cls.from_packages((json.loads(line) for line in f), **kwargs)
+
+    @classmethod
+    def from_parquet(cls, events_path: str, **kwargs) -> "ScanTable":
+        """Build from the ``events`` dataset written by ParquetDatasetWriter."""
+        import pyarrow.dataset as ds
+
+        columns = ["tracking_number", "sequence", "timestamp", "latitude", "longitude", "facility_name"]
+        table = ds.dataset(events_path, format="parquet", partitioning="hive").to_table(columns=columns)
+        table = table.sort_by([("tracking_number", "ascending"), ("sequence", "ascending")])
+        tracking_numbers = table.column("tracking_number").to_numpy(zero_copy_only=False)
+        starts = np.flatnonzero(np.r_[True, tracking_numbers[1:] != tracking_numbers[:-1]]) if len(table) else []
+        offsets = np.append(starts, len(table)).astype(np.int64)
+        return cls(tracking_numbers[offsets[:-1]], offsets,
+                   table.column("timestamp").to_numpy(zero_copy_only=False).astype("datetime64[s]"),
+                   table.column("latitude").to_numpy(), table.column("longitude").to_numpy(),
+                   table.column("facility_name").to_numpy(zero_copy_only=False), **kwargs)
+
+    @property
+    def index(self) -> GridIndex:
+        """Grid index over all scan locations, built on first use."""
+        if self._index is None:
+            self._index = GridIndex(self.latitudes, self.longitudes, self.cell_degrees)
+        return self._index
+
+    def _time_filter(self, rows: np.ndarray, start=None, end=None) -> np.ndarray:
+        if start is not None:
+            rows = rows[self.timestamps[rows] >= np.datetime64(start, "s")]
+        if end is not None:
+            rows = rows[self.timestamps[rows] <= np.datetime64(end, "s")]
+        return rows
+
+    def scans_within(self, latitude: float, longitude: float, radius_km: float,
+                     start=None, end=None) -> np.ndarray:
+        """Rows of scans within ``radius_km`` of a point, optionally between ``start`` and ``end``."""
+        return self._time_filter(self.index.within_radius(latitude, longitude, radius_km), start, end)
+
+    def scans_in_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                      start=None, end=None) -> np.ndarray:
+        """Rows of scans inside a bounding box, optionally between ``start`` and ``end``."""
+        return self._time_filter(self.index.within_bbox(min_lat, min_lon, max_lat, max_lon), start, end)
+
+    def packages_for(self, rows: np.ndarray) -> np.ndarray:
+        """Tracking numbers of the packages the given scan rows belong to."""
+        return self.tracking_numbers[np.unique(self.package_index[rows])]
+
+    def scans_frame(self, rows: np.ndarray) -> pd.DataFrame:
+        frame = pd.DataFrame({
+            "tracking_number": self.tracking_numbers[self.package_index[rows]],
+            "timestamp": self.timestamps[rows],
+            "latitude": self.latitudes[rows],
+            "longitude": self.longitudes[rows],
+        })
+        if self.facility_names is not None:
+            frame["facility_name"] = self.facility_names[rows]
+        return frame
+
+    def segment_metrics(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Distance (km), duration (hours) and speed (km/h) of every consecutive scan pair.
+
+        Arrays are aligned with scan rows: entry ``j`` describes the leg
+        ending at scan ``j`` and is 0 (NaN for speed) for each package's
+        first scan.
+        """
+        distance = np.zeros(len(self.latitudes))
+        hours = np.zeros(len(self.latitudes))
+        if len(distance) > 1:
+            distance[1:] = haversine_km(self.latitudes[:-1], self.longitudes[:-1],
+                                        self.latitudes[1:], self.longitudes[1:])
+            hours[1:] = np.diff(self.timestamps).astype(np.int64) / 3600.0
+        first = self.offsets[:-1][np.diff(self.offsets) > 0]
+        distance[first] = 0.0
+        hours[first] = 0.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            speed = np.where(hours > 0, distance / hours, np.where(distance > 0, np.inf, np.nan))
+        speed[first] = np.nan
+        return distance, hours, speed
+
+    def route_metrics(self, max_speed_kmh: float = DEFAULT_MAX_SPEED_KMH) -> pd.DataFrame:
+        """Per-package route length, duration, top speed and anomalous leg count.
+
+        A leg is anomalous when it is faster than ``max_speed_kmh``,
+        including moves between places with no time between the scans.
+        """
+        distance, hours, speed = self.segment_metrics()
+        nonempty = np.diff(self.offsets) > 0
+        starts = self.offsets[:-1][nonempty]
+        if not len(starts):
+            route_km = duration = top_speed = np.zeros(0)
+            anomalous = np.zeros(0, dtype=np.int64)
+        else:
+            route_km = np.add.reduceat(distance, starts)
+            duration = np.add.reduceat(hours, starts)
+            top_speed = np.fmax.reduceat(speed, starts)
+            anomalous = np.add.reduceat((speed > max_speed_kmh).astype(np.int64), starts)
+        return pd.DataFrame({
+            "tracking_number": self.tracking_numbers[nonempty],
+            "scans": np.diff(self.offsets)[nonempty],
+            "route_km": route_km,
+            "duration_hours": duration,
+            "max_speed_kmh": top_speed,
+            "anomalous_legs": anomalous,
+        })
+
+    def leg_loads(self) -> pd.DataFrame:
+        """Packages moved over each facility-to-facility leg, busiest first.
+
+        Consecutive scans of one package at different facilities count as
+        one move over that leg.
+        """
+        if self.facility_names is None:
+            raise ValueError("Leg loads need facility names")
+        names = np.asarray(self.facility_names, dtype=object)
+        moved = np.zeros(len(names), dtype=bool)
+        if len(names) > 1:
+            moved[1:] = names[1:] != names[:-1]
+        moved[self.offsets[:-1][np.diff(self.offsets) > 0]] = False
+        rows = np.flatnonzero(moved)
+        legs = pd.DataFrame({"from_facility": names[rows - 1], "to_facility": names[rows]})
+        return legs.value_counts().rename("packages").reset_index()
+
+    def __len__(self) -> int:
+        return len(self.latitudes)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Spatial queries and route checks over tracking scans.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--ndjson", help="NDJSON package export")
+    source.add_argument("--events", help="Parquet events dataset, e.g. data/logistics_parquet/events")
+    parser.add_argument("--near", default=None, metavar="LAT,LON", help="list scans near this point")
+    parser.add_argument("--radius-km", type=float, default=50.0, help="radius for --near (default: 50)")
+    parser.add_argument("--bbox", default=None, metavar="MIN_LAT,MIN_LON,MAX_LAT,MAX_LON",
+                        help="list scans inside this box")
+    parser.add_argument("--last-hours", type=float, default=None,
+                        help="only scans within this many hours of the latest scan")
+    parser.add_argument("--routes", action="store_true", help="report route lengths and speed anomalies")
+    parser.add_argument("--max-speed-kmh", type=float, default=DEFAULT_MAX_SPEED_KMH,
+                        help="speed above which a leg is anomalous (default: 900)")
+    parser.add_argument("--legs", action="store_true", help="report the busiest facility-to-facility legs")
+    parser.add_argument("--top", type=int, default=10, help="rows to print (default: 10)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    scans = ScanTable.from_ndjson(args.ndjson) if args.ndjson else ScanTable.from_parquet(args.events)
+    print(f"Loaded {len(scans)} scans of {len(scans.tracking_numbers)} packages")
+    start = None
+    if args.last_hours is not None and len(scans):
+        start = scans.timestamps.max() - np.timedelta64(int(args.last_hours * 3600), "s")
+
+    rows = None
+    if args.near:
+        latitude, longitude = (float(value) for value in args.near.split(","))
+        rows = scans.scans_within(latitude, longitude, args.radius_km, start=start)
+    elif args.bbox:
+        rows = scans.scans_in_bbox(*(float(value) for value in args.bbox.split(",")), start=start)
+    if rows is not None:
+        print(f"{len(rows)} scans of {len(scans.packages_for(rows))} packages match")
+        print(scans.scans_frame(rows).head(args.top).to_string(index=False))
+
+    if args.routes:
+        routes = scans.route_metrics(args.max_speed_kmh)
+        flagged = routes[routes["anomalous_legs"] > 0]
+        print(f"\nMedian route {routes['route_km'].median():.0f} km; "
+              f"{len(flagged)} of {len(routes)} packages have legs above {args.max_speed_kmh:.0f} km/h")
+        print(flagged.sort_values("max_speed_kmh", ascending=False).head(args.top).to_string(index=False))
+
+    if args.legs:
+        legs = scans.leg_loads()
+        print(f"\n{len(legs)} legs used; busiest:")
+        print(legs.head(args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+# Header: magic, entry count, size of the indexed data file in bytes
+INDEX_MAGIC = b"LGIDX001"
+INDEX_HEADER = struct.Struct("<8sQQ")
+INDEX_SUFFIX = ".idx"
+
+
+def key_hash(tracking_number: str) -> int:
+    """Stable 64-bit hash of a tracking number."""
+    return int.from_bytes(hashlib.blake2b(tracking_number.encode(), digest_size=8).digest(), "little")
+
+
+def index_path_for(data_path: str) -> str:
+    return data_path + INDEX_SUFFIX
+
+
+class OffsetIndexWriter:
+    """Collect ``(tracking number, offset, length)`` entries and write them sorted.
+
+    Entries are kept in compact typed arrays (20 bytes per package) and
+    sorted by key hash once, on ``close``. The file holds the header
+    followed by three contiguous columns: hashes (uint64), offsets (uint64)
+    and lengths (uint32).
+    """
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self._hashes = array("Q")
+        self._offsets = array("Q")
+        self._lengths = array("I")
+
+    def add(self, tracking_number: str, offset: int, length: int):
+        self._hashes.append(key_hash(tracking_number))
+        self._offsets.append(offset)
+        self._lengths.append(length)
+
+    def close(self, data_bytes: int):
+        hashes = np.frombuffer(self._hashes, dtype=np.uint64)
+        order = np.argsort(hashes, kind="stable")
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, len(hashes), data_bytes))
+            f.write(hashes[order].astype("<u8").tobytes())
+            f.write(np.frombuffer(self._offsets, dtype=np.uint64)[order].astype("<u8").tobytes())
+            f.write(np.frombuffer(self._lengths, dtype=np.uint32)[order].astype("<u4").tobytes())
+        os.replace(tmp_path, self.index_path)
+
+
+class PackageIndex:
+    """Random access to single packages of an NDJSON or JSON array file.
+
+    Both the index and the data file are memory-mapped. A lookup hashes the
+    tracking number, binary-searches the sorted hash column and parses only
+    the bytes of the matching record, so its cost does not depend on the
+    size of the dataset. Parsed records are checked against the requested
+    tracking number, which resolves hash collisions.
+    """
+
+    def __init__(self, data_path: str, index_path: Optional[str] = None):
+        self.data_path = data_path
+        self.index_path = index_path or index_path_for(data_path)
+        self._index_file = open(self.index_path, 'rb')
+        magic, count, data_bytes = INDEX_HEADER.unpack(self._index_file.read(INDEX_HEADER.size))
+        if magic != INDEX_MAGIC:
+            self._index_file.close()
+            raise ValueError(f"{self.index_path} is not a package index")
+        if os.path.getsize(data_path) != data_bytes:
+            self._index_file.close()
+            raise ValueError(f"{self.index_path} is stale: {data_path} changed after it was indexed")
+        self.count = count
+        # Plain ndarray views over one mapping; indexing them is cheaper than np.memmap
+        start = INDEX_HEADER.size
+        self._index_map = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.hashes = np.frombuffer(self._index_map, dtype="<u8", count=count, offset=start)
+        self.offsets = np.frombuffer(self._index_map, dtype="<u8", count=count, offset=start + 8 * count)
+        self.lengths = np.frombuffer(self._index_map, dtype="<u4", count=count, offset=start + 16 * count)
+        self._file = open(data_path, 'rb')
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if data_bytes else b""
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, tracking_number: str) -> bool:
+        return self.get_raw(tracking_number) is not None
+
+    def _candidates(self, tracking_number: str) -> Iterator[bytes]:
+        hash_value = key_hash(tracking_number)
+        position = int(np.searchsorted(self.hashes, np.uint64(hash_value)))
+        while position < self.count and self.hashes[position] == hash_value:
+            offset = int(self.offsets[position])
+            yield self._data[offset:offset + int(self.lengths[position])]
+            position += 1
+
+    def get(self, tracking_number: str) -> Optional[Dict]:
+        """The package with ``tracking_number`` as a dict, or None.
+
+        Generated tracking numbers are unique within a run, so there is at
+        most one match.
+        """
+        for record in self._candidates(tracking_number):
+            package = json.loads(record)
+            if package.get("tracking_number") == tracking_number:
+                return package
+        return None
+
+    def get_raw(self, tracking_number: str) -> Optional[bytes]:
+        """The JSON bytes of one package, unparsed, or None.
+
+        Parsing dominates ``get``; this skips it for callers that forward
+        the record as is.
+        """
+        quoted = json.dumps(tracking_number).encode()
+        for record in self._candidates(tracking_number):
+            if quoted in record:
+                return record
+        return None
+
+    def get_many(self, tracking_numbers: List[str]) -> List[Optional[Dict]]:
+        """Packages for a batch of tracking numbers, in request order (None if missing).
+
+        The hashes are searched in one vectorized call and the records are
+        read in file order, so page faults walk the data file forwards.
+        """
+        results: List[Optional[Dict]] = [None] * len(tracking_numbers)
+        if not self.count:
+            return results
+        hashes = np.fromiter((key_hash(number) for number in tracking_numbers), dtype=np.uint64,
+                             count=len(tracking_numbers))
+        positions = np.minimum(np.searchsorted(self.hashes, hashes), self.count - 1)
+        requested = np.flatnonzero(self.hashes[positions] == hashes)
+        for i in requested[np.argsort(self.offsets[positions[requested]], kind="stable")].tolist():
+            results[i] = self.get(tracking_numbers[i])
+        return results
+
+    def close(self):
+        # Release the views before closing the mapping they point into
+        self.hashes = self.offsets = self.lengths = None
+        self._index_map.close()
+        self._index_file.close()
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def build_index(data_path: str, index_path: Optional[str] = None) -> int:
+    """Index an existing NDJSON file in one pass; return the number of packages."""
+    writer = OffsetIndexWriter(index_path or index_path_for(data_path))
+    count = 0
+    offset = 0
+    with open(data_path, 'rb') as f:
+        for line in f:
+            record = line.rstrip(b"\r\n")
+            if record:
+                writer.add(json.loads(record)["tracking_number"], offset, len(record))
+                count += 1
+            offset += len(line)
+    writer.close(offset)
+    return count
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Look up packages by tracking number through an offset index.")
+    parser.add_argument("--data", default=os.path.join("data", "logistics_data.ndjson"),
+                        help="indexed NDJSON or JSON array file")
+    parser.add_argument("--index", default=None, help="index file (default: <data>.idx)")
+    parser.add_argument("--build", action="store_true", help="(re)build the index of an NDJSON file first")
+    parser.add_argument("tracking_numbers", nargs="*", help="tracking numbers to look up")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if args.build:
+        count = build_index(args.data, args.index)
+        print(f"Indexed {count} packages of {args.data}")
+    if not args.tracking_numbers:
+        return
+    with PackageIndex(args.data, args.index) as index:
+        for tracking_number, package in zip(args.tracking_numbers, index.get_many(args.tracking_numbers)):
+            if package is None:
+                print(f"{tracking_number}: not found")
+            else:
+                print(json.dumps(package, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from generate_logistics_data import DEFAULT_SHARD_SIZE, RecordJsonEncoder, iter_package_data_sharded
+from logistics_stream import iter_events_in_time_order
+
+# Domain-separated hashing as in RFC 6962: a leaf can never be passed off
+# as an inner node, or the other way round
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+# Data type of the anchoring records written through storeData
+ANCHOR_DATA_TYPE = "merkle_root"
+
+# The parts of the notebook contract's ABI the ledger uses
+CONTRACT_ABI = [
+    {"inputs": [{"internalType": "string", "name": "_deviceId", "type": "string"},
+                {"internalType": "string", "name": "_dataType", "type": "string"},
+                {"internalType": "string", "name": "_dataValue", "type": "string"}],
+     "name": "storeData", "outputs": [], "stateMutability": "nonpayable", "type": "function"},
+    {"inputs": [], "name": "getTotalRecords",
+     "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+     "stateMutability": "view", "type": "function"},
+]
+
+_encoder = RecordJsonEncoder()
+
+
+def leaf_hash(data: bytes) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + data).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+class MerkleTree:
+    """SHA-256 Merkle tree over a batch of leaves, keeping every level for proofs.
+
+    An odd node at the end of a level is carried up unchanged instead of
+    being paired with itself, so a batch can't be extended by duplicating its
+    last leaf without changing the root.
+    """
+
+    def __init__(self, leaves: List[bytes]):
+        if not leaves:
+            raise ValueError("A Merkle tree needs at least one leaf")
+        level = [leaf_hash(leaf) for leaf in leaves]
+        self.levels = [level]
+        while len(level) > 1:
+            paired = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+            if len(level) % 2:
+                paired.append(level[-1])
+            level = paired
+            self.levels.append(level)
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    def proof(self, index: int) -> List[Tuple[str, str]]:
+        """Sibling hashes from leaf ``index`` up to the root, as ``(side, hex digest)`` pairs."""
+        path = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                path.append(("left" if sibling < index else "right", level[sibling].hex()))
+            index //= 2
+        return path
+
+
+def verify_proof(leaf: bytes, path: List[Tuple[str, str]], root: str) -> bool:
+    """Whether ``leaf`` hashes up to ``root`` (hex) along ``path``."""
+    digest = leaf_hash(leaf)
+    for side, sibling in path:
+        sibling = bytes.fromhex(sibling)
+        digest = node_hash(sibling, digest) if side == "left" else node_hash(digest, sibling)
+    return digest.hex() == root
+
+
+class LedgerStore:
+    """Local copy of every anchored batch: its leaves and where its root went.
+
+    With a directory, each batch's leaves are written as
+    ``batch-<id>.ndjson``, one event per line, and anchors are appended to
+    ``anchors.jsonl``. Without one, both are kept in memory. Trees are
+    rebuilt from the leaves when a proof is requested.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._leaves: Dict[int, List[bytes]] = {}
+        self.anchors: Dict[int, Dict] = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            anchors_path = os.path.join(directory, "anchors.jsonl")
+            if os.path.exists(anchors_path):
+                with open(anchors_path, 'r') as f:
+                    for line in f:
+                        anchor = json.loads(line)
+                        self.anchors[anchor["batch"]] = anchor
+
+    def _batch_path(self, batch_id: int) -> str:
+        return os.path.join(self.directory, f"batch-{batch_id:06d}.ndjson")
+
+    def next_batch_id(self) -> int:
+        if not self.directory:
+            return len(self._leaves)
+        existing = [int(name[6:12]) for name in os.listdir(self.directory) if name.startswith("batch-")]
+        return max(existing, default=-1) + 1
+
+    def save_batch(self, batch_id: int, leaves: List[bytes]):
+        if not self.directory:
+            self._leaves[batch_id] = leaves
+            return
+        with open(self._batch_path(batch_id), 'wb') as f:
+            f.write(b"\n".join(leaves) + b"\n")
+
+    def leaves(self, batch_id: int) -> List[bytes]:
+        if not self.directory:
+            return self._leaves[batch_id]
+        with open(self._batch_path(batch_id), 'rb') as f:
+            return f.read().splitlines()
+
+    def record_anchor(self, anchor: Dict):
+        self.anchors[anchor["batch"]] = anchor
+        if self.directory:
+            with open(os.path.join(self.directory, "anchors.jsonl"), 'a') as f:
+                f.write(json.dumps(anchor) + "\n")
+
+    def batch_ids(self) -> List[int]:
+        if not self.directory:
+            return sorted(self._leaves)
+        return sorted(int(name[6:12]) for name in os.listdir(self.directory) if name.startswith("batch-"))
+
+    def proof(self, batch_id: int, index: int) -> Dict:
+        """Everything needed to check one event against its anchored root.
+
+        The path comes from the stored leaves, but the root is the one that
+        was anchored, so the proof fails if any stored leaf of the batch
+        has changed since.
+        """
+        anchor = self.anchors.get(batch_id)
+        if anchor is None:
+            raise ValueError(f"Batch {batch_id} has no anchored root")
+        leaves = self.leaves(batch_id)
+        return {
+            "batch": batch_id,
+            "index": index,
+            "leaf": leaves[index].decode(),
+            "path": MerkleTree(leaves).proof(index),
+            "root": anchor["root"],
+            "transaction": anchor["transaction"],
+        }
+
+    def find(self, tracking_number: str) -> List[Tuple[int, int]]:
+        """``(batch, index)`` of every stored event of a package, by scanning the batches."""
+        quoted = json.dumps(tracking_number).encode()
+        found = []
+        for batch_id in self.batch_ids():
+            for index, leaf in enumerate(self.leaves(batch_id)):
+                if quoted in leaf and json.loads(leaf).get("tracking_number") == tracking_number:
+                    found.append((batch_id, index))
+        return found
+
+
+class MockChain:
+    """In-process stand-in for the Ganache contract.
+
+    ``store`` behaves like a ``storeData`` transaction followed by waiting
+    for its receipt: it takes ``latency`` seconds, then appends the record
+    and returns a transaction hash. Concurrent calls overlap, as pipelined
+    transactions do on a real node.
+    """
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.records: List[Tuple[int, str, str, str]] = []
+
+    async def store(self, device_id: str, data_type: str, data_value: str) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.records.append((int(time.time()), device_id, data_type, data_value))
+        payload = f"{len(self.records)}:{device_id}:{data_type}:{data_value}".encode()
+        return "0x" + hashlib.sha256(payload).hexdigest()
+
+    def total_records(self) -> int:
+        return len(self.records)
+
+
+class Web3Chain:
+    """Anchor through the notebook's deployed contract over a web3 provider.
+
+    Needs the optional ``web3`` package. Each call sends one ``storeData``
+    transaction and waits for its receipt in a worker thread, so several
+    batches can be in flight at once.
+    """
+
+    def __init__(self, url: str, contract_address: str, account: Optional[str] = None, gas: int = 1_000_000):
+        from web3 import Web3
+
+        self.web3 = Web3(Web3.HTTPProvider(url))
+        if not self.web3.is_connected():
+            raise ConnectionError(f"Cannot reach a node at {url}")
+        self.contract = self.web3.eth.contract(address=contract_address, abi=CONTRACT_ABI)
+        self.account = account or self.web3.eth.accounts[0]
+        self.gas = gas
+
+    def _store(self, device_id: str, data_type: str, data_value: str) -> str:
+        transaction = self.contract.functions.storeData(device_id, data_type, data_value).transact(
+            {"from": self.account, "gas": self.gas})
+        receipt = self.web3.eth.wait_for_transaction_receipt(transaction)
+        return receipt["transactionHash"].hex()
+
+    async def store(self, device_id: str, data_type: str, data_value: str) -> str:
+        return await asyncio.to_thread(self._store, device_id, data_type, data_value)
+
+    def total_records(self) -> int:
+        return self.contract.functions.getTotalRecords().call()
+
+
+class LedgerSink:
+    """Collect tracking events into batches and anchor one Merkle root per batch.
+
+    Events are encoded as compact JSON leaves. Every ``batch_size`` events
+    the batch is sealed: its tree is built, its leaves go to the store and
+    its root is submitted to the chain as a ``storeData`` record. Up to
+    ``max_in_flight`` submissions run at once while later batches are
+    being filled and hashed. When that many are pending, ``add`` waits for
+    the oldest, which bounds memory and load on the node.
+    """
+
+    def __init__(self, chain, store: Optional[LedgerStore] = None, batch_size: int = 1024,
+                 max_in_flight: int = 8, ledger_id: str = "logistics-ledger"):
+        if batch_size < 1 or max_in_flight < 1:
+            raise ValueError("batch_size and max_in_flight must be at least 1")
+        self.chain = chain
+        self.store = store or LedgerStore()
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.ledger_id = ledger_id
+        self.events = 0
+        self.batches = 0
+        self.submit_seconds = 0.0
+        self._pending: List[bytes] = []
+        self._in_flight = set()
+        self._next_batch = self.store.next_batch_id()
+
+    async def add(self, event: Dict):
+        self._pending.append(_encoder.encode(event).encode())
+        if len(self._pending) >= self.batch_size:
+            await self._seal()
+
+    async def add_many(self, events: Iterable[Dict]):
+        for event in events:
+            await self.add(event)
+
+    async def _seal(self):
+        leaves, self._pending = self._pending, []
+        batch_id = self._next_batch
+        self._next_batch += 1
+        root = MerkleTree(leaves).root.hex()
+        self.store.save_batch(batch_id, leaves)
+        while len(self._in_flight) >= self.max_in_flight:
+            done, self._in_flight = await asyncio.wait(self._in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        self._in_flight.add(asyncio.create_task(self._submit(batch_id, root, len(leaves))))
+        self.events += len(leaves)
+        self.batches += 1
+        # Let the submission start before filling the next batch
+        await asyncio.sleep(0)
+
+    async def _submit(self, batch_id: int, root: str, count: int):
+        start = time.perf_counter()
+        value = json.dumps({"batch": batch_id, "root": root, "leaves": count}, separators=(",", ":"))
+        transaction = await self.chain.store(self.ledger_id, ANCHOR_DATA_TYPE, value)
+        self.submit_seconds += time.perf_counter() - start
+        self.store.record_anchor({"batch": batch_id, "root": root, "leaves": count, "transaction": transaction})
+
+    async def flush(self):
+        """Seal the partial batch and wait until every submitted root is anchored."""
+        if self._pending:
+            await self._seal()
+        if self._in_flight:
+            done, self._in_flight = await asyncio.wait(self._in_flight)
+            for task in done:
+                task.result()
+
+    async def run(self, events: Iterable[Dict]) -> Dict:
+        """Anchor all events and return throughput statistics."""
+        start = time.perf_counter()
+        await self.add_many(events)
+        await self.flush()
+        elapsed = time.perf_counter() - start
+        return {
+            "events": self.events,
+            "batches": self.batches,
+            "elapsed_seconds": elapsed,
+            "events_per_second": self.events / elapsed if elapsed > 0 else 0.0,
+            "mean_submit_seconds": self.submit_seconds / self.batches if self.batches else 0.0,
+        }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Anchor simulated tracking events as Merkle roots on a chain.")
+    parser.add_argument("--num-packages", type=int, default=10000,
+                        help="packages whose events are anchored (default: 10000)")
+    parser.add_argument("--seed", type=int, default=None, help="master seed for generation")
+    parser.add_argument("--batch-size", type=int, default=1024, help="events per anchored root (default: 1024)")
+    parser.add_argument("--max-in-flight", type=int, default=8,
+                        help="root submissions awaiting receipts at once (default: 8)")
+    parser.add_argument("--store", default=os.path.join("data", "ledger"),
+                        help="directory for batch leaves and anchors (default: data/ledger)")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="seconds per transaction on the mock chain (default: 0.05)")
+    parser.add_argument("--node-url", default=None,
+                        help="anchor through a web3 node such as Ganache (http://127.0.0.1:7545) instead")
+    parser.add_argument("--contract", default=None, help="address of the deployed storeData contract")
+    parser.add_argument("--prove", default=None, metavar="TRACKING_NUMBER",
+                        help="print and verify inclusion proofs for a package's stored events, then exit")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    store = LedgerStore(args.store)
+    if args.prove:
+        for batch_id, index in store.find(args.prove):
+            try:
+                proof = store.proof(batch_id, index)
+            except ValueError as error:
+                print(f"error: {error}")
+                continue
+            valid = verify_proof(proof["leaf"].encode(), proof["path"], proof["root"])
+            print(json.dumps(proof, indent=2))
+            print(f"valid: {valid}")
+        return
+
+    if args.node_url:
+        if not args.contract:
+            raise SystemExit("--contract is required with --node-url")
+        chain = Web3Chain(args.node_url, args.contract)
+    else:
+        chain = MockChain(latency=args.latency)
+    packages = iter_package_data_sharded(args.num_packages, seed=args.seed, shard_size=DEFAULT_SHARD_SIZE)
+    sink = LedgerSink(chain, store, batch_size=args.batch_size, max_in_flight=args.max_in_flight)
+    stats = asyncio.run(sink.run(iter_events_in_time_order(packages)))
+    print(f"Anchored {stats['events']} events in {stats['batches']} roots in {stats['elapsed_seconds']:.2f}s "
+          f"({stats['events_per_second']:.0f} events/s, {stats['mean_submit_seconds']:.3f}s per transaction); "
+          f"leaves kept in {args.store}")
+
+
+if __name__ == "__main__":
+    main()
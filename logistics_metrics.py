@@ -0,0 +1,218 @@
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_NULL_STAGE = nullcontext()
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, or None where it is unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and KiB on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _StageTimer:
+    __slots__ = ("registry", "name", "track_memory", "start", "rss")
+
+    def __init__(self, registry: "MetricsRegistry", name: str, track_memory: bool):
+        self.registry = registry
+        self.name = name
+        self.track_memory = track_memory
+
+    def __enter__(self):
+        self.rss = peak_rss_bytes() if self.track_memory else None
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        growth = None
+        if self.rss is not None:
+            growth = peak_rss_bytes() - self.rss
+        self.registry.record(self.name, elapsed, growth)
+
+
+class MetricsRegistry:
+    """Stage timers and counters for generation and analysis runs.
+
+    Disabled by default, in which case ``stage`` returns a shared no-op
+    context and ``timed`` wrappers only pay for one attribute check. Stage
+    times are inclusive: a stage that calls another also counts its time.
+    Updates take a lock, so stages may run in several threads.
+    """
+
+    def __init__(self, enabled: bool = False, prefix: str = "logistics"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.started = time.time()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, float] = {}
+
+    def stage(self, name: str, track_memory: bool = False):
+        """Context manager timing one execution of ``name``.
+
+        With ``track_memory`` the growth of the process peak RSS during the
+        stage is recorded too; use it for coarse stages only.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _StageTimer(self, name, track_memory)
+
+    def timed(self, name: str, track_memory: bool = False) -> Callable:
+        """Decorator recording every call of the function as stage ``name``."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _StageTimer(self, name, track_memory):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name: str, seconds: float, rss_growth: Optional[int] = None):
+        if not self.enabled:
+            return
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+            stage["count"] += 1
+            stage["total_seconds"] += seconds
+            if seconds > stage["max_seconds"]:
+                stage["max_seconds"] = seconds
+            if rss_growth is not None:
+                stage["rss_growth_bytes"] = stage.get("rss_growth_bytes", 0) + rss_growth
+
+    def incr(self, name: str, amount: float = 1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self) -> Dict:
+        """Raw stages and counters, e.g. to send back from a worker process."""
+        return {"stages": self.stages, "counters": self.counters}
+
+    def merge(self, snapshot: Dict):
+        """Fold a snapshot from another registry (typically a worker) into this one."""
+        with self._lock:
+            self._merge(snapshot)
+
+    def _merge(self, snapshot: Dict):
+        for name, other in snapshot["stages"].items():
+            stage = self.stages.setdefault(name, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            stage["count"] += other["count"]
+            stage["total_seconds"] += other["total_seconds"]
+            stage["max_seconds"] = max(stage["max_seconds"], other["max_seconds"])
+            if "rss_growth_bytes" in other:
+                stage["rss_growth_bytes"] = stage.get("rss_growth_bytes", 0) + other["rss_growth_bytes"]
+        for name, value in snapshot["counters"].items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> Dict:
+        """Machine-readable run summary."""
+        stages = {}
+        for name, stage in sorted(self.stages.items()):
+            stages[name] = {
+                **stage,
+                "mean_seconds": stage["total_seconds"] / stage["count"] if stage["count"] else 0.0,
+            }
+        return {
+            "started": self.started,
+            "wall_seconds": time.time() - self.started,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "stages": stages,
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def to_prometheus(self) -> str:
+        """Render the summary in the Prometheus text exposition format."""
+        p = self.prefix
+        summary = self.summary()
+        lines = [
+            f"# HELP {p}_stage_seconds_total Total time spent in each stage.",
+            f"# TYPE {p}_stage_seconds_total counter",
+        ]
+        lines += [f'{p}_stage_seconds_total{{stage="{name}"}} {stage["total_seconds"]:.9f}'
+                  for name, stage in summary["stages"].items()]
+        lines += [
+            f"# HELP {p}_stage_calls_total Number of times each stage ran.",
+            f"# TYPE {p}_stage_calls_total counter",
+        ]
+        lines += [f'{p}_stage_calls_total{{stage="{name}"}} {stage["count"]}'
+                  for name, stage in summary["stages"].items()]
+        lines += [
+            f"# HELP {p}_stage_max_seconds Longest single run of each stage.",
+            f"# TYPE {p}_stage_max_seconds gauge",
+        ]
+        lines += [f'{p}_stage_max_seconds{{stage="{name}"}} {stage["max_seconds"]:.9f}'
+                  for name, stage in summary["stages"].items()]
+        memory = {name: stage for name, stage in summary["stages"].items() if "rss_growth_bytes" in stage}
+        if memory:
+            lines += [
+                f"# HELP {p}_stage_rss_growth_bytes Peak RSS growth observed during each stage.",
+                f"# TYPE {p}_stage_rss_growth_bytes gauge",
+            ]
+            lines += [f'{p}_stage_rss_growth_bytes{{stage="{name}"}} {stage["rss_growth_bytes"]}'
+                      for name, stage in memory.items()]
+        for name, value in summary["counters"].items():
+            lines += [f"# TYPE {p}_{name}_total counter", f"{p}_{name}_total {value}"]
+        lines += [f"# TYPE {p}_run_seconds gauge", f"{p}_run_seconds {summary['wall_seconds']:.6f}"]
+        if summary["peak_rss_bytes"] is not None:
+            lines += [f"# TYPE {p}_peak_rss_bytes gauge", f"{p}_peak_rss_bytes {summary['peak_rss_bytes']}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path: Optional[str] = None, prometheus_path: Optional[str] = None):
+        """Write the run summary as JSON and/or Prometheus text."""
+        if json_path:
+            with open(json_path, 'w') as f:
+                json.dump(self.summary(), f, indent=2)
+        if prometheus_path:
+            with open(prometheus_path, 'w') as f:
+                f.write(self.to_prometheus())
+
+
+@contextmanager
+def profile(path: Optional[str]) -> Iterator[Optional[cProfile.Profile]]:
+    """Capture a cProfile of the block into ``path``; a no-op when ``path`` is None."""
+    if not path:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        profiler.dump_stats(path)
+
+
+def add_metrics_arguments(parser):
+    """Add the --metrics-json, --metrics-prometheus and --profile options to a parser."""
+    parser.add_argument("--metrics-json", default=None, help="write a JSON run summary to this path")
+    parser.add_argument("--metrics-prometheus", default=None,
+                        help="write run metrics in Prometheus text format to this path")
+    parser.add_argument("--profile", default=None, help="write a cProfile capture of the run to this path")
+
+
+# Process-wide registry used by the generator and the analyzer
+metrics = MetricsRegistry()
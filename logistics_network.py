@@ -0,0 +1,403 @@
+import argparse
+import heapq
+import json
+import math
+import os
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from logistics_pools import DEFAULT_POOL_SIZE, ValuePools, zipf_cum_weights
+
+NETWORK_CACHE_VERSION = 1
+
+# Approximate population centers of each state; facilities are placed around them
+STATE_CENTROIDS: Dict[str, Tuple[float, float]] = {
+    "Alabama": (33.0, -86.8), "Alaska": (61.2, -149.9), "Arizona": (33.4, -111.9),
+    "Arkansas": (35.0, -92.4), "California": (35.5, -119.4), "Colorado": (39.6, -105.0),
+    "Connecticut": (41.6, -72.8), "Delaware": (39.4, -75.6), "Florida": (27.8, -81.6),
+    "Georgia": (33.4, -84.1), "Hawaii": (21.3, -157.9), "Idaho": (43.6, -115.9),
+    "Illinois": (41.3, -88.4), "Indiana": (39.9, -86.3), "Iowa": (41.9, -93.0),
+    "Kansas": (38.5, -97.4), "Kentucky": (37.8, -85.3), "Louisiana": (30.7, -91.3),
+    "Maine": (44.3, -69.8), "Maryland": (39.1, -76.8), "Massachusetts": (42.3, -71.4),
+    "Michigan": (42.9, -84.2), "Minnesota": (45.2, -93.6), "Mississippi": (32.6, -89.6),
+    "Missouri": (38.4, -92.2), "Montana": (46.8, -110.3), "Nebraska": (41.2, -97.3),
+    "Nevada": (36.5, -115.6), "New Hampshire": (43.0, -71.5), "New Jersey": (40.4, -74.4),
+    "New Mexico": (34.6, -106.4), "New York": (41.5, -74.6), "North Carolina": (35.6, -79.4),
+    "North Dakota": (47.4, -99.3), "Ohio": (40.5, -82.7), "Oklahoma": (35.6, -97.0),
+    "Oregon": (44.7, -122.6), "Pennsylvania": (40.5, -77.1), "Rhode Island": (41.8, -71.4),
+    "South Carolina": (34.0, -81.1), "South Dakota": (44.0, -98.9), "Tennessee": (35.8, -86.4),
+    "Texas": (30.9, -97.4), "Utah": (40.4, -111.8), "Vermont": (44.1, -72.8),
+    "Virginia": (37.8, -77.8), "Washington": (47.3, -121.6), "West Virginia": (38.8, -80.8),
+    "Wisconsin": (43.7, -89.0), "Wyoming": (42.6, -107.4),
+}
+# Used for states missing from the table: the geographic center of the contiguous US
+DEFAULT_CENTROID = (39.83, -98.58)
+
+SORTING_CENTER = "Sorting Center"
+DISTRIBUTION_HUB = "Distribution Hub"
+LOCAL_FACILITY = "Local Facility"
+INTERNATIONAL_GATEWAY = "International Gateway"
+CUSTOMS_CENTER = "Customs Clearance Center"
+
+HUB_STATES = ["California", "Washington", "Arizona", "Colorado", "Texas", "Illinois",
+              "Tennessee", "Kentucky", "Ohio", "Georgia", "Florida", "New Jersey"]
+# Each gateway has a customs clearance center next to it
+GATEWAY_STATES = ["California", "Washington", "Texas", "Illinois", "Florida", "New York"]
+DEFAULT_LOCALS_PER_STATE = 4
+# Each sorting center links to this many of its nearest neighbours and hubs
+REGIONAL_NEIGHBOURS = 3
+HUB_LINKS = 2
+
+# Standard deviation, in degrees, of facility positions around their state's centroid
+PLACEMENT_SPREAD_DEGREES = {LOCAL_FACILITY: 0.6, SORTING_CENTER: 0.15, DISTRIBUTION_HUB: 0.1,
+                            INTERNATIONAL_GATEWAY: 0.1, CUSTOMS_CENTER: 0.05}
+
+# Transit times derived from distances. Legs longer than AIR_MIN_KM fly,
+# everything else drives at the speed of its leg type over roads that are
+# ROAD_FACTOR times longer than the great-circle distance.
+ROAD_FACTOR = 1.2
+GROUND_SPEED_KMH = {"local": 45.0, "regional": 70.0, "linehaul": 85.0}
+AIR_MIN_KM = 1000.0
+AIR_SPEED_KMH = 750.0
+AIR_HANDLING_HOURS = 2.0
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def great_circle_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def leg_hours(distance_km: float, kind: str) -> Tuple[float, str]:
+    """Transit hours and mode (``ground`` or ``air``) of a leg of ``kind``."""
+    if distance_km > AIR_MIN_KM:
+        return distance_km / AIR_SPEED_KMH + AIR_HANDLING_HOURS, "air"
+    return distance_km * ROAD_FACTOR / GROUND_SPEED_KMH[kind], "ground"
+
+
+# A route: facility indices from origin to destination, and the cumulative
+# transit hours at which each of them is reached
+Route = Tuple[Tuple[int, ...], Tuple[float, ...]]
+
+
+class FacilityNetwork:
+    """A fixed network of facilities that packages are routed through.
+
+    Every state has a sorting center and a few local facilities. Sorting
+    centers are linked to their nearest neighbours and to distribution
+    hubs; hubs are linked to each other, and international gateways (each
+    with a customs clearance center) hang off the hubs. Edges are weighted
+    by transit hours derived from their length, so shortest paths prefer
+    hub-to-hub flights over long drives.
+
+    Packages start and end at local facilities. The path between two
+    regions (states) is computed once with Dijkstra's algorithm and cached,
+    together with the single-source trees it came from, so routing a
+    package costs a dict lookup.
+    """
+
+    def __init__(self, facilities: List[Tuple[str, str, str, str, str, float, float]],
+                 edges: List[Tuple[int, int, float, float, str]], endpoints: List[int]):
+        # facilities: (name, type, city, state, zip, latitude, longitude)
+        # edges: (a, b, km, hours, mode), undirected
+        # endpoints: local facilities in decreasing order of shipping volume
+        self.facilities = facilities
+        self.edges = edges
+        self.endpoints = endpoints
+        self.adjacency: List[List[Tuple[int, float]]] = [[] for _ in facilities]
+        for a, b, _, hours, _ in edges:
+            self.adjacency[a].append((b, hours))
+            self.adjacency[b].append((a, hours))
+        self.sorting_centers = {state: i for i, (_, kind, _, state, *_) in enumerate(facilities)
+                                if kind == SORTING_CENTER}
+        self.customs_centers = [i for i, facility in enumerate(facilities) if facility[1] == CUSTOMS_CENTER]
+        # Local facility -> (its sorting center, hours to reach it)
+        self._access: Dict[int, Tuple[int, float]] = {}
+        for a, b, _, hours, _ in edges:
+            for local, center in ((a, b), (b, a)):
+                if facilities[local][1] == LOCAL_FACILITY and facilities[center][1] == SORTING_CENTER:
+                    self._access[local] = (center, hours)
+        self._endpoint_cum_weights = np.array(zipf_cum_weights(len(endpoints)))
+        self._endpoint_array = np.array(endpoints, dtype=np.int64)
+        self._trees: Dict[int, Tuple[List[float], List[int]]] = {}
+        self._core_routes: Dict[Tuple[str, str, bool], Route] = {}
+
+    @classmethod
+    def build(cls, pools: ValuePools, seed: Optional[int] = None,
+              locals_per_state: int = DEFAULT_LOCALS_PER_STATE) -> "FacilityNetwork":
+        """Lay out facilities for every state in ``pools`` and connect them."""
+        rng = random.Random(seed)
+        places_by_state: Dict[str, List[Tuple[str, str, str]]] = {}
+        for place in pools.places:
+            places_by_state.setdefault(place[1], []).append(place)
+        states = sorted(places_by_state)
+        facilities = []
+
+        def add(kind: str, state: str, near: Optional[Tuple[float, float]] = None) -> int:
+            places = places_by_state.get(state)
+            city, _, zip_code = rng.choice(places) if places else pools.draw_place(rng)
+            latitude, longitude = near or STATE_CENTROIDS.get(state, DEFAULT_CENTROID)
+            spread = PLACEMENT_SPREAD_DEGREES[kind]
+            latitude, longitude = latitude + rng.gauss(0, spread), longitude + rng.gauss(0, spread)
+            name = f"{pools.draw_company(rng)} {city} {kind}"
+            facilities.append((name, kind, city, state, zip_code, round(latitude, 6), round(longitude, 6)))
+            return len(facilities) - 1
+
+        centers = {state: add(SORTING_CENTER, state) for state in states}
+        local_facilities = {state: [add(LOCAL_FACILITY, state) for _ in range(locals_per_state)]
+                            for state in states}
+        hubs = [add(DISTRIBUTION_HUB, state) for state in HUB_STATES]
+        gateways = [add(INTERNATIONAL_GATEWAY, state) for state in GATEWAY_STATES]
+        customs = [add(CUSTOMS_CENTER, facilities[gateway][3], facilities[gateway][5:7])
+                   for gateway in gateways]
+
+        edges = []
+        linked = set()
+
+        def distance(a: int, b: int) -> float:
+            return great_circle_km(*facilities[a][5:7], *facilities[b][5:7])
+
+        def link(a: int, b: int, kind: str):
+            if a == b or (min(a, b), max(a, b)) in linked:
+                return
+            linked.add((min(a, b), max(a, b)))
+            km = distance(a, b)
+            hours, mode = leg_hours(km, kind)
+            edges.append((a, b, round(km, 3), round(hours, 4), mode))
+
+        def nearest(a: int, candidates: Sequence[int], count: int) -> List[int]:
+            return sorted((b for b in candidates if b != a), key=lambda b: distance(a, b))[:count]
+
+        for state, center in centers.items():
+            for local in local_facilities[state]:
+                link(local, center, "local")
+            for neighbour in nearest(center, list(centers.values()), REGIONAL_NEIGHBOURS):
+                link(center, neighbour, "regional")
+            for hub in nearest(center, hubs, HUB_LINKS):
+                link(center, hub, "linehaul")
+        for i, hub in enumerate(hubs):
+            for other in hubs[i + 1:]:
+                link(hub, other, "linehaul")
+        for gateway, customs_center in zip(gateways, customs):
+            link(gateway, customs_center, "local")
+            # Cleared shipments leave customs directly instead of through the gateway
+            for hub in nearest(gateway, hubs, HUB_LINKS):
+                link(gateway, hub, "linehaul")
+                link(customs_center, hub, "linehaul")
+
+        endpoints = [local for state in states for local in local_facilities[state]]
+        rng.shuffle(endpoints)
+        return cls(facilities, edges, endpoints)
+
+    @classmethod
+    def cached(cls, cache_dir: str, pools: ValuePools, seed: Optional[int] = None) -> "FacilityNetwork":
+        """Load the network for ``(pool size, seed)`` from ``cache_dir``, building and saving it on a miss."""
+        filepath = os.path.join(cache_dir, f"network-v{NETWORK_CACHE_VERSION}-{len(pools.places)}-{seed}.json")
+        if os.path.exists(filepath):
+            return cls.load(filepath)
+        network = cls.build(pools, seed)
+        network.save(filepath)
+        return network
+
+    def save(self, filepath: str):
+        """Save the facilities and edges as JSON, atomically replacing any existing file."""
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        tmp_path = f"{filepath}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                "version": NETWORK_CACHE_VERSION,
+                "facilities": self.facilities,
+                "edges": self.edges,
+                "endpoints": self.endpoints,
+            }, f)
+        os.replace(tmp_path, filepath)
+
+    @classmethod
+    def load(cls, filepath: str) -> "FacilityNetwork":
+        with open(filepath, 'r') as f:
+            data = json.load(f)
+        if data.get("version") != NETWORK_CACHE_VERSION:
+            raise ValueError(f"{filepath} was written by an incompatible version of this module")
+        return cls([tuple(facility) for facility in data["facilities"]],
+                   [tuple(edge) for edge in data["edges"]], data["endpoints"])
+
+    def __getstate__(self):
+        # Worker processes rebuild the route caches instead of receiving them
+        return {"facilities": self.facilities, "edges": self.edges, "endpoints": self.endpoints}
+
+    def __setstate__(self, state):
+        self.__init__(state["facilities"], state["edges"], state["endpoints"])
+
+    def __len__(self) -> int:
+        return len(self.facilities)
+
+    def _shortest_paths(self, source: int) -> Tuple[List[float], List[int]]:
+        """Dijkstra tree from ``source``: hours to every facility and each one's predecessor."""
+        tree = self._trees.get(source)
+        if tree is None:
+            hours = [math.inf] * len(self.facilities)
+            previous = [-1] * len(self.facilities)
+            hours[source] = 0.0
+            heap = [(0.0, source)]
+            while heap:
+                elapsed, node = heapq.heappop(heap)
+                if elapsed > hours[node]:
+                    continue
+                for neighbour, leg in self.adjacency[node]:
+                    candidate = elapsed + leg
+                    if candidate < hours[neighbour]:
+                        hours[neighbour] = candidate
+                        previous[neighbour] = node
+                        heapq.heappush(heap, (candidate, neighbour))
+            tree = self._trees[source] = (hours, previous)
+        return tree
+
+    def shortest_path(self, source: int, target: int) -> Route:
+        """Fastest path between two facilities, with cumulative hours along it."""
+        hours, previous = self._shortest_paths(source)
+        if math.isinf(hours[target]):
+            raise ValueError(f"No route from {self.facilities[source][0]} to {self.facilities[target][0]}")
+        path = [target]
+        while path[-1] != source:
+            path.append(previous[path[-1]])
+        path.reverse()
+        return tuple(path), tuple(hours[node] for node in path)
+
+    def core_route(self, origin_region: str, destination_region: str, international: bool = False) -> Route:
+        """Route between two states' sorting centers, cached per pair.
+
+        International routes clear customs at whichever customs center makes
+        the trip fastest.
+        """
+        key = (origin_region, destination_region, international)
+        route = self._core_routes.get(key)
+        if route is None:
+            origin = self.sorting_centers[origin_region]
+            destination = self.sorting_centers[destination_region]
+            if international and self.customs_centers:
+                via = min(self.customs_centers, key=lambda customs: (self._shortest_paths(origin)[0][customs]
+                                                                     + self._shortest_paths(customs)[0][destination]))
+                outbound, outbound_hours = self.shortest_path(origin, via)
+                inbound, inbound_hours = self.shortest_path(via, destination)
+                route = (outbound + inbound[1:],
+                         outbound_hours + tuple(outbound_hours[-1] + hours for hours in inbound_hours[1:]))
+            else:
+                route = self.shortest_path(origin, destination)
+            self._core_routes[key] = route
+        return route
+
+    def route(self, origin: int, destination: int, international: bool = False) -> Route:
+        """Route between two local facilities through their sorting centers."""
+        if origin == destination and not international:
+            return (origin,), (0.0,)
+        origin_center, first_leg = self._access[origin]
+        destination_center, last_leg = self._access[destination]
+        stops, hours = self.core_route(self.facilities[origin_center][3],
+                                       self.facilities[destination_center][3], international)
+        return ((origin,) + stops + (destination,),
+                (0.0,) + tuple(first_leg + value for value in hours) + (first_leg + hours[-1] + last_leg,))
+
+    def draw_endpoints(self, rng: np.random.Generator, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Draw origin and destination local facilities for ``count`` packages.
+
+        Shipping volume is Zipf-distributed over facilities, like the value pools.
+        """
+        total = self._endpoint_cum_weights[-1]
+        picks = np.searchsorted(self._endpoint_cum_weights, rng.random((2, count)) * total, side="right")
+        origins, destinations = self._endpoint_array[np.minimum(picks, len(self.endpoints) - 1)]
+        return origins, destinations
+
+    def place_events(self, origins: np.ndarray, destinations: np.ndarray, international: np.ndarray,
+                     offsets: np.ndarray, advances: np.ndarray, arrivals: np.ndarray
+                     ) -> Tuple[np.ndarray, np.ndarray]:
+        """Put every tracking event at a stop of its package's route.
+
+        ``offsets`` delimit each package's events, as returned by
+        ``StatusTransitionEngine.simulate``. ``advances`` marks events that
+        move a package onward (in transit) and ``arrivals`` those that
+        happen at the destination (out for delivery, delivered). Onward
+        events before the first arrival are spread evenly along the route,
+        so a package with enough of them scans at every stop. Later events
+        stay at the destination, and events between moves stay where the
+        package is.
+
+        Returns the facility of every event and the transit seconds spent
+        on the route before it, to add to the simulated elapsed times.
+        """
+        counts = np.diff(offsets)
+        flat_stops: List[int] = []
+        flat_hours: List[float] = []
+        lengths = np.empty(len(origins), dtype=np.int64)
+        for i, (origin, destination, abroad) in enumerate(zip(origins.tolist(), destinations.tolist(),
+                                                              international.tolist())):
+            stops, hours = self.route(origin, destination, abroad)
+            flat_stops.extend(stops)
+            flat_hours.extend(hours)
+            lengths[i] = len(stops)
+        route_starts = np.zeros(len(origins), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=route_starts[1:])
+
+        package = np.repeat(np.arange(len(origins)), counts)
+        starts = offsets[:-1]
+
+        def within_package(values: np.ndarray) -> np.ndarray:
+            # Cumulative sum restarted at every package
+            total = np.cumsum(values)
+            before = np.concatenate(([0], total))[starts]
+            return total - np.repeat(before, counts)
+
+        arrived = within_package(arrivals.astype(np.int64)) > 0
+        moves = within_package((advances & ~arrived).astype(np.int64))
+        planned = np.zeros(len(origins), dtype=np.int64)
+        nonempty = counts > 0
+        planned[nonempty] = moves[offsets[1:][nonempty] - 1]
+
+        last = (lengths - 1)[package]
+        position = np.where(arrived, last, np.ceil(moves * last / (planned[package] + 1)).astype(np.int64))
+        index = route_starts[package] + position
+        stops = np.array(flat_stops, dtype=np.int64)[index]
+        travel_seconds = np.array(flat_hours)[index] * 3600.0
+        return stops, travel_seconds
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the facility network and inspect routes.")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the value pools and the network")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                        help=f"distinct places in the value pools (default: {DEFAULT_POOL_SIZE})")
+    parser.add_argument("--pool-cache-dir", default=None, help="directory holding cached pools and networks")
+    parser.add_argument("--route", nargs=2, metavar=("ORIGIN_STATE", "DESTINATION_STATE"), default=None,
+                        help="print the route between two states")
+    parser.add_argument("--international", action="store_true", help="route --route through customs")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    from generate_logistics_data import make_faker
+
+    fake = make_faker(args.seed)
+    if args.pool_cache_dir:
+        pools = ValuePools.cached(args.pool_cache_dir, fake, args.pool_size, args.seed)
+        network = FacilityNetwork.cached(args.pool_cache_dir, pools, args.seed)
+    else:
+        network = FacilityNetwork.build(ValuePools.build(fake, args.pool_size), args.seed)
+    kinds: Dict[str, int] = {}
+    for facility in network.facilities:
+        kinds[facility[1]] = kinds.get(facility[1], 0) + 1
+    flights = sum(edge[4] == "air" for edge in network.edges)
+    print(f"{len(network)} facilities ({', '.join(f'{count} {kind}' for kind, count in kinds.items())}), "
+          f"{len(network.edges)} edges of which {flights} are flights")
+    if args.route:
+        stops, hours = network.core_route(*args.route, international=args.international)
+        for stop, elapsed in zip(stops, hours):
+            name, _, _, state, *_ = network.facilities[stop]
+            print(f"{elapsed:7.1f}h  {name} ({state})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import json
+import os
+import random
+from itertools import accumulate
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from faker import Faker
+
+# Number of distinct (city, state, zip) places in a default pool. Company and
+# operator pools are derived from it.
+DEFAULT_POOL_SIZE = 5000
+
+# Zipf exponent for pool weights: a few places and companies show up often,
+# most appear rarely, which is closer to real shipping volume than uniform draws.
+ZIPF_EXPONENT = 0.8
+
+POOL_CACHE_VERSION = 1
+
+
+def zipf_cum_weights(size: int, exponent: float = ZIPF_EXPONENT) -> List[float]:
+    """Cumulative Zipf weights for ``size`` ranked values."""
+    return list(accumulate(1.0 / (rank ** exponent) for rank in range(1, size + 1)))
+
+
+class ValuePools:
+    """Pre-generated, weighted pools of Faker values for the generation hot path.
+
+    Faker is only used while building the pools. Afterwards every draw is a
+    weighted index into a list, driven by the caller's ``random.Random`` so
+    seeded runs stay reproducible.
+    """
+
+    def __init__(self, places: List[Tuple[str, str, str]], companies: List[str], operator_ids: List[str]):
+        self.places = places
+        self.companies = companies
+        self.operator_ids = operator_ids
+        self._place_weights = zipf_cum_weights(len(places))
+        self._company_weights = zipf_cum_weights(len(companies))
+
+    @classmethod
+    def build(cls, fake: "Faker", size: int = DEFAULT_POOL_SIZE) -> "ValuePools":
+        """Build pools of ``size`` places, ``size // 4`` companies and ``size // 2`` operators."""
+        # City, state and zip are drawn together so a city keeps its state
+        places = [(fake.city(), fake.state(), fake.zipcode()) for _ in range(size)]
+        companies = [fake.company() for _ in range(max(1, size // 4))]
+        operator_ids = [f"OP{fake.random_number(digits=6)}" for _ in range(max(1, size // 2))]
+        return cls(places, companies, operator_ids)
+
+    @classmethod
+    def cached(cls, cache_dir: str, fake: "Faker", size: int = DEFAULT_POOL_SIZE,
+               seed: Optional[int] = None) -> "ValuePools":
+        """Load pools for ``(size, seed)`` from ``cache_dir``, building and saving them on a miss."""
+        filepath = os.path.join(cache_dir, f"pools-v{POOL_CACHE_VERSION}-{size}-{seed}.json")
+        if os.path.exists(filepath):
+            return cls.load(filepath)
+        pools = cls.build(fake, size)
+        pools.save(filepath)
+        return pools
+
+    def save(self, filepath: str):
+        """Save the pools as JSON, atomically replacing any existing file."""
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        tmp_path = f"{filepath}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                "version": POOL_CACHE_VERSION,
+                "places": self.places,
+                "companies": self.companies,
+                "operator_ids": self.operator_ids,
+            }, f)
+        os.replace(tmp_path, filepath)
+
+    @classmethod
+    def load(cls, filepath: str) -> "ValuePools":
+        with open(filepath, 'r') as f:
+            data = json.load(f)
+        return cls([tuple(place) for place in data["places"]], data["companies"], data["operator_ids"])
+
+    def draw_place(self, rng: random.Random) -> Tuple[str, str, str]:
+        """Draw a weighted (city, state, zip_code) place."""
+        return rng.choices(self.places, cum_weights=self._place_weights)[0]
+
+    def draw_company(self, rng: random.Random) -> str:
+        """Draw a weighted company name."""
+        return rng.choices(self.companies, cum_weights=self._company_weights)[0]
+
+    def draw_operator_id(self, rng: random.Random) -> str:
+        """Draw an operator ID uniformly."""
+        return self.operator_ids[int(rng.random() * len(self.operator_ids))]
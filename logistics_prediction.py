@@ -0,0 +1,297 @@
+import argparse
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from logistics_metrics import metrics
+
+NUMERIC_FEATURES = ["weight_kg", "length_cm", "width_cm", "height_cm", "volume_cm3", "insurance_value",
+                    "special_handling", "signature_required"]
+CATEGORICAL_FEATURES = ["carrier", "package_type", "origin_state", "destination_state"]
+FEATURES = NUMERIC_FEATURES + CATEGORICAL_FEATURES
+TARGET = "current_status"
+
+MODEL_VERSION = 1
+DEFAULT_MODEL_FILE = "delivery_model.joblib"
+DEFAULT_BATCH_SIZE = 1_000_000
+# Early stopping holds out a stratified split of this fraction of the rows
+VALIDATION_FRACTION = 0.1
+# Rows of each status kept from earlier chunks, fitted again with a chunk that lacks that status
+CARRIED_ROWS_PER_CLASS = 10
+
+
+def _can_stop_early(labels: np.ndarray) -> bool:
+    """Whether a stratified validation split of ``labels`` is possible."""
+    _, counts = np.unique(labels, return_counts=True)
+    return len(counts) > 0 and counts.min() >= 2 and int(len(labels) * VALIDATION_FRACTION) >= len(counts)
+
+
+def merge_short_chunks(chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Yield ``chunks``, appending any chunk shorter than half the first one to the chunk before it.
+
+    The tail of a chunked CSV read is usually short; fitting boosting
+    rounds on a handful of rows would only overfit them.
+    """
+    previous = None
+    min_rows = 0
+    for chunk in chunks:
+        if previous is None:
+            previous, min_rows = chunk, len(chunk) // 2
+        elif len(chunk) < min_rows:
+            previous = pd.concat([previous, chunk])
+        else:
+            yield previous
+            previous = chunk
+    if previous is not None:
+        yield previous
+
+
+class DeliveryStatusModel:
+    """Histogram gradient boosting classifier for package status.
+
+    Categorical columns are encoded as stable integer codes and handled
+    natively by the learner, so no one-hot expansion is needed. Training
+    takes one frame, optionally subsampled, or a sequence of chunks:
+    each chunk adds ``iterations_per_chunk`` boosting rounds fitted on
+    that chunk (``warm_start``), so memory is bounded by the chunk size.
+    Single-frame fits stop early once a 10% validation split stops
+    improving, which keeps the ensemble, and so prediction cost, small.
+    Model and encoders are saved together with joblib.
+    """
+
+    def __init__(self, max_iter: int = 200, learning_rate: float = 0.1, max_leaf_nodes: int = 31,
+                 random_state: Optional[int] = 42):
+        self.max_iter = max_iter
+        self.learning_rate = learning_rate
+        self.max_leaf_nodes = max_leaf_nodes
+        self.random_state = random_state
+        self.model = None
+        # Category lists only grow, so codes stay valid for earlier trees
+        self.categories: Dict[str, List[str]] = {column: [] for column in CATEGORICAL_FEATURES}
+        self.classes_: Optional[np.ndarray] = None
+        self.last_fit_stats: Dict = {}
+        self.last_predict_stats: Dict = {}
+
+    def _learner(self, max_iter: int, warm_start: bool = False, early_stopping: bool = True):
+        from sklearn.ensemble import HistGradientBoostingClassifier
+
+        categorical = [column in CATEGORICAL_FEATURES for column in FEATURES]
+        return HistGradientBoostingClassifier(max_iter=max_iter, learning_rate=self.learning_rate,
+                                              max_leaf_nodes=self.max_leaf_nodes,
+                                              categorical_features=categorical, early_stopping=early_stopping,
+                                              validation_fraction=VALIDATION_FRACTION, n_iter_no_change=10,
+                                              warm_start=warm_start, random_state=self.random_state)
+
+    def encode(self, frame: pd.DataFrame, learn: bool = False) -> np.ndarray:
+        """Return the float32 feature matrix; unseen categories become missing values."""
+        X = np.empty((len(frame), len(FEATURES)), dtype=np.float32)
+        for i, column in enumerate(NUMERIC_FEATURES):
+            X[:, i] = frame[column].to_numpy(dtype=np.float32, na_value=np.nan)
+        for i, column in enumerate(CATEGORICAL_FEATURES, start=len(NUMERIC_FEATURES)):
+            values = frame[column].astype(str)
+            known = self.categories[column]
+            if learn:
+                known.extend(sorted(set(values.unique()) - set(known)))
+            codes = pd.Categorical(values, categories=known).codes.astype(np.float32)
+            codes[codes < 0] = np.nan
+            X[:, i] = codes
+        return X
+
+    def _labels(self, frame: pd.DataFrame) -> np.ndarray:
+        return frame[TARGET].astype(str).to_numpy()
+
+    @staticmethod
+    def _subsample(frame: pd.DataFrame, sample_size: Optional[int], random_state: Optional[int]) -> pd.DataFrame:
+        if sample_size is None or sample_size >= len(frame):
+            return frame
+        return frame.sample(n=sample_size, random_state=random_state)
+
+    def fit(self, frame: pd.DataFrame, sample_size: Optional[int] = None) -> "DeliveryStatusModel":
+        """Fit on ``frame``, or on a random ``sample_size`` rows of it."""
+        frame = self._subsample(frame, sample_size, self.random_state)
+        start = time.perf_counter()
+        with metrics.stage("model_fit", track_memory=True):
+            X = self.encode(frame, learn=True)
+            y = self._labels(frame)
+            self.model = self._learner(self.max_iter, early_stopping=_can_stop_early(y)).fit(X, y)
+        self.classes_ = self.model.classes_
+        self._record_fit(len(frame), time.perf_counter() - start)
+        return self
+
+    def fit_chunks(self, chunks: Iterable[pd.DataFrame], iterations_per_chunk: int = 50,
+                   sample_size: Optional[int] = None) -> "DeliveryStatusModel":
+        """Fit incrementally, adding ``iterations_per_chunk`` rounds per chunk.
+
+        A chunk shorter than half the first one is merged into the chunk
+        before it. Early stopping is off, since a chunk's rare statuses may
+        be too few to split off a stratified validation set.
+
+        The class set is fixed by the first chunk. Later rows with other
+        statuses are dropped and counted in ``last_fit_stats["dropped_rows"]``.
+        A chunk that lacks some status is fitted together with the last
+        ``CARRIED_ROWS_PER_CLASS`` rows of that status from earlier chunks.
+        """
+        rows = 0
+        dropped = 0
+        carried: Dict[str, np.ndarray] = {}
+        start = time.perf_counter()
+        for chunk in merge_short_chunks(chunks):
+            chunk = self._subsample(chunk, sample_size, self.random_state)
+            if self.model is not None:
+                known = chunk[TARGET].astype(str).isin(self.classes_)
+                dropped += int((~known).sum())
+                chunk = chunk[known]
+            if chunk.empty:
+                continue
+            with metrics.stage("model_fit", track_memory=True):
+                X = self.encode(chunk, learn=True)
+                y = self._labels(chunk)
+                if self.model is None:
+                    self.model = self._learner(iterations_per_chunk, warm_start=True, early_stopping=False)
+                    X_fit, y_fit = X, y
+                else:
+                    self.model.set_params(max_iter=self.model.n_iter_ + iterations_per_chunk)
+                    missing = [label for label in self.classes_ if label not in set(y)]
+                    X_fit = np.vstack([X] + [carried[label] for label in missing])
+                    y_fit = np.concatenate([y] + [np.full(len(carried[label]), label, dtype=object)
+                                                  for label in missing])
+                self.model.fit(X_fit, y_fit)
+            self.classes_ = self.model.classes_
+            for label in np.unique(y):
+                carried[label] = X[y == label][-CARRIED_ROWS_PER_CLASS:]
+            rows += len(chunk)
+        self._record_fit(rows, time.perf_counter() - start)
+        self.last_fit_stats["dropped_rows"] = dropped
+        return self
+
+    def _record_fit(self, rows: int, seconds: float):
+        self.last_fit_stats = {"rows": rows, "seconds": seconds,
+                               "rows_per_second": rows / seconds if seconds > 0 else 0.0}
+        metrics.incr("training_rows", rows)
+
+    def predict_proba(self, frame: pd.DataFrame, batch_size: int = DEFAULT_BATCH_SIZE) -> np.ndarray:
+        """Class probabilities, columns ordered as ``classes_``, scored in batches."""
+        self._check_fitted()
+        start = time.perf_counter()
+        with metrics.stage("model_prediction"):
+            parts = [self.model.predict_proba(self.encode(frame.iloc[i:i + batch_size]))
+                     for i in range(0, len(frame), batch_size)]
+        probabilities = np.vstack(parts) if parts else np.empty((0, len(self.classes_)))
+        self._record_predict(len(frame), time.perf_counter() - start)
+        return probabilities
+
+    def predict(self, frame: pd.DataFrame, batch_size: int = DEFAULT_BATCH_SIZE) -> np.ndarray:
+        """Most likely status of every row."""
+        probabilities = self.predict_proba(frame, batch_size)
+        return self.classes_[probabilities.argmax(axis=1)]
+
+    def _record_predict(self, rows: int, seconds: float):
+        self.last_predict_stats = {"rows": rows, "seconds": seconds,
+                                   "rows_per_second": rows / seconds if seconds > 0 else 0.0}
+        metrics.incr("predicted_rows", rows)
+
+    def score(self, frame: pd.DataFrame) -> float:
+        """Accuracy on ``frame``."""
+        return float((self.predict(frame) == self._labels(frame)).mean())
+
+    def _check_fitted(self):
+        if self.model is None:
+            raise ValueError("The model is not trained; call fit, fit_chunks or load first")
+
+    def save(self, path: str):
+        import joblib
+
+        self._check_fitted()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        joblib.dump({
+            "version": MODEL_VERSION,
+            "params": {"max_iter": self.max_iter, "learning_rate": self.learning_rate,
+                       "max_leaf_nodes": self.max_leaf_nodes, "random_state": self.random_state},
+            "model": self.model,
+            "categories": self.categories,
+            "classes": self.classes_,
+        }, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DeliveryStatusModel":
+        import joblib
+
+        state = joblib.load(path)
+        if state.get("version") != MODEL_VERSION:
+            raise ValueError(f"{path} was saved by an incompatible version of this module")
+        model = cls(**state["params"])
+        model.model = state["model"]
+        model.categories = state["categories"]
+        model.classes_ = state["classes"]
+        return model
+
+
+def _read_frames(csv_file: str, chunk_size: Optional[int]):
+    from logistics_analyzer import CSV_DTYPES
+
+    columns = FEATURES + [TARGET]
+    dtypes = {column: CSV_DTYPES[column] for column in columns}
+    return pd.read_csv(csv_file, usecols=columns, dtype=dtypes, chunksize=chunk_size)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Train and apply the delivery status model.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    train = subparsers.add_parser("train", help="train a model and save it")
+    train.add_argument("--csv", default=os.path.join("data", "logistics_data.csv"), help="training CSV")
+    train.add_argument("--model", default=os.path.join("data", DEFAULT_MODEL_FILE), help="where to save the model")
+    train.add_argument("--sample-size", type=int, default=None,
+                       help="train on a random sample of this many rows (per chunk with --chunk-size)")
+    train.add_argument("--chunk-size", type=int, default=None,
+                       help="train incrementally on CSV chunks of this many rows")
+    train.add_argument("--iterations-per-chunk", type=int, default=50, help="boosting rounds added per chunk")
+    train.add_argument("--max-iter", type=int, default=200, help="boosting rounds without --chunk-size")
+
+    predict = subparsers.add_parser("predict", help="score a CSV with a saved model")
+    predict.add_argument("--csv", default=os.path.join("data", "logistics_data.csv"), help="CSV to score")
+    predict.add_argument("--model", default=os.path.join("data", DEFAULT_MODEL_FILE), help="saved model")
+    predict.add_argument("--output", default=os.path.join("data", "predictions.csv"),
+                         help="CSV of tracking numbers and predicted statuses")
+    predict.add_argument("--chunk-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows scored per batch")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if args.command == "train":
+        model = DeliveryStatusModel(max_iter=args.max_iter)
+        if args.chunk_size:
+            model.fit_chunks(_read_frames(args.csv, args.chunk_size), args.iterations_per_chunk, args.sample_size)
+        else:
+            model.fit(_read_frames(args.csv, None), sample_size=args.sample_size)
+        model.save(args.model)
+        stats = model.last_fit_stats
+        print(f"Trained on {stats['rows']} rows in {stats['seconds']:.2f}s "
+              f"({stats['rows_per_second']:.0f} rows/s); saved to {args.model}")
+        return
+
+    from logistics_analyzer import CSV_DTYPES
+
+    model = DeliveryStatusModel.load(args.model)
+    rows = 0
+    seconds = 0.0
+    columns = ["tracking_number"] + FEATURES
+    dtypes = {column: CSV_DTYPES[column] for column in columns}
+    with open(args.output, 'w', newline='') as f:
+        f.write("tracking_number,predicted_status\n")
+        for chunk in pd.read_csv(args.csv, usecols=columns, dtype=dtypes, chunksize=args.chunk_size):
+            predicted = model.predict(chunk, batch_size=args.chunk_size)
+            pd.DataFrame({"tracking_number": chunk["tracking_number"], "predicted_status": predicted}).to_csv(
+                f, header=False, index=False)
+            rows += model.last_predict_stats["rows"]
+            seconds += model.last_predict_stats["seconds"]
+    print(f"Scored {rows} rows in {seconds:.2f}s ({rows / seconds if seconds else 0:.0f} rows/s); "
+          f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Grouping dimensions of the cube; "lane" is derived from the two states
+DIMENSIONS = ["carrier", "origin_state", "destination_state", "package_type", "day"]
+SOURCE_COLUMNS = ["carrier", "origin_state", "destination_state", "package_type", "current_status",
+                  "estimated_delivery", "actual_delivery"]
+LANE_SEPARATOR = " -> "
+STATUS_PREFIX = "status:"
+# Additive measures are summed when cells merge; the delay extremes are not
+SUM_MEASURES = ["packages", "delivered", "on_time", "delay_sum_hours", "delay_sq_sum_hours"]
+MIN_MAX_MEASURES = {"delay_min_hours": "min", "delay_max_hours": "max"}
+
+ROLLUP_VERSION = 1
+MANIFEST_KEY = b"logistics_rollup_manifest"
+# Appended CSV bytes are parsed in blocks of about this size
+READ_BLOCK_SIZE = 64 << 20
+PREFIX_HASH_BYTES = 1 << 20
+
+
+def _prefix_hash(path: str, length: int) -> str:
+    """Hash of the first ``min(length, 1 MiB)`` bytes, to detect rewritten sources."""
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(min(length, PREFIX_HASH_BYTES)), digest_size=16).hexdigest()
+
+
+def rollup_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate raw package rows into cube cells.
+
+    ``day`` is the date of ``estimated_delivery``, i.e. the day the package
+    is due. Delay measures cover delivered packages only.
+    """
+    from logistics_analyzer import DATE_FORMAT
+
+    estimated = frame["estimated_delivery"]
+    actual = frame["actual_delivery"]
+    if not pd.api.types.is_datetime64_any_dtype(estimated):
+        estimated = pd.to_datetime(estimated, format=DATE_FORMAT)
+    if not pd.api.types.is_datetime64_any_dtype(actual):
+        actual = pd.to_datetime(actual, format=DATE_FORMAT)
+
+    status = frame["current_status"].astype(str)
+    delivered = (status == "Delivered").to_numpy()
+    delay = np.where(delivered, (actual - estimated).dt.total_seconds().to_numpy() / 3600, np.nan)
+    cells = pd.DataFrame({
+        "carrier": frame["carrier"].astype(str).to_numpy(),
+        "origin_state": frame["origin_state"].astype(str).to_numpy(),
+        "destination_state": frame["destination_state"].astype(str).to_numpy(),
+        "package_type": frame["package_type"].astype(str).to_numpy(),
+        "day": estimated.dt.normalize().to_numpy(),
+        "packages": 1,
+        "delivered": delivered.astype(np.int64),
+        "on_time": (delay <= 0).astype(np.int64),
+        "delay_sum_hours": np.nan_to_num(delay),
+        "delay_sq_sum_hours": np.nan_to_num(delay * delay),
+        "delay_min_hours": delay,
+        "delay_max_hours": delay,
+    })
+    statuses = pd.get_dummies(status, prefix=STATUS_PREFIX.rstrip(":"), prefix_sep=":", dtype=np.int64)
+    cells = pd.concat([cells, statuses.set_axis(cells.index)], axis=1)
+    return _regroup(cells)
+
+
+def _regroup(cells: pd.DataFrame) -> pd.DataFrame:
+    """Combine rows that share the same dimension values."""
+    status_columns = [column for column in cells.columns if column.startswith(STATUS_PREFIX)]
+    cells[status_columns] = cells[status_columns].fillna(0).astype(np.int64)
+    aggregations = {column: "sum" for column in SUM_MEASURES + status_columns}
+    aggregations.update(MIN_MAX_MEASURES)
+    grouped = cells.groupby(DIMENSIONS, sort=False, observed=True, dropna=False).agg(aggregations).reset_index()
+    for column in DIMENSIONS[:-1]:
+        grouped[column] = grouped[column].astype("category")
+    return grouped
+
+
+def _iter_csv_blocks(path: str, start: int, end: int, columns: List[str]) -> Iterator[Tuple[pd.DataFrame, int]]:
+    """Parse complete CSV lines between byte offsets ``start`` and ``end``.
+
+    Yields ``(frame, offset)`` where ``offset`` follows the last parsed line;
+    a trailing line without a newline is left for a later refresh.
+    """
+    from logistics_analyzer import CSV_DTYPES
+
+    dtypes = {column: CSV_DTYPES[column] for column in SOURCE_COLUMNS if column in CSV_DTYPES}
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remainder = b""
+        while start < end:
+            data = remainder + f.read(min(READ_BLOCK_SIZE, end - start))
+            consumed = start - len(remainder)
+            start += len(data) - len(remainder)
+            cut = data.rfind(b"\n") + 1
+            block, remainder = data[:cut], data[cut:]
+            if block:
+                frame = pd.read_csv(io.BytesIO(block), header=None, names=columns, usecols=SOURCE_COLUMNS,
+                                    dtype=dtypes)
+                yield frame, consumed + cut
+
+
+class RollupCube:
+    """Precomputed delivery aggregates by carrier, lane, package type and day.
+
+    Each cell holds package and delivery counts, on-time counts, status
+    counts and delay sums, so any grouping over a subset of the dimensions
+    is answered by summing cells instead of rescanning package rows. The
+    cube remembers how many bytes of each source CSV it has consumed:
+    ``refresh`` folds in only rows appended since, and rebuilds from
+    scratch if a source was rewritten. Cube and manifest live in a single
+    Parquet file that is replaced atomically.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.cells = pd.DataFrame(columns=DIMENSIONS + SUM_MEASURES + list(MIN_MAX_MEASURES))
+        self.sources: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(self.path)
+        manifest = json.loads(table.schema.metadata[MANIFEST_KEY])
+        if manifest.get("version") != ROLLUP_VERSION:
+            return
+        self.sources = manifest["sources"]
+        self.cells = table.to_pandas()
+
+    def save(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(self.cells, preserve_index=False)
+        manifest = json.dumps({"version": ROLLUP_VERSION, "sources": self.sources})
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), MANIFEST_KEY: manifest})
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, self.path)
+
+    def add_frame(self, frame: pd.DataFrame):
+        """Fold raw package rows (CSV-shaped) into the cube."""
+        self.add_cells(rollup_frame(frame))
+
+    def add_cells(self, cells: pd.DataFrame):
+        """Fold already aggregated cells, e.g. from another cube, into this one."""
+        if self.cells.empty:
+            self.cells = cells
+        else:
+            self.cells = _regroup(pd.concat([self.cells, cells], ignore_index=True))
+
+    def refresh(self, paths: Sequence[str], show_progress: bool = True) -> int:
+        """Consume new rows of the CSV sources; return the number of rows added."""
+        paths = [os.path.abspath(path) for path in paths]
+        plan = {}
+        rebuild = False
+        for path in paths:
+            size = os.path.getsize(path)
+            recorded = self.sources.get(path)
+            if recorded is None:
+                plan[path] = 0
+            elif size < recorded["offset"] or _prefix_hash(path, recorded["offset"]) != recorded["prefix_hash"]:
+                rebuild = True
+            elif size > recorded["offset"]:
+                plan[path] = recorded["offset"]
+        if rebuild:
+            # Rows of a rewritten file cannot be subtracted, so start over
+            known = [path for path in self.sources if os.path.exists(path) and path not in paths]
+            if show_progress:
+                print("A source was rewritten; rebuilding the rollup from scratch...")
+            self.cells = self.cells.iloc[0:0]
+            self.sources = {}
+            plan = {path: 0 for path in known + paths}
+
+        added = 0
+        for path, start in plan.items():
+            with open(path, 'r', newline='') as f:
+                header_line = f.readline()
+            columns = next(csv.reader([header_line]))
+            end = os.path.getsize(path)
+            start = max(start, len(header_line.encode()))
+            consumed = start
+            for block, consumed in _iter_csv_blocks(path, start, end, columns):
+                self.add_frame(block)
+                added += len(block)
+            self.sources[path] = {"offset": consumed, "prefix_hash": _prefix_hash(path, consumed)}
+            if show_progress:
+                print(f"Rolled up {path} up to byte {consumed}")
+        return added
+
+    def query(self, by: Sequence[str] = (), where: Optional[Dict] = None, freq: Optional[str] = None) -> pd.DataFrame:
+        """Summarize cells grouped by ``by`` after filtering with ``where``.
+
+        ``by`` may name any dimension or ``"lane"``. ``where`` maps a
+        dimension (or ``"lane"``, as ``"Origin -> Destination"``) to a value,
+        a list of values, or for ``day`` a ``(start, end)`` inclusive range.
+        ``freq`` resamples ``day`` when grouping by it, e.g. ``"W"``.
+
+        Returns packages, deliveries, on-time rate, delay mean, std and
+        extremes, and the share of each status in percent.
+        """
+        cells = self.cells
+        if where:
+            mask = np.ones(len(cells), dtype=bool)
+            for dimension, value in where.items():
+                if dimension == "lane":
+                    values = [value] if isinstance(value, str) else value
+                    pairs = [lane.split(LANE_SEPARATOR) for lane in values]
+                    lane_mask = np.zeros(len(cells), dtype=bool)
+                    for origin, destination in pairs:
+                        lane_mask |= ((cells["origin_state"] == origin)
+                                      & (cells["destination_state"] == destination)).to_numpy()
+                    mask &= lane_mask
+                elif dimension == "day" and isinstance(value, tuple):
+                    start, end = pd.Timestamp(value[0]), pd.Timestamp(value[1])
+                    mask &= ((cells["day"] >= start) & (cells["day"] <= end)).to_numpy()
+                elif isinstance(value, (list, set)):
+                    mask &= cells[dimension].isin(list(value)).to_numpy()
+                else:
+                    if dimension == "day":
+                        value = pd.Timestamp(value)
+                    mask &= (cells[dimension] == value).to_numpy()
+            cells = cells[mask]
+
+        keys = []
+        for dimension in by:
+            if dimension == "lane":
+                cells = cells.assign(lane=cells["origin_state"].astype(str) + LANE_SEPARATOR
+                                     + cells["destination_state"].astype(str))
+            elif dimension == "day" and freq:
+                cells = cells.assign(day=cells["day"].dt.to_period(freq).dt.start_time)
+            keys.append(dimension)
+
+        status_columns = [column for column in cells.columns if column.startswith(STATUS_PREFIX)]
+        aggregations = {column: "sum" for column in SUM_MEASURES + status_columns}
+        aggregations.update(MIN_MAX_MEASURES)
+        if keys:
+            totals = cells.groupby(keys, observed=True).agg(aggregations)
+        else:
+            totals = cells.agg(aggregations).to_frame().T
+        return _derive_metrics(totals, status_columns)
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+
+def _derive_metrics(totals: pd.DataFrame, status_columns: List[str]) -> pd.DataFrame:
+    delivered = totals["delivered"].astype(float).where(totals["delivered"] > 0)
+    mean = totals["delay_sum_hours"] / delivered
+    variance = (totals["delay_sq_sum_hours"] - delivered * mean * mean) / (delivered - 1)
+    result = pd.DataFrame({
+        "packages": totals["packages"].astype(np.int64),
+        "delivered": totals["delivered"].astype(np.int64),
+        "on_time_delivery_percentage": totals["on_time"] / delivered * 100,
+        "avg_delay_hours": mean,
+        "std_delay_hours": np.sqrt(variance.clip(lower=0)),
+        "min_delay_hours": totals["delay_min_hours"],
+        "max_delay_hours": totals["delay_max_hours"],
+    }, index=totals.index)
+    for column in status_columns:
+        result[f"{column[len(STATUS_PREFIX):]} %"] = totals[column] / totals["packages"] * 100
+    return result
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build and query delivery rollups by carrier, lane, type and day.")
+    parser.add_argument("--cube", default=os.path.join("data", "rollup.parquet"),
+                        help="rollup file (default: data/rollup.parquet)")
+    parser.add_argument("--refresh", nargs="*", default=[], metavar="CSV",
+                        help="CSV files whose new rows are folded into the cube first")
+    parser.add_argument("--by", nargs="*", default=["carrier"],
+                        help=f"dimensions to group by: {', '.join(DIMENSIONS)} or lane (default: carrier)")
+    parser.add_argument("--where", nargs="*", default=[], metavar="DIM=VALUE",
+                        help="filters; separate several values with commas, a day range with '..'")
+    parser.add_argument("--freq", default=None, help="resample days when grouping by day, e.g. W or M")
+    return parser.parse_args(argv)
+
+
+def _parse_filters(filters: List[str]) -> Dict:
+    where = {}
+    for item in filters:
+        dimension, _, value = item.partition("=")
+        if dimension == "day" and ".." in value:
+            where[dimension] = tuple(value.split("..", 1))
+        elif "," in value:
+            where[dimension] = value.split(",")
+        else:
+            where[dimension] = value
+    return where
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    cube = RollupCube(args.cube)
+    if args.refresh:
+        added = cube.refresh(args.refresh)
+        cube.save()
+        print(f"Added {added} rows; the cube has {len(cube)} cells")
+    with pd.option_context("display.max_rows", 100, "display.max_columns", None, "display.width", 250):
+        print(cube.query(by=args.by, where=_parse_filters(args.where), freq=args.freq))
+
+
+if __name__ == "__main__":
+    main()
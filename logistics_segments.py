@@ -0,0 +1,224 @@
+import json
+import os
+import shutil
+from datetime import datetime
+from itertools import islice
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from generate_logistics_data import (DEFAULT_SHARD_SIZE, OUTPUT_WRITERS, SmartLogisticsTrackingModel,
+                                     iter_package_data_sharded)
+from logistics_metrics import metrics
+from logistics_pools import DEFAULT_POOL_SIZE
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+DEFAULT_SEGMENT_SIZE = 100000
+DEFAULT_DATASET_DIR = os.path.join("data", "logistics_dataset")
+
+
+def segment_name(segment_id: int) -> str:
+    return f"segment-{segment_id:06d}"
+
+
+def load_manifest(dataset_dir: str) -> Optional[Dict]:
+    path = os.path.join(dataset_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"{path} was written by an incompatible version of this module")
+    return manifest
+
+
+def save_manifest(dataset_dir: str, manifest: Dict):
+    """Write the manifest atomically; this is the checkpoint."""
+    path = os.path.join(dataset_dir, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def segment_paths(dataset_dir: str, fmt: str) -> List[str]:
+    """Paths of one format's files in every completed segment, in order."""
+    manifest = load_manifest(dataset_dir) or {"segments": []}
+    return [os.path.join(dataset_dir, segment["name"], segment["files"][fmt])
+            for segment in manifest["segments"] if fmt in segment["files"]]
+
+
+class SegmentedGenerator:
+    """Generate a dataset as a series of checkpointed segments.
+
+    Each segment is a directory holding the usual output files for a fixed
+    number of shards. It is written under a temporary name and renamed
+    once complete. ``manifest.json`` is then replaced atomically, and that
+    replacement is the checkpoint.
+
+    Shard ``i`` of a seed always gets the same RNG seed, so the manifest
+    does not need to snapshot generator state. It records the resolved
+    master seed, reference time and pool size, and the next shard to
+    generate. ``resume`` finishes an interrupted run from the last
+    completed segment and produces the files an uninterrupted run would
+    have. ``append`` starts a new run at the next shard, optionally
+    anchored at a later reference time, without touching existing
+    segments.
+    """
+
+    def __init__(self, dataset_dir: str = DEFAULT_DATASET_DIR):
+        self.dataset_dir = dataset_dir
+        self.manifest = load_manifest(dataset_dir)
+
+    def start(self, num_packages: int, formats: List[str], seed: Optional[int] = None,
+              shard_size: int = DEFAULT_SHARD_SIZE, segment_size: int = DEFAULT_SEGMENT_SIZE,
+              reference_time: Optional[datetime] = None, pool_size: int = DEFAULT_POOL_SIZE,
+              index: bool = False):
+        """Begin a new dataset; fails if the directory already holds one."""
+        if self.manifest is not None:
+            raise ValueError(f"{self.dataset_dir} already holds a dataset; "
+                             f"use append to add to it or resume to finish it")
+        if segment_size % shard_size:
+            raise ValueError(f"Segment size {segment_size} must be a multiple of the shard size {shard_size}")
+        if seed is None:
+            # Fix fresh entropy now so an unseeded run can still be resumed
+            seed = int(np.random.SeedSequence().entropy)
+        os.makedirs(self.dataset_dir, exist_ok=True)
+        self.manifest = {
+            "version": MANIFEST_VERSION,
+            "seed": seed,
+            "shard_size": shard_size,
+            "segment_size": segment_size,
+            "pool_size": pool_size,
+            "formats": formats,
+            "index": index,
+            "next_shard": 0,
+            "packages": 0,
+            "events": 0,
+            "segments": [],
+            "pending": None,
+        }
+        self._begin_run(num_packages, reference_time)
+
+    def append(self, num_packages: int, reference_time: Optional[datetime] = None):
+        """Queue ``num_packages`` more packages after the existing ones."""
+        if self.manifest is None:
+            raise ValueError(f"{self.dataset_dir} holds no dataset to append to")
+        if self.manifest["pending"]:
+            raise ValueError(f"{self.dataset_dir} has an unfinished run; resume it first")
+        self._begin_run(num_packages, reference_time)
+
+    def check_layout(self, formats: Optional[List[str]] = None, shard_size: Optional[int] = None,
+                     segment_size: Optional[int] = None, index: Optional[bool] = None):
+        """Raise ValueError if a given option differs from the dataset's; None means not given.
+
+        Segments of one dataset share one layout, so ``append`` and
+        ``resume`` cannot change it.
+        """
+        requested = {"formats": formats, "shard_size": shard_size, "segment_size": segment_size, "index": index}
+        for name, value in requested.items():
+            if value is not None and value != self.manifest[name]:
+                raise ValueError(f"{self.dataset_dir} was created with {name}={self.manifest[name]!r}; "
+                                 f"it cannot be changed to {value!r}")
+
+    def _begin_run(self, num_packages: int, reference_time: Optional[datetime]):
+        self.manifest["pending"] = {
+            "first_shard": self.manifest["next_shard"],
+            "packages": num_packages,
+            "completed_packages": 0,
+            "reference_time": (reference_time or datetime.now()).isoformat(),
+        }
+        save_manifest(self.dataset_dir, self.manifest)
+
+    def _discard_partial_segments(self):
+        """Remove segment directories the manifest does not know about.
+
+        They are left by a crash before or right after the rename, and are
+        regenerated identically.
+        """
+        known = {segment["name"] for segment in self.manifest["segments"]}
+        for name in os.listdir(self.dataset_dir):
+            path = os.path.join(self.dataset_dir, name)
+            if os.path.isdir(path) and name.lstrip(".").startswith("segment-") and name not in known:
+                shutil.rmtree(path)
+
+    def run(self, workers: int = 1, pool_cache_dir: Optional[str] = None) -> Dict:
+        """Generate the pending run's remaining segments; return the final manifest."""
+        manifest = self.manifest
+        pending = manifest and manifest["pending"]
+        if not pending:
+            raise ValueError(f"{self.dataset_dir} has nothing left to generate")
+        self._discard_partial_segments()
+
+        shard_size = manifest["shard_size"]
+        segment_size = manifest["segment_size"]
+        remaining = pending["packages"] - pending["completed_packages"]
+        if pending["completed_packages"]:
+            print(f"Resuming at shard {manifest['next_shard']}: "
+                  f"{pending['completed_packages']} of {pending['packages']} packages already saved")
+        packages = iter_package_data_sharded(
+            remaining,
+            seed=manifest["seed"],
+            workers=workers,
+            shard_size=shard_size,
+            reference_time=datetime.fromisoformat(pending["reference_time"]),
+            pool_size=manifest["pool_size"],
+            pool_cache_dir=pool_cache_dir,
+            first_shard=manifest["next_shard"],
+        )
+        outputs = {fmt: OUTPUT_WRITERS[fmt][1] for fmt in manifest["formats"]}
+        try:
+            while remaining > 0:
+                count = min(segment_size, remaining)
+                self._write_segment(islice(packages, count), count, outputs)
+                remaining -= count
+        finally:
+            # Shuts down the worker pool even when a segment fails
+            packages.close()
+
+        manifest["pending"] = None
+        save_manifest(self.dataset_dir, manifest)
+        return manifest
+
+    def _write_segment(self, packages, count: int, outputs: Dict[str, str]):
+        manifest = self.manifest
+        segment_id = len(manifest["segments"])
+        name = segment_name(segment_id)
+        tmp_dir = os.path.join(self.dataset_dir, f".{name}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        events = 0
+
+        def counted(stream):
+            nonlocal events
+            for package in stream:
+                events += len(package["tracking_history"])
+                yield package
+
+        model = SmartLogisticsTrackingModel(data_dir=tmp_dir)
+        written = model.save_packages(counted(packages), outputs, index=manifest["index"])
+        if written != count:
+            raise RuntimeError(f"Segment {name} received {written} packages, expected {count}")
+        os.replace(tmp_dir, os.path.join(self.dataset_dir, name))
+
+        shards = -(-count // manifest["shard_size"])
+        pending = manifest["pending"]
+        manifest["segments"].append({
+            "name": name,
+            "first_shard": manifest["next_shard"],
+            "shards": shards,
+            "packages": count,
+            "events": events,
+            "reference_time": pending["reference_time"],
+            "files": outputs,
+        })
+        manifest["next_shard"] += shards
+        manifest["packages"] += count
+        manifest["events"] += events
+        pending["completed_packages"] += count
+        save_manifest(self.dataset_dir, manifest)
+        metrics.incr("segments_written")
+        print(f"Checkpoint: {name} saved ({manifest['packages']} packages in {len(manifest['segments'])} segments)")
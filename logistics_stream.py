@@ -0,0 +1,320 @@
+import argparse
+import asyncio
+import heapq
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from itertools import islice
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlparse
+
+from generate_logistics_data import DEFAULT_SHARD_SIZE, RecordJsonEncoder, iter_package_data_sharded
+
+# Largest payload put in one UDP datagram; batches are split to fit
+MAX_DATAGRAM_SIZE = 60000
+
+# Sorted runs merged at once; more are first merged into larger runs so
+# the number of open files stays bounded
+MAX_MERGE_RUNS = 128
+# Items pickled together in a run file
+RUN_BLOCK_SIZE = 1024
+
+_encoder = RecordJsonEncoder()
+
+
+def iter_events_in_time_order(packages: Iterable[Dict], window: int = 10000,
+                              spill_dir: Optional[str] = None) -> Iterator[Dict]:
+    """Flatten packages into tracking events sorted by event time.
+
+    Packages span the whole simulated month in any order, so the events of
+    ``window`` packages are sorted in memory at a time. If the input is
+    larger than one window, each sorted run is spilled to a temporary file
+    under ``spill_dir`` and the runs are merged, so the whole feed is in
+    event-time order while memory holds one window. Each event carries its
+    package's tracking number and type. Event dicts are shallow:
+    ``location`` stays a ``Location``.
+    """
+    buffer = []
+    count = 0
+    with tempfile.TemporaryDirectory(prefix="logistics-stream-", dir=spill_dir) as tmp_dir:
+        runs: List[str] = []
+        for package in packages:
+            for event in package["tracking_history"]:
+                buffer.append((event.timestamp, package["tracking_number"], package["package_type"], event))
+            count += 1
+            if count % window == 0:
+                runs.append(_spill_run(sorted(buffer, key=itemgetter(0)), tmp_dir))
+                buffer = []
+        buffer.sort(key=itemgetter(0))
+        if runs:
+            if buffer:
+                runs.append(_spill_run(buffer, tmp_dir))
+            while len(runs) > MAX_MERGE_RUNS:
+                runs = [_spill_run(_merge_runs(runs[i:i + MAX_MERGE_RUNS]), tmp_dir)
+                        for i in range(0, len(runs), MAX_MERGE_RUNS)]
+            buffer = _merge_runs(runs)
+        for _, tracking_number, package_type, event in buffer:
+            yield {"tracking_number": tracking_number, "package_type": package_type, **event.to_dict()}
+
+
+def _spill_run(items: Iterable, directory: str) -> str:
+    """Pickle sorted items into a new run file, in blocks; return its path."""
+    fd, path = tempfile.mkstemp(suffix=".run", dir=directory)
+    items = iter(items)
+    with os.fdopen(fd, 'wb') as f:
+        while True:
+            block = list(islice(items, RUN_BLOCK_SIZE))
+            if not block:
+                break
+            pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _read_run(path: str) -> Iterator:
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                yield from pickle.load(f)
+            except EOFError:
+                break
+    os.remove(path)
+
+
+def _merge_runs(paths: List[str]) -> Iterator:
+    return heapq.merge(*(_read_run(path) for path in paths), key=itemgetter(0))
+
+
+class StdoutSink:
+    """Write NDJSON batches to standard output."""
+
+    async def open(self):
+        self._stream = sys.stdout.buffer
+
+    async def send(self, lines: List[bytes]):
+        self._stream.write(b"".join(lines))
+        self._stream.flush()
+
+    async def close(self):
+        self._stream.flush()
+
+
+class StreamSink:
+    """Write NDJSON batches to a TCP or Unix stream socket.
+
+    ``send`` awaits ``drain()``, so a slow consumer pauses the emitter
+    instead of growing the write buffer.
+    """
+
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None, path: Optional[str] = None):
+        self.host, self.port, self.path = host, port, path
+
+    async def open(self):
+        if self.path:
+            _, self._writer = await asyncio.open_unix_connection(self.path)
+        else:
+            _, self._writer = await asyncio.open_connection(self.host, self.port)
+
+    async def send(self, lines: List[bytes]):
+        self._writer.writelines(lines)
+        await self._writer.drain()
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+class UdpSink:
+    """Send NDJSON batches as UDP datagrams of at most MAX_DATAGRAM_SIZE bytes.
+
+    UDP has no flow control, so ``send`` yields to the loop whenever the
+    transport buffer exceeds ``high_water`` bytes.
+    """
+
+    def __init__(self, host: str, port: int, high_water: int = 1 << 20):
+        self.host, self.port, self.high_water = host, port, high_water
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            asyncio.DatagramProtocol, remote_addr=(self.host, self.port)
+        )
+
+    async def send(self, lines: List[bytes]):
+        datagram = []
+        size = 0
+        for line in lines:
+            if datagram and size + len(line) > MAX_DATAGRAM_SIZE:
+                self._transport.sendto(b"".join(datagram))
+                datagram, size = [], 0
+            datagram.append(line)
+            size += len(line)
+        if datagram:
+            self._transport.sendto(b"".join(datagram))
+        while self._transport.get_write_buffer_size() > self.high_water:
+            await asyncio.sleep(0.001)
+
+    async def close(self):
+        self._transport.close()
+
+
+def open_sink(url: str):
+    """Create a sink from ``stdout``, ``tcp://host:port``, ``udp://host:port`` or ``unix:///path``."""
+    if url in ("-", "stdout"):
+        return StdoutSink()
+    parsed = urlparse(url)
+    if parsed.scheme == "tcp":
+        return StreamSink(host=parsed.hostname, port=parsed.port)
+    if parsed.scheme == "udp":
+        return UdpSink(parsed.hostname, parsed.port)
+    if parsed.scheme == "unix":
+        return StreamSink(path=parsed.path)
+    raise ValueError(f"Unsupported sink URL: {url}")
+
+
+class EventEmitter:
+    """Emit tracking events to a sink at a target rate or replay speed.
+
+    With ``rate`` events are paced at that many events per second. With
+    ``speedup`` the gaps between event timestamps are replayed divided by
+    that factor. Without either, events are sent as fast as the sink accepts
+    them. Replay assumes events arrive in timestamp order, as
+    ``iter_events_in_time_order`` yields them. Events are encoded in a
+    producer thread and handed over through a bounded queue, so generation
+    never runs ahead of the sink by more than ``queue_size`` batches. If
+    producing events fails, ``run`` re-raises the error once the batches
+    sent before it are flushed, so a truncated feed never looks complete.
+    """
+
+    def __init__(self, sink, rate: Optional[float] = None, speedup: Optional[float] = None,
+                 batch_size: int = 500, queue_size: int = 64):
+        if rate is not None and speedup is not None:
+            raise ValueError("Use either rate or speedup, not both")
+        self.sink = sink
+        self.rate = rate
+        self.speedup = speedup
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.sent = 0
+        self.batches = 0
+        self.max_lag = 0.0
+        self._stopped = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def _produce(self, events: Iterable[Dict], queue: asyncio.Queue, loop: asyncio.AbstractEventLoop):
+        """Encode events into (event_time_offset, lines) batches from a worker thread."""
+        first_time = None
+        lines = []
+        batch_offset = 0.0
+        try:
+            for event in events:
+                if self._stopped.is_set():
+                    return
+                if self.speedup and not lines:
+                    event_time = datetime.strptime(event["timestamp"], "%Y-%m-%d %H:%M:%S").timestamp()
+                    first_time = event_time if first_time is None else first_time
+                    batch_offset = event_time - first_time
+                lines.append(_encoder.encode(event).encode() + b"\n")
+                if len(lines) >= self.batch_size:
+                    asyncio.run_coroutine_threadsafe(queue.put((batch_offset, lines)), loop).result()
+                    lines = []
+            if lines:
+                asyncio.run_coroutine_threadsafe(queue.put((batch_offset, lines)), loop).result()
+        except Exception as exc:
+            self._error = exc
+        finally:
+            asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()
+
+    async def run(self, events: Iterable[Dict]) -> Dict:
+        """Send all events and return throughput statistics."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        producer = threading.Thread(target=self._produce, args=(events, queue, loop), daemon=True)
+
+        await self.sink.open()
+        producer.start()
+        start = time.perf_counter()
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                batch_offset, lines = item
+                if self.rate:
+                    due = start + self.sent / self.rate
+                elif self.speedup:
+                    due = start + batch_offset / self.speedup
+                else:
+                    due = None
+                if due is not None:
+                    delay = due - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    else:
+                        self.max_lag = max(self.max_lag, -delay)
+                await self.sink.send(lines)
+                self.sent += len(lines)
+                self.batches += 1
+        finally:
+            # The producer needs the loop to finish its queue puts, so wait
+            # for it without blocking; drain the queue in case the sink failed
+            self._stopped.set()
+            while producer.is_alive():
+                while not queue.empty():
+                    queue.get_nowait()
+                await asyncio.sleep(0.001)
+            await self.sink.close()
+        if self._error is not None:
+            raise self._error
+
+        elapsed = time.perf_counter() - start
+        return {
+            "events_sent": self.sent,
+            "batches_sent": self.batches,
+            "elapsed_seconds": elapsed,
+            "events_per_second": self.sent / elapsed if elapsed > 0 else 0.0,
+            "max_lag_seconds": self.max_lag,
+        }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Stream simulated tracking events to a socket or stdout.")
+    parser.add_argument("--sink", default="stdout",
+                        help="stdout, tcp://host:port, udp://host:port or unix:///path (default: stdout)")
+    pacing = parser.add_mutually_exclusive_group()
+    pacing.add_argument("--rate", type=float, default=None, help="target events per second")
+    pacing.add_argument("--speedup", type=float, default=None,
+                        help="replay event time this many times faster than real time")
+    parser.add_argument("--num-packages", type=int, default=10000,
+                        help="packages whose events are streamed (default: 10000)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes generating packages")
+    parser.add_argument("--seed", type=int, default=None, help="master seed for generation")
+    parser.add_argument("--batch-size", type=int, default=500, help="events per write (default: 500)")
+    parser.add_argument("--window", type=int, default=10000,
+                        help="packages whose events are sorted in memory at once; larger inputs are merged "
+                             "from sorted runs on disk (default: 10000)")
+    parser.add_argument("--spill-dir", default=None,
+                        help="directory for the sorted runs (default: the system temporary directory)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    packages = iter_package_data_sharded(args.num_packages, seed=args.seed, workers=args.workers,
+                                         shard_size=DEFAULT_SHARD_SIZE)
+    events = iter_events_in_time_order(packages, window=args.window, spill_dir=args.spill_dir)
+    emitter = EventEmitter(open_sink(args.sink), rate=args.rate, speedup=args.speedup,
+                           batch_size=args.batch_size)
+    stats = asyncio.run(emitter.run(events))
+    # Statistics go to stderr so they never mix with a stdout feed
+    print(f"Sent {stats['events_sent']} events in {stats['elapsed_seconds']:.2f}s "
+          f"({stats['events_per_second']:.0f} events/s, max lag {stats['max_lag_seconds']:.3f}s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
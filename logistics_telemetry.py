@@ -0,0 +1,323 @@
+import argparse
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from generate_logistics_data import PACKAGE_TYPES, PackageType
+from logistics_metrics import add_metrics_arguments, metrics, profile
+
+# Columns of data/smart_logistics_dataset_sampler.csv that are sensor
+# readings, plus the package type that selects the temperature profile
+TELEMETRY_COLUMNS = ["Timestamp", "Asset_ID", "Latitude", "Longitude", "Temperature", "Humidity",
+                     "Traffic_Status", "Waiting_Time", "Asset_Utilization", "Logistics_Delay", "Package_Type"]
+TRAFFIC_STATUSES = ["Clear", "Detour", "Heavy"]
+
+# Steps filtered together by one matrix product in ar1_filter
+AR_BLOCK_SIZE = 64
+
+# Congestion is a standard-normal AR(1) process cut at its terciles into
+# Clear / Detour / Heavy, so each status holds about a third of readings
+TRAFFIC_THRESHOLDS = np.array([-0.4307, 0.4307])
+
+# Share of non-heavy readings flagged as delayed; heavy traffic always is
+BASE_DELAY_PROBABILITY = 0.35
+
+
+@dataclass(frozen=True)
+class ProcessSpec:
+    """An AR(1) sensor process: stationary mean and spread, correlation time and valid range."""
+    mean: float
+    std: float
+    tau_minutes: float
+    low: float = -np.inf
+    high: float = np.inf
+    # Spread of the per-asset mean around ``mean``
+    asset_std: float = 0.0
+
+
+AMBIENT_TEMPERATURE = ProcessSpec(mean=24.0, std=3.0, tau_minutes=240, low=-40.0, high=60.0, asset_std=1.5)
+# Cold chain: a 2-8 °C reefer held near 4 °C by a fast controller, so
+# deviations decay within tens of minutes
+COLD_CHAIN_TEMPERATURE = ProcessSpec(mean=4.0, std=0.6, tau_minutes=20, low=-30.0, high=40.0, asset_std=0.5)
+AMBIENT_HUMIDITY = ProcessSpec(mean=65.0, std=8.5, tau_minutes=180, low=0.0, high=100.0, asset_std=2.0)
+COLD_CHAIN_HUMIDITY = ProcessSpec(mean=85.0, std=4.0, tau_minutes=60, low=0.0, high=100.0, asset_std=2.0)
+UTILIZATION = ProcessSpec(mean=80.0, std=11.0, tau_minutes=360, low=0.0, high=100.0, asset_std=4.0)
+CONGESTION = ProcessSpec(mean=0.0, std=1.0, tau_minutes=30)
+
+# Package types that ride in refrigerated units
+COLD_CHAIN_TYPES = (PackageType.REFRIGERATED,)
+
+# Temperature excursions of refrigerated units (door openings, defrost
+# cycles, compressor faults): expected count per hour and mean jump in °C
+EXCURSIONS_PER_HOUR = 0.05
+EXCURSION_MEAN_CELSIUS = 5.0
+
+# Truck speeds in km/h, scaled down by traffic status
+MEAN_SPEED_KMH = 60.0
+SPEED_STD_KMH = 10.0
+TRAFFIC_SPEED_FACTORS = np.array([1.0, 0.8, 0.4])
+HEADING_STEP_RADIANS = 0.1
+KM_PER_DEGREE = 111.32
+
+# Continental US bounding box for starting positions
+START_LATITUDE = (25.0, 49.0)
+START_LONGITUDE = (-124.0, -67.0)
+
+
+def ar1_filter(innovations: np.ndarray, phi: float, state: np.ndarray) -> np.ndarray:
+    """Run ``x[t] = phi * x[t - 1] + innovations[t]`` along axis 0 from ``state``.
+
+    Steps are processed in blocks of AR_BLOCK_SIZE. Within a block the
+    recurrence is one product with the lower-triangular matrix of powers of
+    ``phi``, batched over all blocks. Only the carry from block to block
+    is sequential. The loop is therefore over ``steps / 64`` blocks rather
+    than over steps, whatever the number of assets.
+    """
+    steps, width = innovations.shape
+    block = AR_BLOCK_SIZE
+    num_blocks = -(-steps // block)
+    padded = np.zeros((num_blocks * block, width))
+    padded[:steps] = innovations
+    lags = np.arange(block)[:, None] - np.arange(block)[None, :]
+    kernel = np.where(lags >= 0, phi ** np.maximum(lags, 0), 0.0)
+    blocks = kernel @ padded.reshape(num_blocks, block, width)
+    decay = (phi ** np.arange(1, block + 1))[:, None]
+    carry = state
+    for values in blocks:
+        values += decay * carry
+        carry = values[-1]
+    return blocks.reshape(-1, width)[:steps]
+
+
+class TelemetryGenerator:
+    """Time-correlated sensor readings for a fleet of assets.
+
+    Every asset carries one package type. Temperature, humidity, asset
+    utilization and a latent congestion level are AR(1) processes whose
+    autocorrelation follows from each process's correlation time and the
+    reading interval. Refrigerated assets use a cold-chain temperature
+    profile with random excursions that decay back to the setpoint.
+    Congestion sets the traffic status, waiting time, delay flag and truck
+    speed, and positions move along slowly turning headings.
+
+    All assets are advanced together, ``steps_per_chunk`` readings at a
+    time, and the state carries over between chunks. A seed fixes the
+    output for a given chunk size.
+    """
+
+    def __init__(self, num_assets: int = 1000, seed: Optional[int] = None,
+                 start_time: Optional[datetime] = None, interval_seconds: int = 60,
+                 package_types: Optional[Sequence[PackageType]] = None,
+                 package_type_weights: Optional[Sequence[float]] = None):
+        self.num_assets = num_assets
+        self.interval_seconds = interval_seconds
+        self.rng = np.random.default_rng(seed)
+        self.start_time = np.datetime64(start_time or datetime.now(), "s")
+        self.step = 0
+        rng = self.rng
+
+        self.asset_ids = [f"Truck_{i + 1}" for i in range(num_assets)]
+        self.package_types = list(package_types or PACKAGE_TYPES)
+        self.type_codes = rng.choice(len(self.package_types), size=num_assets, p=package_type_weights)
+        cold = np.isin(np.array(self.package_types, dtype=object)[self.type_codes], COLD_CHAIN_TYPES)
+        self.cold_chain = cold
+        # Readings are staggered within the interval so assets don't report in lockstep
+        self.phase_seconds = rng.integers(0, interval_seconds, size=num_assets)
+
+        self._processes = {}
+        self._add_process("temperature", np.where(cold, 1, 0), [AMBIENT_TEMPERATURE, COLD_CHAIN_TEMPERATURE])
+        self._add_process("humidity", np.where(cold, 1, 0), [AMBIENT_HUMIDITY, COLD_CHAIN_HUMIDITY])
+        self._add_process("utilization", np.zeros(num_assets, dtype=int), [UTILIZATION])
+        self._add_process("congestion", np.zeros(num_assets, dtype=int), [CONGESTION])
+
+        self.latitude = rng.uniform(*START_LATITUDE, size=num_assets)
+        self.longitude = rng.uniform(*START_LONGITUDE, size=num_assets)
+        self.heading = rng.uniform(0.0, 2 * np.pi, size=num_assets)
+        self.speed_kmh = np.clip(rng.normal(MEAN_SPEED_KMH, SPEED_STD_KMH, size=num_assets), 10.0, None)
+
+    def _add_process(self, name: str, spec_codes: np.ndarray, specs: List[ProcessSpec]):
+        """Per-asset parameters of one process; ``spec_codes`` picks each asset's spec."""
+        # Each spec has its own phi; _advance filters the assets of each spec as one group
+        phis = np.array([np.exp(-self.interval_seconds / (spec.tau_minutes * 60.0)) for spec in specs])
+        mean = np.array([spec.mean for spec in specs])[spec_codes]
+        asset_std = np.array([spec.asset_std for spec in specs])[spec_codes]
+        std = np.array([spec.std for spec in specs])[spec_codes]
+        mean = mean + self.rng.normal(size=len(spec_codes)) * asset_std
+        # Start in the stationary distribution so there is no warm-up transient
+        state = self.rng.normal(size=len(spec_codes)) * std
+        self._processes[name] = {
+            "specs": specs, "codes": spec_codes, "phis": phis, "mean": mean, "state": state,
+            "innovation_std": std * np.sqrt(1.0 - phis[spec_codes] ** 2),
+            "low": np.array([spec.low for spec in specs])[spec_codes],
+            "high": np.array([spec.high for spec in specs])[spec_codes],
+        }
+
+    def _advance(self, name: str, steps: int, jumps: Optional[np.ndarray] = None) -> np.ndarray:
+        process = self._processes[name]
+        innovations = self.rng.standard_normal((steps, self.num_assets)) * process["innovation_std"]
+        if jumps is not None:
+            innovations += jumps
+        deviations = np.empty_like(innovations)
+        for code, phi in enumerate(process["phis"]):
+            assets = process["codes"] == code
+            if assets.all():
+                deviations = ar1_filter(innovations, phi, process["state"])
+            elif assets.any():
+                deviations[:, assets] = ar1_filter(innovations[:, assets], phi, process["state"][assets])
+        process["state"] = deviations[-1].copy()
+        return np.clip(deviations + process["mean"], process["low"], process["high"])
+
+    def _excursions(self, steps: int) -> np.ndarray:
+        """Positive temperature jumps of refrigerated assets, as extra innovations."""
+        probability = EXCURSIONS_PER_HOUR * self.interval_seconds / 3600.0
+        hits = (self.rng.random((steps, self.num_assets)) < probability) & self.cold_chain
+        return np.where(hits, self.rng.exponential(EXCURSION_MEAN_CELSIUS, size=hits.shape), 0.0)
+
+    def _move(self, traffic: np.ndarray) -> tuple:
+        steps = traffic.shape[0]
+        turns = self.rng.normal(0.0, HEADING_STEP_RADIANS, size=traffic.shape)
+        headings = self.heading + np.cumsum(turns, axis=0)
+        distance_km = self.speed_kmh * TRAFFIC_SPEED_FACTORS[traffic] * (self.interval_seconds / 3600.0)
+        # Longitude degrees shrink with latitude; the chunk's starting latitude is close enough
+        lon_km = KM_PER_DEGREE * np.maximum(np.cos(np.radians(self.latitude)), 0.01)
+        latitude = self.latitude + np.cumsum(distance_km * np.cos(headings), axis=0) / KM_PER_DEGREE
+        longitude = self.longitude + np.cumsum(distance_km * np.sin(headings), axis=0) / lon_km
+        latitude = np.clip(latitude, -89.0, 89.0)
+        longitude = (longitude + 180.0) % 360.0 - 180.0
+        self.heading = headings[-1] % (2 * np.pi)
+        self.latitude = latitude[-1].copy()
+        self.longitude = longitude[-1].copy()
+        return latitude, longitude
+
+    @metrics.timed("telemetry_generation")
+    def generate_chunk(self, steps: int) -> pd.DataFrame:
+        """The next ``steps`` readings of every asset, ordered by step then asset."""
+        rng = self.rng
+        temperature = self._advance("temperature", steps, self._excursions(steps))
+        humidity = self._advance("humidity", steps)
+        utilization = self._advance("utilization", steps)
+        congestion = self._advance("congestion", steps)
+
+        traffic = np.searchsorted(TRAFFIC_THRESHOLDS, congestion)
+        waiting = np.clip(np.rint(35.0 + 10.0 * congestion + rng.normal(0.0, 10.0, size=congestion.shape)),
+                          0, None).astype(np.int32)
+        delayed = ((traffic == 2) | (rng.random(congestion.shape) < BASE_DELAY_PROBABILITY)).astype(np.int8)
+        latitude, longitude = self._move(traffic)
+
+        seconds = (self.step + np.arange(steps))[:, None] * self.interval_seconds + self.phase_seconds
+        timestamps = self.start_time + seconds.astype("timedelta64[s]")
+        self.step += steps
+
+        rows = steps * self.num_assets
+        asset_codes = np.tile(np.arange(self.num_assets), steps)
+        chunk = pd.DataFrame({
+            "Timestamp": timestamps.ravel(),
+            "Asset_ID": pd.Categorical.from_codes(asset_codes, categories=self.asset_ids),
+            "Latitude": latitude.ravel().round(4),
+            "Longitude": longitude.ravel().round(4),
+            "Temperature": temperature.ravel().round(1),
+            "Humidity": humidity.ravel().round(1),
+            "Traffic_Status": pd.Categorical.from_codes(traffic.ravel(), categories=TRAFFIC_STATUSES),
+            "Waiting_Time": waiting.ravel(),
+            "Asset_Utilization": utilization.ravel().round(1),
+            "Logistics_Delay": delayed.ravel(),
+            "Package_Type": pd.Categorical.from_codes(
+                self.type_codes[asset_codes], categories=[package_type.value for package_type in self.package_types]),
+        }, copy=False)
+        metrics.incr("telemetry_readings", rows)
+        return chunk
+
+    def iter_chunks(self, num_steps: int, steps_per_chunk: int = 60) -> Iterator[pd.DataFrame]:
+        """Yield ``num_steps`` readings per asset in chunks of ``steps_per_chunk`` steps."""
+        remaining = num_steps
+        while remaining > 0:
+            steps = min(steps_per_chunk, remaining)
+            yield self.generate_chunk(steps)
+            remaining -= steps
+
+
+def write_telemetry(chunks: Iterator[pd.DataFrame], filepath: str, fmt: str = "csv") -> int:
+    """Stream chunks into a CSV or Parquet file; return the number of readings.
+
+    Both formats are encoded by Arrow. Its CSV writer is about ten times
+    faster than ``DataFrame.to_csv``, which would otherwise cap the rate.
+    """
+    import pyarrow as pa
+
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+    rows = 0
+    writer = None
+    with open(filepath, 'wb') as f:
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                with metrics.stage("serialization"):
+                    if writer is None:
+                        writer = _open_writer(f, table.schema, fmt)
+                    writer.write_table(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    return rows
+
+
+def _open_writer(f, schema, fmt: str):
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(f, schema)
+    import pyarrow.csv as pa_csv
+
+    # Arrow quotes header names; no value here needs quoting, so write a
+    # plain header matching the sampler CSV and leave quoting off
+    f.write((",".join(schema.names) + "\n").encode())
+    return pa_csv.CSVWriter(f, schema, write_options=pa_csv.WriteOptions(include_header=False,
+                                                                          quoting_style="none"))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate time-correlated IoT telemetry for a fleet of assets.")
+    parser.add_argument("--assets", type=int, default=1000, help="number of assets (default: 1000)")
+    parser.add_argument("--steps", type=int, default=1440, help="readings per asset (default: 1440)")
+    parser.add_argument("--interval-seconds", type=int, default=60, help="seconds between readings (default: 60)")
+    parser.add_argument("--steps-per-chunk", type=int, default=60,
+                        help="steps generated and written per chunk (default: 60)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible output")
+    parser.add_argument("--start-time", type=datetime.fromisoformat, default=None,
+                        help="ISO timestamp of the first reading (default: now)")
+    parser.add_argument("--format", choices=["csv", "parquet", "none"], default="csv",
+                        help="output format; none only generates, for measuring throughput")
+    parser.add_argument("--output", default=None,
+                        help="output file (default: data/telemetry.csv or data/telemetry.parquet)")
+    add_metrics_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    metrics.enabled = bool(args.metrics_json or args.metrics_prometheus)
+    generator = TelemetryGenerator(args.assets, seed=args.seed, start_time=args.start_time,
+                                   interval_seconds=args.interval_seconds)
+    chunks = generator.iter_chunks(args.steps, args.steps_per_chunk)
+    start = time.perf_counter()
+    with profile(args.profile):
+        if args.format == "none":
+            rows = sum(len(chunk) for chunk in chunks)
+            target = "nowhere"
+        else:
+            target = args.output or os.path.join("data", f"telemetry.{args.format}")
+            rows = write_telemetry(chunks, target, args.format)
+    elapsed = time.perf_counter() - start
+    metrics.write(args.metrics_json, args.metrics_prometheus)
+    print(f"Generated {rows} readings for {args.assets} assets in {elapsed:.2f}s "
+          f"({rows / elapsed if elapsed else 0:,.0f} readings/s), written to {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+from typing import Dict, Hashable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class StatusTransitionEngine:
+    """Advance many packages through a status Markov chain at once.
+
+    States and package types are plain sequences (for example
+    ``list(PackageStatus)``); everything else is index based so the
+    simulation runs on NumPy arrays. Each step draws the next status of every
+    still-active package from its row of the transition matrix and adds a
+    gamma-distributed dwell time, so timestamps within a history are
+    cumulative and therefore strictly ordered.
+    """
+
+    # Gamma shape for dwell times; 2 gives a mode below the mean without the
+    # heavy share of near-zero dwells an exponential would produce.
+    DWELL_SHAPE = 2.0
+
+    def __init__(self,
+                 states: Sequence[Hashable],
+                 package_types: Sequence[Hashable],
+                 transitions: Mapping[Hashable, Mapping[Hashable, float]],
+                 event_count_ranges: Mapping[Hashable, Tuple[int, int]],
+                 dwell_hours: Mapping[Hashable, float],
+                 initial_state: Optional[Hashable] = None):
+        self.states = list(states)
+        self.package_types = list(package_types)
+        state_index = {state: i for i, state in enumerate(self.states)}
+        self.initial_state = state_index[initial_state if initial_state is not None else self.states[0]]
+
+        # Rows not listed are absorbing: the package keeps its status
+        matrix = np.eye(len(self.states))
+        for source, targets in transitions.items():
+            row = np.zeros(len(self.states))
+            for target, probability in targets.items():
+                if probability < 0:
+                    raise ValueError(f"Negative transition probability {source} -> {target}")
+                row[state_index[target]] = probability
+            if not np.isclose(row.sum(), 1.0):
+                raise ValueError(f"Transition probabilities from {source} sum to {row.sum()}, expected 1")
+            matrix[state_index[source]] = row / row.sum()
+        self.transition_matrix = matrix
+        self._cumulative = np.cumsum(matrix, axis=1)
+        self._cumulative[:, -1] = 1.0
+
+        ranges = np.array([event_count_ranges[package_type] for package_type in self.package_types])
+        if (ranges[:, 0] < 1).any() or (ranges[:, 0] > ranges[:, 1]).any():
+            raise ValueError("Event count ranges must satisfy 1 <= low <= high")
+        self.min_events = ranges[:, 0]
+        self.max_events = ranges[:, 1]
+
+        self.dwell_seconds = np.array([dwell_hours[state] * 3600.0 for state in self.states])
+
+    def simulate(self, type_codes: np.ndarray,
+                 rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Simulate histories for packages with the given type indices.
+
+        Returns ``(offsets, status_codes, elapsed_seconds)``. Events of package
+        ``i`` occupy ``offsets[i]:offsets[i + 1]``; ``elapsed_seconds`` is
+        measured from each package's first event.
+        """
+        num_packages = len(type_codes)
+        counts = rng.integers(self.min_events[type_codes], self.max_events[type_codes] + 1)
+        offsets = np.zeros(num_packages + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        status_codes = np.empty(offsets[-1], dtype=np.int8)
+        elapsed_seconds = np.empty(offsets[-1], dtype=np.float64)
+        current = np.full(num_packages, self.initial_state, dtype=np.int8)
+        clock = np.zeros(num_packages)
+
+        for step in range(int(counts.max(initial=0))):
+            active = np.flatnonzero(counts > step)
+            positions = offsets[active] + step
+            active_states = current[active]
+            status_codes[positions] = active_states
+            elapsed_seconds[positions] = clock[active]
+
+            draws = rng.random(len(active))
+            next_states = (draws[:, None] >= self._cumulative[active_states]).sum(axis=1)
+            current[active] = np.minimum(next_states, len(self.states) - 1)
+            mean_dwell = self.dwell_seconds[active_states]
+            clock[active] += rng.gamma(self.DWELL_SHAPE, mean_dwell / self.DWELL_SHAPE)
+
+        return offsets, status_codes, elapsed_seconds
+
+    def describe(self) -> Dict[Hashable, Dict[Hashable, float]]:
+        """Return the non-zero transition probabilities keyed by state."""
+        return {
+            source: {
+                target: float(probability)
+                for target, probability in zip(self.states, row) if probability > 0
+            }
+            for source, row in zip(self.states, self.transition_matrix)
+        }
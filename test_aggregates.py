@@ -0,0 +1,39 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from generate_logistics_data import SmartLogisticsTrackingModel
+from logistics_analyzer import LogisticsAnalyzer
+
+
+@pytest.fixture(scope="module")
+def data_dir(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("aggregates")
+    model = SmartLogisticsTrackingModel(seed=6, reference_time=datetime(2025, 5, 20, 12), data_dir=str(data_dir))
+    model.save_to_csv(model.iter_package_data(2000, show_progress=False))
+    return data_dir
+
+
+def test_chunked_stats_match_in_memory_stats(data_dir):
+    in_memory = LogisticsAnalyzer(data_dir=str(data_dir))
+    chunked = LogisticsAnalyzer(data_dir=str(data_dir), chunk_size=300)
+
+    expected, actual = in_memory.get_basic_stats(), chunked.get_basic_stats()
+    assert actual["total_packages"] == expected["total_packages"]
+    assert actual["delivery_status_counts"] == expected["delivery_status_counts"]
+    assert actual["package_type_distribution"] == expected["package_type_distribution"]
+    assert actual["avg_weight"] == pytest.approx(expected["avg_weight"])
+    assert actual["avg_dimensions"] == pytest.approx(expected["avg_dimensions"])
+
+    expected, actual = in_memory.analyze_delivery_times(), chunked.analyze_delivery_times()
+    assert set(actual) == set(expected)
+    for key in ("avg_delay_hours", "max_delay_hours", "min_delay_hours", "on_time_delivery_percentage"):
+        assert actual[key] == pytest.approx(expected[key])
+
+    # The sketch answers with the value at the lower rank, within 1% relative error
+    delivered = in_memory.df[in_memory.df["current_status"] == "Delivered"]
+    delays = (delivered["actual_delivery"] - delivered["estimated_delivery"]).dt.total_seconds() / 3600
+    for q in (0.5, 0.95, 0.99):
+        exact = np.quantile(delays, q, method="lower")
+        assert actual[f"p{q * 100:g}_delay_hours"] == pytest.approx(exact, rel=0.01, abs=1e-6)
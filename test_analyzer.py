@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pytest
+
+import logistics_analyzer
+from generate_logistics_data import SmartLogisticsTrackingModel
+from logistics_analyzer import MODEL_COLUMNS, PLOTS, LogisticsAnalyzer
+
+
+@pytest.fixture(scope="module")
+def data_dir(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("analyzer")
+    model = SmartLogisticsTrackingModel(seed=6, reference_time=datetime(2025, 5, 20, 12), data_dir=str(data_dir))
+    model.save_to_csv(model.iter_package_data(2000, show_progress=False))
+    return data_dir
+
+
+def test_chunked_report_never_loads_the_full_frame(data_dir):
+    analyzer = LogisticsAnalyzer(data_dir=str(data_dir), chunk_size=500, use_cache=False)
+    assert len(analyzer.sample_data(n_samples=3)) == 3
+    report = analyzer.generate_report()
+    assert analyzer._df is None
+    assert report["basic_stats"]["total_packages"] == 2000
+    assert 0 <= report["model_accuracy"] <= 1
+    for name in PLOTS:
+        assert (data_dir / f"{name}.png").exists()
+
+
+def test_chunked_training_reads_only_model_columns(data_dir, monkeypatch):
+    analyzer = LogisticsAnalyzer(data_dir=str(data_dir), chunk_size=500, use_cache=False)
+    read_csv = analyzer._read_csv
+    requested = []
+
+    def recording_read_csv(columns=None, chunksize=None):
+        requested.append(columns)
+        return read_csv(columns, chunksize=chunksize)
+
+    monkeypatch.setattr(analyzer, "_read_csv", recording_read_csv)
+    _, accuracy = analyzer.train_delivery_prediction_model()
+    assert requested == [MODEL_COLUMNS, MODEL_COLUMNS]
+    assert 0 <= accuracy <= 1
+
+
+def test_single_cpu_report_runs_serially(data_dir, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("no worker pool on a single CPU")
+
+    monkeypatch.setattr(logistics_analyzer, "available_cpus", lambda: 1)
+    monkeypatch.setattr(logistics_analyzer, "ProcessPoolExecutor", no_pool)
+    analyzer = LogisticsAnalyzer(data_dir=str(data_dir), use_cache=False)
+    report = analyzer.generate_report(parallel=True)
+    assert report["basic_stats"]["total_packages"] == 2000
+
+
+def test_plot_workers_leave_a_cpu_for_the_stages(data_dir, monkeypatch):
+    pools = []
+
+    class RecordingPool(logistics_analyzer.ProcessPoolExecutor):
+        def __init__(self, max_workers=None, **kwargs):
+            pools.append(max_workers)
+            super().__init__(max_workers=max_workers, **kwargs)
+
+    monkeypatch.setattr(logistics_analyzer, "available_cpus", lambda: 2)
+    monkeypatch.setattr(logistics_analyzer, "ProcessPoolExecutor", RecordingPool)
+    analyzer = LogisticsAnalyzer(data_dir=str(data_dir), use_cache=False)
+    report = analyzer.generate_report(parallel=True)
+    assert pools == [1]
+    assert 0 <= report["model_accuracy"] <= 1
+
+
+def test_chunked_plots_with_a_single_package(tmp_path):
+    model = SmartLogisticsTrackingModel(seed=6, reference_time=datetime(2025, 5, 20, 12), data_dir=str(tmp_path))
+    model.save_to_csv(model.iter_package_data(1, show_progress=False))
+    analyzer = LogisticsAnalyzer(data_dir=str(tmp_path), chunk_size=10, use_cache=False)
+    timings = analyzer._render_plots_chunked()
+    assert set(timings) == set(PLOTS)
+    for name in PLOTS:
+        assert (tmp_path / f"{name}.png").exists()
@@ -0,0 +1,57 @@
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from generate_logistics_data import (SERIAL_SPACE, SHIPPING_CARRIERS, EnumEncoder, SmartLogisticsTrackingModel,
+                                     format_tracking_numbers, main, sequence_serials)
+
+GENERATE_ARGS = ["--num-packages", "1200", "--seed", "7", "--shard-size", "300",
+                 "--reference-time", "2025-05-20T12:00:00", "--format", "json", "ndjson", "csv"]
+
+
+def _generate(run_dir, monkeypatch, *args):
+    run_dir.mkdir()
+    monkeypatch.chdir(run_dir)
+    main(GENERATE_ARGS + list(args))
+    return {path.name: path.read_bytes() for path in sorted((run_dir / "data").iterdir())}
+
+
+def test_worker_count_does_not_change_output(tmp_path, monkeypatch):
+    single = _generate(tmp_path / "workers-1", monkeypatch, "--workers", "1")
+    several = _generate(tmp_path / "workers-3", monkeypatch, "--workers", "3")
+    assert {"logistics_data.json", "logistics_data.ndjson", "logistics_data.csv"} <= set(single)
+    assert single == several
+
+
+def test_streamed_json_matches_json_dumps(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    model = SmartLogisticsTrackingModel(seed=8, reference_time=datetime(2025, 5, 20, 12))
+    packages = model.generate_package_data(300, show_progress=False)
+    model.save_to_json(iter(packages))
+    expected = json.dumps(packages, indent=2, cls=EnumEncoder)
+    assert (tmp_path / "data" / "logistics_data.json").read_text() == expected
+
+
+def test_empty_json_matches_json_dumps(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    model = SmartLogisticsTrackingModel(seed=8)
+    model.save_to_json(iter([]))
+    assert (tmp_path / "data" / "logistics_data.json").read_text() == json.dumps([], indent=2)
+
+
+def test_tracking_numbers_are_unique(tmp_path, monkeypatch):
+    _generate(tmp_path / "run", monkeypatch, "--workers", "1")
+    tracking_numbers = pd.read_csv(tmp_path / "run" / "data" / "logistics_data.csv", usecols=["tracking_number"])
+    assert tracking_numbers["tracking_number"].is_unique
+
+
+def test_tracking_numbers_have_prefix_and_nine_digits():
+    serials = np.concatenate([sequence_serials(0, 1000), sequence_serials(SERIAL_SPACE - 500, 1000)])
+    carriers = np.arange(len(serials)) % len(SHIPPING_CARRIERS)
+    tracking_numbers = format_tracking_numbers(carriers, serials)
+    prefixes = tuple(carrier.value[:3] for carrier in SHIPPING_CARRIERS)
+    assert all(len(number) == 12 and number.startswith(prefixes) and number[3:].isdigit()
+               for number in tracking_numbers)
+    assert len(set(serials[:1000].tolist())) == 1000
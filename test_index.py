@@ -0,0 +1,57 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from generate_logistics_data import SmartLogisticsTrackingModel
+from logistics_index import PackageIndex, build_index, index_path_for
+
+
+@pytest.fixture(scope="module", params=["json", "ndjson"])
+def data_file(request, tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("index")
+    model = SmartLogisticsTrackingModel(seed=9, reference_time=datetime(2025, 5, 20, 12), data_dir=str(data_dir))
+    filename = f"logistics_data.{request.param}"
+    model.save_packages(model.iter_package_data(800, show_progress=False), {request.param: filename}, index=True)
+    path = data_dir / filename
+    if request.param == "json":
+        packages = json.loads(path.read_text())
+    else:
+        packages = [json.loads(line) for line in path.read_text().splitlines()]
+    return str(path), packages
+
+
+def test_every_package_is_found(data_file):
+    path, packages = data_file
+    with PackageIndex(path) as index:
+        assert len(index) == len(packages)
+        for package in packages:
+            assert package["tracking_number"] in index
+            assert index.get(package["tracking_number"]) == package
+            assert json.loads(index.get_raw(package["tracking_number"])) == package
+
+
+def test_missing_tracking_numbers(data_file):
+    path, packages = data_file
+    with PackageIndex(path) as index:
+        assert "XYZ000000000" not in index
+        assert index.get("XYZ000000000") is None
+        assert index.get_raw("XYZ000000000") is None
+
+
+def test_get_many_keeps_request_order(data_file):
+    path, packages = data_file
+    requested = [packages[5]["tracking_number"], "XYZ000000000", packages[0]["tracking_number"],
+                 packages[-1]["tracking_number"], packages[5]["tracking_number"]]
+    with PackageIndex(path) as index:
+        assert index.get_many(requested) == [packages[5], None, packages[0], packages[-1], packages[5]]
+
+
+def test_rebuilt_index_matches_written_index(data_file, tmp_path):
+    path, packages = data_file
+    if not path.endswith(".ndjson"):
+        pytest.skip("build_index reads NDJSON only")
+    rebuilt = str(tmp_path / "rebuilt.idx")
+    assert build_index(path, rebuilt) == len(packages)
+    with open(index_path_for(path), 'rb') as written, open(rebuilt, 'rb') as built:
+        assert written.read() == built.read()
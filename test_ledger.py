@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from logistics_ledger import LedgerSink, LedgerStore, MerkleTree, MockChain, verify_proof
+
+
+def _events(count):
+    return [{"tracking_number": f"UPS{i:09d}", "sequence": i, "status": "In Transit"} for i in range(count)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 8, 13])
+def test_every_leaf_proof_verifies(size):
+    leaves = [f"leaf-{i}".encode() for i in range(size)]
+    tree = MerkleTree(leaves)
+    for index, leaf in enumerate(leaves):
+        assert verify_proof(leaf, tree.proof(index), tree.root.hex())
+
+
+def test_modified_leaf_fails_verification():
+    leaves = [f"leaf-{i}".encode() for i in range(7)]
+    tree = MerkleTree(leaves)
+    assert not verify_proof(b"leaf-3 tampered", tree.proof(3), tree.root.hex())
+
+
+def _anchored_store(tmp_path, count=10, batch_size=4):
+    store = LedgerStore(str(tmp_path))
+    sink = LedgerSink(MockChain(latency=0), store, batch_size=batch_size, max_in_flight=2)
+    asyncio.run(sink.run(_events(count)))
+    return LedgerStore(str(tmp_path))
+
+
+def test_stored_proofs_verify_against_anchored_roots(tmp_path):
+    store = _anchored_store(tmp_path)
+    assert store.batch_ids() == [0, 1, 2]
+    for batch_id in store.batch_ids():
+        for index in range(len(store.leaves(batch_id))):
+            proof = store.proof(batch_id, index)
+            assert proof["root"] == store.anchors[batch_id]["root"]
+            assert verify_proof(proof["leaf"].encode(), proof["path"], proof["root"])
+
+
+def test_tampered_store_fails_against_anchored_root(tmp_path):
+    store = _anchored_store(tmp_path)
+    batch_path = tmp_path / "batch-000001.ndjson"
+    batch_path.write_bytes(batch_path.read_bytes().replace(b"In Transit", b"Delivered", 1))
+    for index in range(len(store.leaves(1))):
+        proof = store.proof(1, index)
+        assert not verify_proof(proof["leaf"].encode(), proof["path"], proof["root"])
+
+
+def test_unanchored_batch_has_no_proof(tmp_path):
+    store = LedgerStore(str(tmp_path))
+    store.save_batch(0, [b"{}"])
+    with pytest.raises(ValueError, match="no anchored root"):
+        store.proof(0, 0)
@@ -0,0 +1,27 @@
+import threading
+
+from logistics_metrics import MetricsRegistry
+
+
+def test_disabled_registry_ignores_records():
+    registry = MetricsRegistry()
+    registry.record("plotting", 1.0)
+    registry.incr("rows")
+    assert registry.stages == {} and registry.counters == {}
+
+
+def test_records_from_threads_are_all_counted():
+    registry = MetricsRegistry(enabled=True)
+
+    def work():
+        for _ in range(2000):
+            registry.record("stage", 0.001)
+            registry.incr("rows")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry.stages["stage"]["count"] == 8000
+    assert registry.counters["rows"] == 8000
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from generate_logistics_data import SmartLogisticsTrackingModel
+from logistics_prediction import TARGET, DeliveryStatusModel, _read_frames, merge_short_chunks
+
+
+@pytest.fixture(scope="module")
+def csv_file(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("prediction")
+    model = SmartLogisticsTrackingModel(seed=4, reference_time=datetime(2025, 5, 20, 12), data_dir=str(data_dir))
+    model.save_to_csv(model.iter_package_data(3000, show_progress=False))
+    return str(data_dir / "logistics_data.csv")
+
+
+def test_short_tail_chunk_is_merged():
+    frames = [pd.DataFrame({"a": range(n)}) for n in (100, 100, 10)]
+    assert [len(chunk) for chunk in merge_short_chunks(frames)] == [100, 110]
+
+
+def test_fit_chunks_with_short_tail(csv_file):
+    model = DeliveryStatusModel().fit_chunks(_read_frames(csv_file, 2990), iterations_per_chunk=5)
+    assert model.last_fit_stats["rows"] == 3000
+
+
+def test_fit_chunks_with_missing_and_unseen_statuses(csv_file):
+    frame = pd.read_csv(csv_file)
+    rare = frame[TARGET].value_counts().index[-1]
+    first, second, third = frame.iloc[:1200], frame.iloc[1200:2400], frame.iloc[2400:].copy()
+    second = second[second[TARGET] != rare]
+    third.loc[third.index[:3], TARGET] = "Unknown"
+
+    model = DeliveryStatusModel().fit_chunks([first, second, third], iterations_per_chunk=5)
+    assert rare in model.classes_
+    assert "Unknown" not in model.classes_
+    assert model.last_fit_stats["dropped_rows"] == 3
+    assert set(model.predict(frame)) <= set(model.classes_)
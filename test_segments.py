@@ -0,0 +1,55 @@
+import pytest
+
+import logistics_segments
+from generate_logistics_data import main
+from logistics_segments import SegmentedGenerator, load_manifest
+
+SEGMENTED_ARGS = ["--num-packages", "600", "--seed", "3", "--shard-size", "100", "--segment-size", "300",
+                  "--reference-time", "2025-05-20T12:00:00", "--format", "ndjson"]
+
+
+@pytest.mark.parametrize("option", [["--format", "csv"], ["--format", "ndjson", "json"], ["--index"],
+                                    ["--shard-size", "50"], ["--segment-size", "600"]])
+def test_append_rejects_a_different_layout(tmp_path, monkeypatch, option):
+    monkeypatch.chdir(tmp_path)
+    main(SEGMENTED_ARGS)
+    with pytest.raises(SystemExit, match="cannot be changed"):
+        main(["--append", "--num-packages", "100"] + option)
+    manifest = load_manifest(str(tmp_path / "data" / "logistics_dataset"))
+    assert manifest["packages"] == 600
+    assert manifest["pending"] is None
+
+
+def test_append_accepts_the_same_layout(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    main(SEGMENTED_ARGS)
+    main(["--append", "--num-packages", "300", "--format", "ndjson", "--shard-size", "100"])
+    assert load_manifest(str(tmp_path / "data" / "logistics_dataset"))["packages"] == 900
+
+
+def test_failed_segment_closes_the_package_stream(tmp_path, monkeypatch):
+    closed = []
+    streams = []  # keeps the stream alive, so only an explicit close runs its finally
+
+    def stream():
+        try:
+            while True:
+                yield {}
+        finally:
+            closed.append(True)
+
+    def packages(*args, **kwargs):
+        streams.append(stream())
+        return streams[-1]
+
+    def fail(self, packages, count, outputs):
+        next(packages)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(logistics_segments, "iter_package_data_sharded", packages)
+    monkeypatch.setattr(SegmentedGenerator, "_write_segment", fail)
+    generator = SegmentedGenerator(str(tmp_path / "dataset"))
+    generator.start(200, ["ndjson"], seed=1, shard_size=100, segment_size=100)
+    with pytest.raises(OSError, match="disk full"):
+        generator.run()
+    assert closed == [True]
@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime
+from itertools import islice
+
+import pytest
+
+import logistics_stream
+from generate_logistics_data import SmartLogisticsTrackingModel
+from logistics_stream import EventEmitter, iter_events_in_time_order
+
+
+@pytest.fixture(scope="module")
+def packages(tmp_path_factory):
+    model = SmartLogisticsTrackingModel(seed=5, reference_time=datetime(2025, 5, 20, 12),
+                                        data_dir=str(tmp_path_factory.mktemp("stream")))
+    return model.generate_package_data(1000, show_progress=False)
+
+
+def _keys(events):
+    return [(event["timestamp"], event["tracking_number"], event["status"]) for event in events]
+
+
+@pytest.mark.parametrize("window", [1000, 100, 7])
+def test_events_are_in_global_time_order(packages, window, tmp_path, monkeypatch):
+    monkeypatch.setattr(logistics_stream, "MAX_MERGE_RUNS", 4)
+    events = list(iter_events_in_time_order(iter(packages), window=window, spill_dir=str(tmp_path)))
+    timestamps = [event["timestamp"] for event in events]
+    assert timestamps == sorted(timestamps)
+    assert sorted(_keys(events)) == sorted(_keys(iter_events_in_time_order(iter(packages), window=10**6)))
+    assert list(tmp_path.iterdir()) == []
+
+
+class ListSink:
+    def __init__(self):
+        self.lines = []
+        self.closed = False
+
+    async def open(self):
+        pass
+
+    async def send(self, lines):
+        self.lines.extend(lines)
+
+    async def close(self):
+        self.closed = True
+
+
+def test_producer_error_is_raised_after_the_sent_batches(packages):
+    def failing_events():
+        yield from islice(iter_events_in_time_order(iter(packages)), 25)
+        raise OSError("disk full")
+
+    sink = ListSink()
+    emitter = EventEmitter(sink, batch_size=10)
+    with pytest.raises(OSError, match="disk full"):
+        asyncio.run(emitter.run(failing_events()))
+    assert len(sink.lines) == 20
+    assert sink.closed